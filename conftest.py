@@ -2,8 +2,17 @@ import pytest
 import os
 import json
 import allure
+import platform
+import warnings
 from datetime import datetime
 
+from utils.run_summary import add_summary_section, write_summary_sections
+
+browser_usage_key = pytest.StashKey()
+run_id_key = pytest.StashKey()
+merged_metrics_key = pytest.StashKey()
+judge_cache_usage_key = pytest.StashKey()
+
 # Environment configuration
 @pytest.fixture(scope="session")
 def env_config():
@@ -22,35 +31,587 @@ def jwt_token(env_config):
     """Get JWT token for API calls"""
     return env_config.get("jwt_token", "default_token")
 
+# Shared judge, paced to the primary backend's rate limits
+@pytest.fixture(scope="session")
+def groq_judge(request):
+    """One judge client per session behind a token-bucket scheduler.
+
+    Groq by default; --judge-backend ollama uses the local model instead, and
+    --judge-fallback adds a second backend that hedges slow calls and takes
+    over from a failing one.
+    """
+    from utils.judge_backends import HedgedJudge, create_backend
+    from utils.judge_scheduler import JudgeScheduler, worker_share
+
+    option = request.config.getoption
+    names = [option("--judge-backend")]
+    if option("--judge-fallback") not in ("none", names[0]):
+        names.append(option("--judge-fallback"))
+    backends = [
+        create_backend(name, ollama_model=option("--ollama-model"), ollama_url=option("--ollama-url"),
+                       keep_alive=option("--ollama-keep-alive"))
+        for name in names
+    ]
+
+    # Each xdist worker paces its own buckets, so it gets its share of the quota
+    workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    llm = backends[0]
+    if len(backends) > 1:
+        llm = HedgedJudge(backends, hedge_percentile=option("--judge-hedge-percentile"), workers=workers)
+        add_summary_section(request.config, "Judge backends", llm)
+    # Load a local model now so the first judged prompt doesn't pay for it
+    llm.warm_up()
+
+    rpm, tpm = llm.rate_limits
+    rpm, tpm = worker_share((option("--judge-rpm") or rpm, option("--judge-tpm") or tpm), workers)
+    judge = JudgeScheduler(
+        llm,
+        rpm=rpm,
+        tpm=tpm
+    )
+    add_summary_section(request.config, "Judge scheduling", judge.stats)
+    yield judge
+    if len(backends) > 1:
+        llm.close()
+
+# On-disk cache of judge verdicts
+@pytest.fixture(scope="session")
+def judge_cache(request):
+    """Shared verdict cache, or None when --no-judge-cache is given"""
+    if request.config.getoption("--no-judge-cache"):
+        yield None
+        return
+
+    from utils.judge_cache import JudgeCache
+
+    cache = JudgeCache(
+        request.config.getoption("--judge-cache-path"),
+        max_entries=request.config.getoption("--judge-cache-max-entries"),
+        max_age_days=request.config.getoption("--judge-cache-max-age-days")
+    )
+    worker = hasattr(request.config, "workeroutput")
+    if not worker:
+        add_summary_section(request.config, "Judge cache", cache)
+    yield cache
+    cache.close()
+    if worker:
+        # Under xdist the controller prints the summary, so hand the numbers over to it
+        request.config.workeroutput["judge_cache"] = cache.usage()
+
+def judge_cache_usage(config):
+    """The workers' judge cache hits and misses, registered as a summary section on first use"""
+    from utils.judge_cache import CacheUsage
+
+    if judge_cache_usage_key not in config.stash:
+        config.stash[judge_cache_usage_key] = CacheUsage()
+        add_summary_section(config, "Judge cache", config.stash[judge_cache_usage_key])
+    return config.stash[judge_cache_usage_key]
+
+# Record/replay of bot event streams
+@pytest.fixture(scope="session")
+def cassettes(request):
+    """Cassette store for --cassettes record/replay, or None when off"""
+    mode = request.config.getoption("--cassettes")
+    if mode == "off":
+        return None
+
+    from utils.cassettes import CassetteStore
+
+    return CassetteStore(
+        request.config.getoption("--cassette-dir"),
+        mode=mode,
+        pace=request.config.getoption("--replay-pace")
+    )
+
+# Per-prompt streaming latency
+@pytest.fixture(scope="session")
+def stream_metrics(request):
+    """Collects stream timings and writes them to --metrics-file at session end"""
+    from utils.results_sink import worker_path
+    from utils.stream_metrics import MetricsRecorder
+
+    recorder = MetricsRecorder()
+    if hasattr(request.config, "workerinput"):
+        yield recorder
+        # One file per xdist worker; the controller merges them at session end
+        if recorder.records:
+            recorder.write(worker_path(request.config.getoption("--metrics-file")), summary=False)
+        return
+    add_summary_section(request.config, "Stream latency by category (cold starts excluded)", recorder)
+    yield recorder
+    if recorder.records:
+        recorder.write(request.config.getoption("--metrics-file"))
+
+# Structured per-prompt results
+@pytest.fixture(scope="session")
+def results_sink(request):
+    """Batched, append-only JSONL of every prompt's outcome (one file per xdist worker)"""
+    from utils.results_sink import ResultsSink, worker_path
+
+    workerinput = getattr(request.config, "workerinput", {})
+    sink = ResultsSink(
+        worker_path(request.config.getoption("--results-file")),
+        run_id=workerinput.get("stocksense_run_id") or request.config.stash.get(run_id_key, None),
+        batch_size=request.config.getoption("--results-batch-size")
+    )
+    add_summary_section(request.config, "Prompt results", sink)
+    yield sink
+    sink.close()
+
+# Rolling per-prompt baseline for flagging regressions while tests run
+@pytest.fixture(scope="session")
+def prompt_baseline(request):
+    """Each prompt's history over the last --baseline-runs runs, or None without --baseline"""
+    option = request.config.getoption
+    if not option("--baseline"):
+        yield None
+        return
+
+    from utils.regression_baseline import HistoryStore, PromptBaseline
+
+    store = HistoryStore(option("--baseline-path"))
+    workerinput = getattr(request.config, "workerinput", {})
+    yield PromptBaseline(
+        store,
+        run_id=workerinput.get("stocksense_run_id") or request.config.stash.get(run_id_key, None),
+        runs=option("--baseline-runs"),
+        latency_limit=option("--baseline-latency-limit"),
+        score_limit=option("--baseline-prompt-score-limit")
+    )
+    store.close()
+
+# Repeated sampling of noisy scores, stopped once the verdict is settled
+@pytest.fixture(scope="session")
+def sequential_sampling(request):
+    """SamplingStats for --sequential-max-samples above 1, else None (one sample per prompt)"""
+    option = request.config.getoption
+    if option("--sequential-max-samples") <= 1:
+        return None
+
+    from utils.sequential_sampling import SamplingStats
+
+    stats = SamplingStats(
+        max_samples=option("--sequential-max-samples"),
+        min_samples=option("--sequential-min-samples"),
+        confidence=option("--sequential-confidence"),
+        min_spread=option("--sequential-min-spread")
+    )
+    add_summary_section(request.config, "Sequential sampling", stats)
+    return stats
+
+# Local stand-in for the bot endpoint, configured per test with @pytest.mark.mock_bot(...)
+@pytest.fixture
+def mock_bot_server(request):
+    """A running MockBotServer; its url and a matching token are on the server object"""
+    from utils.mock_bot_server import MockBotConfig, MockBotServer
+
+    marker = request.node.get_closest_marker("mock_bot")
+    with MockBotServer(MockBotConfig(**(marker.kwargs if marker else {}))) as server:
+        yield server
+
+@pytest.hookimpl(optionalhook=True, tryfirst=True)
+def pytest_xdist_make_scheduler(config, log):
+    # Spread an ordered collection so a worker that frees up always takes the longest test left
+    if config.getoption("--test-order") == "file" or config.getoption("dist") != "load":
+        return None
+    from utils.test_ordering import LongestFirstScheduling
+
+    return LongestFirstScheduling(config, log)
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    # Every xdist worker tags its records with the controller's run id
+    node.workerinput["stocksense_run_id"] = node.config.stash[run_id_key]
+
+# Shared browsers for the Selenium suite
+@pytest.fixture(scope="session")
+def browser_pool(request):
+    """Chrome sessions reused across tests (one pool per xdist worker)"""
+    from utils.browser_pool import BrowserPool, start_chrome
+
+    headless = request.config.getoption("--headless")
+    pool = BrowserPool(size=1, factory=lambda: start_chrome(headless=headless),
+                       name=os.environ.get("PYTEST_XDIST_WORKER", "main"))
+    yield pool
+    pool.close()
+    if hasattr(request.config, "workeroutput"):
+        # Under xdist the controller prints the summary, so hand the numbers over to it
+        request.config.workeroutput["browser_usage"] = pool.usage_rows()
+    else:
+        browser_usage(request.config).add(pool.usage_rows())
+
+def browser_usage(config):
+    """The run's BrowserUsageReport, registered as a summary section on first use"""
+    from utils.browser_pool import BrowserUsageReport
+
+    if browser_usage_key not in config.stash:
+        config.stash[browser_usage_key] = BrowserUsageReport()
+        add_summary_section(config, "Browser utilisation", config.stash[browser_usage_key])
+    return config.stash[browser_usage_key]
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, "workeroutput", {})
+    rows = workeroutput.get("browser_usage")
+    if rows:
+        browser_usage(node.config).add(rows)
+    if "judge_cache" in workeroutput:
+        judge_cache_usage(node.config).add(workeroutput["judge_cache"])
+
+@pytest.fixture
+def driver(browser_pool):
+    """A pooled Chrome, reset to a clean logged-out state after the test"""
+    browser = browser_pool.acquire()
+    yield browser
+    browser_pool.release(browser)
+
+@pytest.fixture(scope="session")
+def app_credentials():
+    """(username, password) of the test account"""
+    return os.environ.get("APP_USERNAME", "vyom"), os.environ.get("APP_PASSWORD", "1234")
+
+@pytest.fixture(scope="session")
+def auth_tokens(app_credentials):
+    """Tokens from the login API, fetched once per session; None if the API can't give them"""
+    import requests
+
+    from utils.browser_pool import fetch_auth_tokens
+
+    try:
+        return fetch_auth_tokens(*app_credentials)
+    except requests.RequestException as e:
+        warnings.warn(pytest.PytestWarning(f"Login API failed ({e}); logged-in tests log in through the form"))
+        return None
+
+@pytest.fixture
+def logged_in_driver(driver, auth_tokens, app_credentials, waits):
+    """A pooled Chrome with the auth token already in the app's storage.
+
+    Without tokens from the login API, or if the seeded storage doesn't get
+    past the login page (AUTH_STORAGE_KEYS not matching what the app reads),
+    logs in through the form instead.
+    """
+    from selenium.webdriver.common.by import By
+
+    from utils.browser_pool import APP_URL, inject_auth, submit_login_form
+
+    if auth_tokens is not None:
+        inject_auth(driver, auth_tokens)
+    driver.get(APP_URL)
+    if auth_tokens is None or not waits.url_contains("chat", timeout=5, raise_on_timeout=False):
+        if auth_tokens is not None:
+            warnings.warn(pytest.PytestWarning("Seeded auth tokens did not log in (check AUTH_STORAGE_KEYS); "
+                                               "logging in through the form"))
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+        since = waits.page_time()
+        submit_login_form(driver, *app_credentials)
+        assert waits.login_settled(since), "Login through the form failed"
+    return driver
+
+@pytest.fixture(scope="session")
+def wait_recorder(request):
+    """Every condition wait of the run, for the end-of-run summary"""
+    from utils.waits import WaitRecorder
+
+    recorder = WaitRecorder()
+    add_summary_section(request.config, "Browser waits", recorder)
+    return recorder
+
+@pytest.fixture
+def waits(driver, wait_recorder):
+    """Condition-based waits on the test's browser; their real durations are attached to the report"""
+    from utils.waits import Waiter
+
+    waiter = Waiter(driver, recorder=wait_recorder)
+    yield waiter
+    if waiter.records:
+        allure.attach(wait_recorder.report(waiter.records), name="Waits", attachment_type=allure.attachment_type.TEXT)
+
+@pytest.fixture
+def virtual_clock(driver):
+    """Page clock that can be moved forward instead of sleeping"""
+    from utils.waits import VirtualClock
+
+    clock = VirtualClock(driver).install()
+    yield clock
+    clock.uninstall()
+
+# Command line options
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bot-concurrency",
+        action="store",
+        type=int,
+        default=0,
+        help="Prefetch bot replies for all collected prompts with this many concurrent streams (0 = sequential)"
+    )
+    parser.addoption(
+        "--bot-max-connections-per-host",
+        action="store",
+        type=int,
+        default=8,
+        help="Connection cap per host for the concurrent bot client"
+    )
+    parser.addoption("--pipeline", action="store_true", default=False,
+                     help="Stream, clean and judge prompts in overlapping background stages")
+    parser.addoption("--stream-workers", action="store", type=int, default=4,
+                     help="Concurrent bot streams in the pipeline")
+    parser.addoption("--judge-workers", action="store", type=int, default=2,
+                     help="Concurrent judge calls in the pipeline")
+    parser.addoption("--pipeline-queue-size", action="store", type=int, default=4,
+                     help="Items allowed to wait between pipeline stages before upstream blocks")
+    parser.addoption("--bot-connect-timeout", action="store", type=float, default=10.0,
+                     help="Connect timeout in seconds for bot requests")
+    parser.addoption("--bot-read-timeout", action="store", type=float, default=60.0,
+                     help="Read timeout in seconds between streamed bytes")
+    parser.addoption("--bot-total-timeout", action="store", type=float, default=180.0,
+                     help="Total time budget in seconds for one streamed reply")
+    parser.addoption("--warmup-max-wait", action="store", type=float, default=120.0,
+                     help="How long to keep pinging BOT_URL while the backend wakes up")
+    parser.addoption("--no-warmup", action="store_true", default=False,
+                     help="Skip the cold-start warm-up before the first prompt")
+    parser.addoption("--mock-bot", action="store", nargs="?", const="", default=None, metavar="PROFILE",
+                     help="Run the bot suite against a local mock server, e.g. --mock-bot ttft=0.4,drop_rate=0.05")
+    parser.addoption("--cassettes", action="store", default="off", choices=("off", "record", "replay"),
+                     help="Record raw bot event streams to cassettes, or replay them instead of calling BOT_URL")
+    parser.addoption("--cassette-dir", action="store",
+                     default=os.path.join(".stocksense_cache", "cassettes"),
+                     help="Directory holding recorded bot cassettes")
+    parser.addoption("--replay-pace", action="store", default="fast", choices=("fast", "recorded"),
+                     help="Replay cassettes at full speed or at the recorded inter-chunk pace")
+    parser.addoption("--metrics-file", action="store",
+                     default=os.path.join("results", "stream_metrics.jsonl"),
+                     help="JSONL file for per-prompt stream timings (category summary goes next to it)")
+    parser.addoption("--judge-rpm", action="store", type=int, default=None,
+                     help="Override the judge model's requests-per-minute budget (split across xdist workers)")
+    parser.addoption("--judge-tpm", action="store", type=int, default=None,
+                     help="Override the judge model's tokens-per-minute budget (split across xdist workers)")
+    parser.addoption("--judge-backend", action="store", default="groq", choices=["groq", "ollama"],
+                     help="Primary judge backend")
+    parser.addoption("--judge-fallback", action="store", default="none", choices=["none", "groq", "ollama"],
+                     help="Second judge backend for hedged requests and failover")
+    parser.addoption("--judge-hedge-percentile", action="store", type=float, default=95,
+                     help="Hedge to the fallback once a call runs past this percentile of the primary's latency")
+    parser.addoption("--ollama-url", action="store", default="http://localhost:11434",
+                     help="Base URL of the local Ollama server (a .../api/chat URL also works)")
+    parser.addoption("--ollama-model", action="store", default="mistral",
+                     help="Ollama model used as a judge")
+    parser.addoption("--ollama-keep-alive", action="store", default="30m",
+                     help="How long Ollama keeps the judge model loaded between calls")
+    parser.addoption("--judge-mode", action="store", default="verbose", choices=["verbose", "fast"],
+                     help="verbose: full written review; fast: compact JSON scores, explained only when failing or borderline")
+    parser.addoption("--judge-explain-margin", action="store", type=int, default=1,
+                     help="In fast mode, explain scores below the threshold plus this margin")
+    parser.addoption("--sequential-max-samples", action="store", type=int, default=1,
+                     help="Repeat each prompt up to this many times, stopping once its score's interval clears the threshold")
+    parser.addoption("--sequential-min-samples", action="store", type=int, default=2,
+                     help="Samples before the interval is first checked")
+    parser.addoption("--sequential-confidence", action="store", type=float, default=0.95,
+                     help="Two-sided confidence of the score interval")
+    parser.addoption("--sequential-min-spread", action="store", type=float, default=0.5,
+                     help="Lower bound on the score standard deviation used for the interval")
+    parser.addoption("--no-judge-cache", action="store_true", default=False,
+                     help="Always call the judge instead of reusing cached verdicts")
+    parser.addoption("--judge-cache-path", action="store",
+                     default=os.path.join(".stocksense_cache", "judge_verdicts.sqlite3"),
+                     help="SQLite file holding cached judge verdicts")
+    parser.addoption("--judge-cache-max-entries", action="store", type=int, default=20000,
+                     help="Keep at most this many cached verdicts (least recently used go first)")
+    parser.addoption("--judge-cache-max-age-days", action="store", type=float, default=30,
+                     help="Drop cached verdicts older than this many days")
+    parser.addoption("--baseline", action="store_true", default=False,
+                     help="Compare prompt latency and scores with a rolling baseline of earlier runs and record this run")
+    parser.addoption("--baseline-path", action="store",
+                     default=os.path.join(".stocksense_cache", "prompt_history.sqlite3"),
+                     help="SQLite file holding per-prompt history")
+    parser.addoption("--baseline-runs", action="store", type=int, default=10,
+                     help="Number of previous runs in the rolling baseline")
+    parser.addoption("--baseline-latency-limit", action="store", type=float, default=0.4,
+                     help="Flag p95 TTFT or total time more than this fraction above the baseline")
+    parser.addoption("--baseline-score-limit", action="store", type=float, default=1.0,
+                     help="Flag a category whose mean score drops more than this many points")
+    parser.addoption("--baseline-prompt-score-limit", action="store", type=float, default=1.5,
+                     help="Flag a prompt scoring more than this many points below its baseline mean")
+    parser.addoption("--baseline-alpha", action="store", type=float, default=0.05,
+                     help="Significance level of the Mann-Whitney U test for category regressions")
+    parser.addoption("--baseline-action", action="store", default="mark", choices=["mark", "fail"],
+                     help="mark: tag and report regressions; fail: also fail the affected tests and the run")
+    parser.addoption("--prompt-sample", action="store", type=int, default=0,
+                     help="Run a stratified random sample of this many prompts instead of the whole corpus")
+    parser.addoption("--prompt-sample-mode", action="store", default="balanced", choices=("balanced", "proportional"),
+                     help="Split --prompt-sample evenly across categories or in proportion to their size")
+    parser.addoption("--prompt-sample-seed", action="store", type=int, default=0,
+                     help="Seed for --prompt-sample (keep it fixed across xdist workers)")
+    parser.addoption("--shard-count", action="store", type=int, default=1,
+                     help="Split the suite over this many nodes by a stable hash of each prompt/test")
+    parser.addoption("--shard-index", action="store", type=int, default=0,
+                     help="Which shard (0-based) this node runs with --shard-count")
+    parser.addoption("--test-order", action="store", default="file", choices=("file", "longest-first", "flaky-first"),
+                     help="longest-first: slowest tests start first; flaky-first: recently failing or flaky tests "
+                          "first (pair with -x), the rest longest-first")
+    parser.addoption("--test-history-path", action="store",
+                     default=os.path.join(".stocksense_cache", "test_history.sqlite3"),
+                     help="SQLite file of per-test durations and outcomes")
+    parser.addoption("--test-history-runs", action="store", type=int, default=10,
+                     help="Number of recent runs --test-order draws on")
+    parser.addoption("--test-history", action="store_true", default=False,
+                     help="Record this run's test durations and outcomes (always on with --test-order)")
+    parser.addoption("--results-file", action="store",
+                     default=os.path.join("results", "prompt_results.jsonl"),
+                     help="Append-only JSONL of per-prompt results (prompt, response, score, latencies)")
+    parser.addoption("--results-batch-size", action="store", type=int, default=50,
+                     help="Buffer this many prompt results before writing them out")
+    parser.addoption("--allure-attachments", action="store", default="always",
+                     choices=("always", "failure", "sample", "never"),
+                     help="Which prompt tests keep their Allure text attachments")
+    parser.addoption("--allure-attachment-sample-rate", action="store", type=float, default=0.1,
+                     help="Share of passing prompt tests keeping attachments with --allure-attachments sample")
+    parser.addoption("--headless", action="store_true", default=False,
+                     help="Run Chrome headless (pair with -n N to spread the login suite over N browsers)")
+    parser.addoption("--screenshots", action="store", default="failure", choices=("failure", "sample", "always", "never"),
+                     help="When to attach a screenshot and DOM snapshot of browser tests")
+    parser.addoption("--screenshot-sample-rate", action="store", type=float, default=0.1,
+                     help="Share of passing browser tests captured with --screenshots sample")
+
 # Setup allure environment info
 @pytest.hookimpl(tryfirst=True)
 def pytest_configure(config):
     """Configure test environment"""
+    from dotenv import load_dotenv
+
+    # Load .env once for every test module, before any of them is imported
+    load_dotenv(".env")
+    config.addinivalue_line("markers", "prompt_category(name): parametrize 'prompt' with a test_prompts/ category")
+    config.addinivalue_line("markers", "bot: tests that call the StockSense bot")
+    config.addinivalue_line("markers", "mock_bot(**settings): MockBotConfig settings for the mock_bot_server fixture")
+
+    # Point the bot suite at a local mock server (one per xdist worker) instead of Render
+    if config.getoption("--mock-bot") is not None:
+        from utils.mock_bot_server import MockBotServer, make_token, parse_profile
+
+        mock_config = parse_profile(config.getoption("--mock-bot"))
+        server = MockBotServer(mock_config).start()
+        config.add_cleanup(server.stop)
+        os.environ["BOT_URL"] = server.url
+        os.environ["JWT_TOKEN"] = make_token(mock_config.secret or "mock-secret")
+        add_summary_section(config, "Mock bot", server)
+
+    # xdist workers share the controller's allure-results
+    if hasattr(config, "workerinput"):
+        return
+
+    from utils.results_sink import new_run_id
+
+    config.stash[run_id_key] = new_run_id()
+
+    if config.getoption("--baseline"):
+        from utils.regression_baseline import BaselinePlugin, HistoryStore
+
+        baseline = BaselinePlugin(
+            HistoryStore(config.getoption("--baseline-path")),
+            config.getoption("--results-file"),
+            config.stash[run_id_key],
+            runs=config.getoption("--baseline-runs"),
+            latency_limit=config.getoption("--baseline-latency-limit"),
+            score_limit=config.getoption("--baseline-score-limit"),
+            alpha=config.getoption("--baseline-alpha"),
+            action=config.getoption("--baseline-action")
+        )
+        config.pluginmanager.register(baseline, "stocksense_baseline")
+        add_summary_section(config, "Baseline regressions", baseline)
+
+    # Under xdist the stream metrics come from the workers' files, merged at session end
+    if config.getoption("dist", "no") != "no":
+        from utils.stream_metrics import MetricsRecorder
+
+        # Drop files left behind by an interrupted run
+        MetricsRecorder.collect_workers(config.getoption("--metrics-file"))
+        config.stash[merged_metrics_key] = MetricsRecorder()
+        add_summary_section(config, "Stream latency by category (cold starts excluded)",
+                            config.stash[merged_metrics_key])
+
+    # Per-test durations and outcomes for --test-order
+    recording = config.getoption("--test-history") or config.getoption("--test-order") != "file"
+    if recording and not config.getoption("collectonly"):
+        from utils.test_ordering import OrderingPlugin, RunHistory
+
+        ordering = OrderingPlugin(RunHistory(config.getoption("--test-history-path")), config.stash[run_id_key],
+                                  order=config.getoption("--test-order"))
+        config.pluginmanager.register(ordering, "stocksense_test_history")
+        add_summary_section(config, "Test history", ordering)
+
     # Create results directory if it doesn't exist
-    if not os.path.exists("allure-results"):
-        os.makedirs("allure-results")
+    results_dir = config.getoption("allure_report_dir", None) or "allure-results"
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
     
-    # Write environment info for Allure report
+    # Write environment info for Allure report (gathered in-process, no subprocess)
     env_data = {
         "Environment": os.environ.get("TEST_ENV", "dev"),
-        "Python Version": os.popen("python --version").read().strip(),
+        "Python Version": f"Python {platform.python_version()}",
+        "Platform": f"{platform.system()} {platform.machine()}",
         "Test Run Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "Bot API URL": "https://stocksense-backend.onrender.com/api",
         "Tester": "vyom"
     }
+    if config.getoption("--shard-count") > 1:
+        env_data["Shard"] = f"{config.getoption('--shard-index')}/{config.getoption('--shard-count')}"
     
-    with open(os.path.join("allure-results", "environment.properties"), 'w') as f:
+    with open(os.path.join(results_dir, "environment.properties"), 'w') as f:
         for key, value in env_data.items():
             f.write(f"{key}={value}\n")
 
+def pytest_collection_modifyitems(config, items):
+    # Keep only this node's share of the suite when sharding
+    count = config.getoption("--shard-count")
+    if count > 1:
+        from utils.sharding import split_items
+
+        try:
+            selected, deselected = split_items(items, config.getoption("--shard-index"), count)
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+
+    # Reorder from past durations and outcomes; every xdist worker reads the same history, so collections match
+    order = config.getoption("--test-order")
+    if order != "file":
+        from utils.test_ordering import RunHistory, order_items
+
+        store = RunHistory(config.getoption("--test-history-path"))
+        items[:] = order_items(items, store.recent(config.getoption("--test-history-runs")), order)
+        store.close()
+
+def pytest_sessionfinish(session):
+    merged = session.config.stash.get(merged_metrics_key, None)
+    if merged is None:
+        return
+    from utils.stream_metrics import MetricsRecorder
+
+    path = session.config.getoption("--metrics-file")
+    merged.records.extend(MetricsRecorder.collect_workers(path).records)
+    if merged.records:
+        merged.write(path)
+
+def pytest_terminal_summary(terminalreporter, config):
+    write_summary_sections(terminalreporter, config)
+
 # Custom logging for testimport pytest
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
+    from utils.browser_pool import capture_page
+    from utils.results_sink import should_capture
+
     outcome = yield
     result = outcome.get_result()
 
-    # Only run this on the 'call' phase of the test (not setup/teardown)
-    if result.when == "call":
+    # Only run this on the 'call' phase of the test (not setup/teardown); prompt tests follow --allure-attachments
+    keep_metadata = item.get_closest_marker("prompt_category") is None or should_capture(
+        item.config.getoption("--allure-attachments"), result.failed, item.nodeid,
+        item.config.getoption("--allure-attachment-sample-rate"))
+    if result.when == "call" and keep_metadata:
         test_path = item.nodeid
         metadata = f"Test: {test_path}\nExecution time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         
@@ -59,3 +620,14 @@ def pytest_runtest_makereport(item, call):
             name="Test Metadata",
             attachment_type=allure.attachment_type.TEXT
         )
+
+    # Screenshot and DOM snapshot of browser tests, by the --screenshots policy
+    driver = item.funcargs.get("driver") if hasattr(item, "funcargs") else None
+    if driver is not None and (result.when == "call" or result.failed):
+        policy = item.config.getoption("--screenshots")
+        if should_capture(policy, result.failed, item.nodeid, item.config.getoption("--screenshot-sample-rate")):
+            png, html = capture_page(driver)
+            if png is not None:
+                allure.attach(png, name="Screenshot", attachment_type=allure.attachment_type.PNG)
+            if html is not None:
+                allure.attach(html, name="DOM Snapshot", attachment_type=allure.attachment_type.HTML)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from utils.async_client import AsyncBotClient
+
+
+def make_stream(*chunks):
+    lines = [json.dumps({"event": "chat_streaming", "data": {"chunk": c}}) for c in chunks]
+    lines.append(json.dumps({"event": "chat_end", "data": {}}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def test_stream_many_runs_prompts_concurrently_and_keeps_order():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.2)
+        in_flight -= 1
+        prompt = json.loads(request.content)["prompt"]
+        return httpx.Response(200, content=make_stream("echo: ", prompt))
+
+    client = AsyncBotClient("http://bot.local/api/prompt/", "token", concurrency=3,
+                            transport=httpx.MockTransport(handler))
+    prompts = [f"p{i}" for i in range(6)]
+
+    start = time.perf_counter()
+    results = client.run(prompts)
+    elapsed = time.perf_counter() - start
+
+    assert list(results) == prompts
+    assert results["p4"] == "echo: p4"
+    assert peak == 3
+    assert elapsed < 1.0
+
+
+def test_per_host_limit_caps_in_flight_streams():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(200, content=make_stream("ok"))
+
+    client = AsyncBotClient("http://bot.local/api/prompt/", "token", concurrency=10,
+                            max_connections_per_host=2, transport=httpx.MockTransport(handler))
+    client.run([f"p{i}" for i in range(8)])
+
+    assert peak == 2
+
+
+def test_failed_prompt_is_returned_as_exception():
+    def handler(request):
+        if json.loads(request.content)["prompt"] == "boom":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, content=make_stream("fine"))
+
+    client = AsyncBotClient("http://bot.local/api/prompt/", "token",
+                            transport=httpx.MockTransport(handler))
+    results = client.run(["ok", "boom"])
+
+    assert results["ok"] == "fine"
+    assert isinstance(results["boom"], httpx.ConnectError)
+
+
+def test_recorded_stream_is_saved_once_the_terminal_event_arrives(tmp_path):
+    from utils.cassettes import CassetteStore
+
+    def handler(request):
+        # Anything after chat_end is never read, but the cassette is still written
+        return httpx.Response(200, content=make_stream("rec", "orded") + b"trailing")
+
+    cassettes = CassetteStore(str(tmp_path), mode="record")
+    client = AsyncBotClient("http://bot.local/api/prompt/", "token",
+                            transport=httpx.MockTransport(handler), cassettes=cassettes)
+    results = client.run(["p"])
+
+    assert results["p"] == "recorded"
+    assert "p" in cassettes
+    assert client.metrics["p"].chunk_count == 2
@@ -0,0 +1,135 @@
+import utils.browser_pool as browser_pool
+from utils.browser_pool import BrowserPool, BrowserUsageReport, cached_driver_path, inject_auth, parse_storage_keys
+
+
+class FakeDriver:
+    def __init__(self):
+        self.resets = 0
+        self.dead = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.dead:
+            raise RuntimeError("session gone")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def reset(driver):
+    driver.resets += 1
+
+
+def test_pool_reuses_browsers_and_resets_them():
+    started = []
+    pool = BrowserPool(size=1, factory=lambda: started.append(FakeDriver()) or started[-1], reset=reset)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    assert first.resets == 1
+    assert len(started) == 1
+
+
+def test_dead_browser_is_replaced_on_release():
+    pool = BrowserPool(size=1, factory=FakeDriver, reset=reset)
+    driver = pool.acquire()
+    driver.dead = True
+
+    pool.release(driver)
+    replacement = pool.acquire()
+
+    assert replacement is not driver
+    assert driver.quit_called
+    pool.close()
+    assert replacement.quit_called
+
+
+def test_driver_path_is_read_from_cache(tmp_path, monkeypatch):
+    binary = tmp_path / "chromedriver"
+    binary.write_text("")
+    cache = tmp_path / "chromedriver_path"
+    cache.write_text(str(binary))
+    monkeypatch.delenv("CHROMEDRIVER", raising=False)
+    monkeypatch.setattr(browser_pool, "_driver_path", None)
+
+    assert cached_driver_path(str(cache)) == str(binary)
+    browser_pool.forget_driver_path(str(cache))
+    assert not cache.exists() and browser_pool._driver_path is None
+
+
+def test_stale_driver_is_forgotten_when_chrome_rejects_it(tmp_path, monkeypatch):
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+
+    resolved = iter([str(tmp_path / "old"), str(tmp_path / "new")])
+    forgotten = []
+    started = []
+
+    def chrome(service, options):
+        started.append(service.path)
+        if service.path.endswith("old"):
+            raise SessionNotCreatedException("This version of ChromeDriver only supports Chrome version 120")
+        return "browser"
+
+    monkeypatch.delenv("CHROMEDRIVER", raising=False)
+    monkeypatch.setattr(browser_pool, "cached_driver_path", lambda: next(resolved))
+    monkeypatch.setattr(browser_pool, "forget_driver_path", lambda: forgotten.append(True))
+    monkeypatch.setattr(webdriver, "Chrome", chrome)
+
+    assert browser_pool.start_chrome(headless=True) == "browser"
+    assert forgotten == [True]
+    assert [path[-3:] for path in started] == ["old", "new"]
+
+
+def test_pool_reports_per_browser_utilisation():
+    now = [0.0]
+    pool = BrowserPool(size=1, factory=FakeDriver, reset=reset, name="gw0", clock=lambda: now[0])
+    for _ in range(3):
+        driver = pool.acquire()
+        now[0] += 2.0
+        pool.release(driver)
+        now[0] += 1.0
+    pool.close()
+
+    [row] = pool.usage_rows()
+    assert row["browser"] == "gw0/0"
+    assert row["tests"] == 3
+    assert row["busy"] == 6.0
+    assert row["utilisation"] == 6.0 / 9.0
+
+
+def test_usage_report_combines_workers():
+    report = BrowserUsageReport()
+    report.add([{"browser": "gw0/0", "tests": 4, "busy": 8.0, "lifetime": 10.0, "utilisation": 0.8}])
+    report.add([{"browser": "gw1/0", "tests": 2, "busy": 2.0, "lifetime": 10.0, "utilisation": 0.2}])
+
+    lines = report.summary_lines()
+    assert lines[0].startswith("gw0/0: 4 tests")
+    assert lines[-1] == "overall: 2 browsers, 50% utilised"
+
+
+def test_auth_storage_keys_are_configurable_and_injected():
+    keys = parse_storage_keys(" token=access, refresh=refresh ,")
+    assert keys == {"token": "access", "refresh": "refresh"}
+
+    class StorageDriver:
+        def __init__(self):
+            self.visited = []
+            self.storage = {}
+
+        def get(self, url):
+            self.visited.append(url)
+
+        def execute_script(self, script, key, value):
+            self.storage[key] = value
+
+    driver = StorageDriver()
+    inject_auth(driver, {"access": "a1", "refresh": "r1", "user": "vyom"}, app_url="http://app/", storage_keys=keys)
+
+    assert driver.visited == ["http://app/"]
+    assert driver.storage == {"token": "a1", "refresh": "r1"}
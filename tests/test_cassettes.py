@@ -0,0 +1,90 @@
+import gzip
+import json
+import time
+
+import pytest
+
+from utils.cassettes import CassetteNotFound, CassetteStore
+
+BLOCKS = [
+    b'{"event": "chat_streaming", "data": {"chunk": "Hel',
+    b'lo"}}\n\n{"event": "chat_streaming", "data": {"chunk": " \xe2\x82',
+    b'\xac world"}}\n',
+    b'not json \xff\n',
+]
+
+
+def slow_blocks():
+    for block in BLOCKS:
+        time.sleep(0.02)
+        yield block
+
+
+def test_record_passes_lines_through_and_saves_them(tmp_path):
+    store = CassetteStore(str(tmp_path), mode="record")
+
+    seen = list(store.stream_for("What is an ETF?", slow_blocks))
+
+    assert seen == BLOCKS
+    assert "What is an ETF?" in store
+    with gzip.open(store.path_for("What is an ETF?"), "rt") as f:
+        assert len(f.readlines()) == len(BLOCKS) + 1
+
+
+def test_replay_returns_the_recorded_bytes_and_timings(tmp_path):
+    CassetteStore(str(tmp_path), mode="record").save("p", [(0.5, BLOCKS[0]), (0.25, BLOCKS[3])])
+    slept = []
+    store = CassetteStore(str(tmp_path), mode="replay", pace="recorded", sleep=slept.append)
+
+    lines = list(store.stream_for("p", fetch_live=lambda: pytest.fail("replay went live")))
+
+    assert lines == [BLOCKS[0], BLOCKS[3]]
+    assert slept == [0.5, 0.25]
+
+
+def test_fast_replay_does_not_sleep(tmp_path):
+    CassetteStore(str(tmp_path)).save("p", [(3.0, BLOCKS[0])])
+    store = CassetteStore(str(tmp_path), mode="replay", sleep=lambda s: pytest.fail("slept"))
+
+    assert list(store.replay("p")) == [BLOCKS[0]]
+
+
+def test_line_format_cassettes_replay_with_newlines(tmp_path):
+    store = CassetteStore(str(tmp_path), mode="replay")
+    with gzip.open(store.path_for("p"), "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"prompt": "p", "recorded_at": 0, "lines": 2}) + "\n")
+        f.write(json.dumps([0.1, '{"event": "chat_streaming", "data": {"chunk": "a"}}']) + "\n")
+        f.write(json.dumps([0.1, ""]) + "\n")
+
+    assert list(store.replay("p")) == [b'{"event": "chat_streaming", "data": {"chunk": "a"}}\n', b"\n"]
+
+
+def test_replay_of_unrecorded_prompt_fails_up_front(tmp_path):
+    store = CassetteStore(str(tmp_path), mode="replay")
+
+    with pytest.raises(CassetteNotFound):
+        store.replay("never recorded")
+
+
+def test_stream_that_ends_with_chat_end_is_recorded(tmp_path):
+    from utils.stream_decoder import read_reply
+
+    store = CassetteStore(str(tmp_path), mode="record")
+    blocks = [BLOCKS[0], BLOCKS[1] + BLOCKS[2], b'{"event": "chat_end", "data": {}}\n', b'trailing\n']
+
+    reply = read_reply(store.stream_for("p", lambda: iter(blocks)))
+
+    assert reply == "Hello € world"
+    assert "p" in store
+    # Recorded up to the terminal event; the reader never asked for the rest
+    assert list(CassetteStore(str(tmp_path), mode="replay").replay("p")) == blocks[:3]
+
+
+def test_stream_abandoned_before_its_terminal_event_is_not_recorded(tmp_path):
+    store = CassetteStore(str(tmp_path), mode="record")
+    stream = store.stream_for("p", lambda: iter(BLOCKS))
+
+    assert next(stream) == BLOCKS[0]
+    stream.close()
+
+    assert "p" not in store
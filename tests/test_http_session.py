@@ -0,0 +1,84 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.http_session import BotSession, Timeouts, TotalTimeout
+
+
+class SlowStartHandler(BaseHTTPRequestHandler):
+    """Answers slowly for the first few requests, like a waking Render instance"""
+    slow_requests = 2
+    seen = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).seen += 1
+        if type(self).seen <= self.slow_requests:
+            time.sleep(0.3)
+        self.send_response(405)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for i in range(5):
+            self.wfile.write(b'{"event": "chat_streaming", "data": {"chunk": "x"}}\n')
+            self.wfile.flush()
+            time.sleep(0.1)
+
+
+@pytest.fixture
+def server():
+    SlowStartHandler.seen = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SlowStartHandler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/api/prompt/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_warm_up_pings_until_backend_is_hot(server):
+    session = BotSession()
+    result = session.warm_up(server, max_wait=5, interval=0.01, hot_threshold=0.2)
+
+    assert result.warm
+    assert result.was_cold
+    assert result.attempts == 3
+    assert session.is_warm(server)
+
+
+def test_fast_requests_are_warm_without_a_warm_up(server):
+    session = BotSession(cold_start_threshold=0.2)
+    responses = [session.post(server, json={"prompt": "hi"}, stream=True) for _ in range(3)]
+    for response in responses:
+        response.close()
+
+    assert not any(response.cold_start for response in responses)
+    assert session.cold_start_count == 0
+    assert session.is_warm(server)
+
+
+def test_slow_headers_are_tagged_cold(server):
+    session = BotSession(cold_start_threshold=0.0)
+    cold = session.post(server, json={"prompt": "hi"}, stream=True)
+    cold.close()
+
+    assert cold.cold_start
+    assert session.cold_start_count == 1
+    assert not session.is_warm(server)
+
+
+def test_stream_past_total_timeout_is_aborted(server):
+    session = BotSession(Timeouts(connect=1, read=1, total=0.15))
+    response = session.post(server, json={"prompt": "hi"}, stream=True)
+
+    with pytest.raises(TotalTimeout):
+        list(session.iter_bytes(response))
@@ -0,0 +1,265 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from utils.judge_backends import HedgedJudge, JudgeBackend, JudgeResponse, OllamaBackend
+from utils.judge_scheduler import JudgeScheduler
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.response = httpx.Response(429, headers={"retry-after": str(retry_after)})
+
+
+class FakeBackend(JudgeBackend):
+    def __init__(self, name, latency=0.0, fail=False, rate_limits=(600, 100000), rate_limited=0, retry_after=20):
+        self.name = name
+        self.model_name = f"{name}-model"
+        self.latency = latency
+        self.fail = fail
+        self.rate_limits = rate_limits
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.calls = 0
+        self.released = threading.Event()
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise RateLimited(self.retry_after)
+        # Slow backends can be released early so tests don't wait for them
+        self.released.wait(self.latency)
+        return JudgeResponse(f"{self.name} verdict", {"token_usage": {"total_tokens": 10}})
+
+
+@pytest.fixture
+def make_judge():
+    made = []
+
+    def make(*backends, **kwargs):
+        kwargs.setdefault("initial_hedge_delay", 0.05)
+        judge = HedgedJudge(backends, **kwargs)
+        made.append(judge)
+        return judge
+
+    yield make
+    for judge in made:
+        for backend in judge.backends:
+            backend.released.set()
+        judge.close()
+
+
+def test_fast_primary_is_not_hedged(make_judge):
+    primary, fallback = FakeBackend("groq"), FakeBackend("ollama")
+    judge = make_judge(primary, fallback)
+
+    response = judge.invoke([])
+
+    assert response.content == "groq verdict"
+    assert response.response_metadata["judge_backend"] == "groq"
+    assert (fallback.calls, judge.hedges) == (0, 0)
+
+
+def test_slow_primary_is_hedged_and_first_answer_wins(make_judge):
+    primary, fallback = FakeBackend("groq", latency=5.0), FakeBackend("ollama")
+    judge = make_judge(primary, fallback)
+
+    started = time.monotonic()
+    response = judge.invoke([])
+
+    assert response.content == "ollama verdict"
+    assert time.monotonic() - started < 1.0
+    assert (judge.hedges, judge.hedge_wins) == (1, 1)
+
+
+def test_hedge_delay_follows_the_primarys_latency_percentile(make_judge):
+    judge = make_judge(FakeBackend("groq"), FakeBackend("ollama"), min_samples=3, initial_hedge_delay=9.0)
+    primary = judge.backends[0]
+
+    assert judge.hedge_delay(primary) == 9.0
+    judge.health["groq"].latencies.extend([0.4, 0.5, 0.6, 2.0])
+    assert judge.hedge_delay(primary) == pytest.approx(1.79)
+
+
+def test_failing_backend_fails_over_and_is_skipped_after_repeated_failures(make_judge):
+    now = [0.0]
+    primary, fallback = FakeBackend("groq", fail=True), FakeBackend("ollama")
+    judge = make_judge(primary, fallback, failure_threshold=2, cooldown=30.0, clock=lambda: now[0])
+
+    for _ in range(3):
+        assert judge.invoke([]).content == "ollama verdict"
+
+    # Two failures in a row take the primary out until the cooldown ends
+    assert primary.calls == 2
+    assert judge.failovers == 2
+    now[0] = 31.0
+    primary.fail = False
+    assert judge.invoke([]).content == "groq verdict"
+
+
+def test_all_backends_failing_raises_the_first_error(make_judge):
+    judge = make_judge(FakeBackend("groq", fail=True), FakeBackend("ollama", fail=True))
+
+    with pytest.raises(ConnectionError, match="groq is down"):
+        judge.invoke([])
+
+
+def test_unreachable_backend_is_skipped_after_warm_up(make_judge):
+    class Unreachable(FakeBackend):
+        def warm_up(self):
+            raise ConnectionError("refused")
+
+    primary, fallback = Unreachable("ollama"), FakeBackend("groq")
+    judge = make_judge(primary, fallback)
+
+    judge.warm_up()
+
+    assert judge.invoke([]).content == "groq verdict"
+    assert primary.calls == 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_each_backend_is_paced_to_its_own_rate_limits(make_judge):
+    clock = FakeClock()
+    primary = FakeBackend("groq", rate_limits=(2, 100000))
+    judge = make_judge(primary, FakeBackend("ollama"), clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        assert judge.invoke([]).content == "groq verdict"
+
+    # Two requests fill the primary's bucket; the third waits for its own refill, not the total's
+    assert clock.slept == [pytest.approx(30.0)]
+    assert judge.rate_limits == (600, 100000)
+
+
+def test_backend_buckets_hold_one_workers_share(make_judge):
+    judge = make_judge(FakeBackend("groq", rate_limits=(30, 30000)), FakeBackend("ollama"), workers=3)
+
+    assert (judge.health["groq"].requests.capacity, judge.health["groq"].tokens.capacity) == (10, 10000)
+    assert judge.health["ollama"].requests.capacity == 200
+    # The largest quota as a whole; the scheduler in front splits it the same way
+    assert judge.rate_limits == (600, 100000)
+
+
+def test_rate_limited_backend_is_paused_for_retry_after_not_failed(make_judge):
+    clock = FakeClock()
+    primary, fallback = FakeBackend("groq", rate_limited=1, retry_after=20), FakeBackend("ollama")
+    judge = make_judge(primary, fallback, failure_threshold=1, clock=clock, sleep=clock.sleep)
+
+    assert judge.invoke([]).content == "ollama verdict"
+    assert judge.invoke([]).content == "ollama verdict"
+
+    health = judge.health["groq"]
+    assert (primary.calls, health.failures, health.rate_limited) == (1, 0, 1)
+    assert health.unhealthy_until == 0.0
+    clock.now = 21.0
+    assert judge.invoke([]).content == "groq verdict"
+
+
+def test_every_backend_rate_limited_waits_out_the_shortest_retry_after(make_judge):
+    clock = FakeClock()
+    primary = FakeBackend("groq", rate_limited=1, retry_after=20)
+    fallback = FakeBackend("ollama", rate_limited=1, retry_after=5)
+    judge = make_judge(primary, fallback, clock=clock, sleep=clock.sleep)
+
+    assert judge.invoke([]).content == "ollama verdict"
+    assert clock.slept == [5.0]
+
+
+def test_pacing_wait_is_queue_wait_and_does_not_trigger_a_hedge(make_judge):
+    clock = FakeClock()
+    primary, fallback = FakeBackend("groq", rate_limits=(1, 100000)), FakeBackend("ollama")
+    judge = make_judge(primary, fallback, clock=clock, sleep=clock.sleep)
+    scheduler = JudgeScheduler(judge, rpm=600, tpm=100000, clock=clock, sleep=clock.sleep)
+
+    scheduler.invoke([SimpleNamespace(content="x")])
+    call = scheduler.invoke([SimpleNamespace(content="x")])
+
+    # A minute's wait for the primary's slot, longer than the 0.05s hedge delay, goes to queue wait
+    assert call.queue_wait == pytest.approx(60.0)
+    assert call.model_latency == pytest.approx(0.0)
+    assert (call.backend, judge.hedges, fallback.calls) == ("groq", 0, 0)
+
+
+def test_scheduler_records_which_backend_answered(make_judge):
+    judge = make_judge(FakeBackend("groq", fail=True), FakeBackend("ollama"))
+    scheduler = JudgeScheduler(judge, rpm=60, tpm=100000)
+
+    call = scheduler.invoke([SimpleNamespace(content="x")])
+
+    assert call.backend == "ollama"
+    assert scheduler.model == "groq:groq-model|ollama:ollama-model"
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, timeouts=None, track_cold_start=True, json=None):
+        self.posts.append((url, json))
+        if url.endswith("/api/generate"):
+            return FakeResponse({"done": True})
+        return FakeResponse({"message": {"content": '{"total": 8}'}, "prompt_eval_count": 120,
+                             "eval_count": 9, "load_duration": 2_500_000_000})
+
+
+def test_ollama_backend_maps_requests_and_keeps_the_model_loaded():
+    session = FakeSession()
+    backend = OllamaBackend("mistral", "http://ollama:11434/", keep_alive="1h", session=session)
+
+    backend.warm_up()
+    response = backend.invoke([SimpleNamespace(type="system", content="judge"), ("human", "reply")],
+                              response_format={"type": "json_object"}, max_tokens=48)
+
+    assert session.posts[0] == ("http://ollama:11434/api/generate", {"model": "mistral", "keep_alive": "1h"})
+    url, payload = session.posts[1]
+    assert url == "http://ollama:11434/api/chat"
+    assert payload == {
+        "model": "mistral",
+        "messages": [{"role": "system", "content": "judge"}, {"role": "user", "content": "reply"}],
+        "stream": False,
+        "keep_alive": "1h",
+        "format": "json",
+        "options": {"num_predict": 48},
+    }
+    assert response.response_metadata["token_usage"] == {"prompt_tokens": 120, "completion_tokens": 9, "total_tokens": 129}
+    assert response.response_metadata["load_duration"] == 2.5
+
+
+def test_ollama_backend_accepts_the_chat_endpoint_as_its_url():
+    session = FakeSession()
+    backend = OllamaBackend("mistral", "http://localhost:11434/api/chat", session=session)
+
+    backend.invoke([("human", "reply")])
+
+    assert session.posts[0][0] == "http://localhost:11434/api/chat"
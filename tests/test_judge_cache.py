@@ -0,0 +1,67 @@
+import sqlite3
+import time
+
+from utils.judge_cache import CacheUsage, JudgeCache
+
+
+def test_verdicts_round_trip_and_count_hits(tmp_path):
+    cache = JudgeCache(str(tmp_path / "verdicts.sqlite3"))
+    key = cache.make_key("prompt", "reply", "llama3-8b-8192", "system")
+
+    assert cache.get(key) is None
+    cache.put(key, "**TOTAL SCORE: 8/10**", "llama3-8b-8192")
+    assert cache.get(key) == "**TOTAL SCORE: 8/10**"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_changes_with_every_input():
+    base = JudgeCache.make_key("p", "r", "m", "s")
+
+    assert base != JudgeCache.make_key("p2", "r", "m", "s")
+    assert base != JudgeCache.make_key("p", "r2", "m", "s")
+    assert base != JudgeCache.make_key("p", "r", "m2", "s")
+    assert base != JudgeCache.make_key("p", "r", "m", "s2")
+    assert JudgeCache.make_key("ab", "c", "m", "s") != JudgeCache.make_key("a", "bc", "m", "s")
+
+
+def test_verdicts_survive_reopening(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite3")
+    cache = JudgeCache(path)
+    cache.put("k", "verdict", "mistral")
+    cache.close()
+
+    assert JudgeCache(path).get("k") == "verdict"
+
+
+def test_eviction_drops_expired_then_least_recently_used(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite3")
+    cache = JudgeCache(path, max_entries=2, max_age_days=1)
+    for key in ("a", "b", "c", "old"):
+        cache.put(key, key, "mistral")
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE verdicts SET created = ? WHERE key = 'old'", (time.time() - 3 * 86400,))
+    conn.execute("UPDATE verdicts SET last_used = 0 WHERE key = 'a'")
+    conn.commit()
+    conn.close()
+
+    cache.evict()
+
+    assert cache.entries == 2
+    assert cache.get("old") is None
+    assert cache.get("a") is None
+    assert cache.get("b") == "b"
+
+
+def test_worker_usage_adds_up_on_the_controller(tmp_path):
+    path = str(tmp_path / "judge.sqlite3")
+    usage = CacheUsage()
+    for lookups in (["a", "b"], ["a", "c"]):
+        cache = JudgeCache(path)
+        for key in lookups:
+            if cache.get(key) is None:
+                cache.put(key, "verdict", "model")
+        cache.close()
+        usage.add(cache.usage())
+
+    assert (usage.hits, usage.misses, usage.entries) == (1, 3, 3)
+    assert usage.summary_lines() == [f"judge cache: 1 hits, 3 misses (25% hit rate), 3 entries in {path}"]
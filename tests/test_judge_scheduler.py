@@ -0,0 +1,136 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from utils.judge_scheduler import JudgeScheduler, TokenBucket, retry_after_seconds, worker_share
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.response = httpx.Response(429, headers={"retry-after": str(retry_after)})
+
+
+class FakeLLM:
+    def __init__(self, clock, latency=0.5, failures=0, retry_after=7):
+        self.clock = clock
+        self.latency = latency
+        self.failures = failures
+        self.retry_after = retry_after
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(self.clock())
+        if self.failures:
+            self.failures -= 1
+            raise RateLimited(self.retry_after)
+        self.clock.sleep(self.latency)
+        return SimpleNamespace(content="**TOTAL SCORE: 8/10**",
+                               response_metadata={"token_usage": {"total_tokens": 100}})
+
+
+def messages():
+    return [SimpleNamespace(content="x" * 400)]
+
+
+def test_token_bucket_reserves_and_reports_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(2, 1.0, clock)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_scheduler_paces_calls_to_rpm_and_splits_wait_from_latency():
+    clock = FakeClock()
+    llm = FakeLLM(clock)
+    judge = JudgeScheduler(llm, rpm=2, tpm=100000, clock=clock, sleep=clock.sleep)
+
+    calls = [judge.invoke(messages()) for _ in range(3)]
+
+    assert calls[0].queue_wait == 0
+    assert calls[2].queue_wait > 0
+    assert all(c.model_latency == pytest.approx(0.5) for c in calls)
+    # Third request had to wait for the per-minute budget to refill
+    assert llm.calls[2] >= 29.0
+    assert judge.stats.calls == 3
+
+
+def test_scheduler_honours_retry_after():
+    clock = FakeClock()
+    llm = FakeLLM(clock, failures=1, retry_after=7)
+    judge = JudgeScheduler(llm, rpm=60, tpm=100000, clock=clock, sleep=clock.sleep)
+
+    call = judge.invoke(messages())
+
+    assert call.retries == 1
+    assert llm.calls[1] - llm.calls[0] >= 7
+    assert call.content.startswith("**TOTAL SCORE")
+    assert judge.stats.rate_limited == 1
+
+
+def test_scheduler_gives_up_after_max_retries():
+    clock = FakeClock()
+    judge = JudgeScheduler(FakeLLM(clock, failures=5), rpm=60, tpm=100000,
+                           max_retries=2, clock=clock, sleep=clock.sleep)
+
+    with pytest.raises(RateLimited):
+        judge.invoke(messages())
+
+
+def test_worker_share_splits_the_quota_between_processes():
+    assert worker_share((30, 30000), 4) == (7, 7500)
+    assert worker_share((30, 30000)) == (30, 30000)
+    # More workers than requests per minute still leaves each one request
+    assert worker_share((2, 100), 8) == (1, 12)
+
+
+def test_retry_after_ignores_other_errors():
+    assert retry_after_seconds(ValueError("nope")) is None
+    assert retry_after_seconds(RateLimited(3)) == 3.0
+
+
+class ModeLLM:
+    def __init__(self, clock):
+        self.clock = clock
+        self.kwargs = []
+
+    def invoke(self, messages, **kwargs):
+        self.kwargs.append(kwargs)
+        fast = "response_format" in kwargs
+        self.clock.sleep(0.2 if fast else 1.5)
+        return SimpleNamespace(
+            content='{"accuracy": 3, "clarity": 2, "helpfulness": 3, "total": 8}' if fast else "**TOTAL SCORE: 8/10** ...",
+            response_metadata={"token_usage": {"total_tokens": 150, "completion_tokens": 20 if fast else 300}})
+
+
+def test_scheduler_tracks_output_tokens_and_latency_per_mode():
+    clock = FakeClock()
+    llm = ModeLLM(clock)
+    judge = JudgeScheduler(llm, rpm=600, tpm=100000, clock=clock, sleep=clock.sleep)
+
+    fast = judge.invoke(messages(), mode="fast", output_tokens=48, response_format={"type": "json_object"}, max_tokens=48)
+    judge.invoke(messages(), mode="fast", response_format={"type": "json_object"})
+    judge.invoke(messages())
+
+    assert llm.kwargs[0] == {"response_format": {"type": "json_object"}, "max_tokens": 48}
+    assert llm.kwargs[2] == {}
+    assert (fast.mode, fast.output_tokens) == ("fast", 20)
+    assert judge.stats.modes["fast"].calls == 2
+    assert judge.stats.modes["fast"].output_tokens == 40
+    assert judge.stats.modes["verbose"].model_latency == pytest.approx(1.5)
+    assert "fast: 2 calls, mean 20 output tokens, mean latency 0.20s" in judge.stats.summary_lines()
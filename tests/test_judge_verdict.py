@@ -0,0 +1,55 @@
+import pytest
+
+from utils.bot_helpers import BotTestHelper
+from utils.judge_verdict import VerdictError, extract_score, needs_explanation, parse_verdict, worth_caching
+
+
+def test_fast_verdict_is_parsed():
+    verdict = parse_verdict('```json\n{"accuracy": 3, "clarity": 2, "helpfulness": 3, "total": 8}\n```')
+
+    assert verdict.as_dict() == {"accuracy": 3, "clarity": 2, "helpfulness": 3, "total": 8}
+
+
+@pytest.mark.parametrize("text, message", [
+    ("Looks good, 8/10", "no JSON object"),
+    ('{"accuracy": 3, "clarity": 2, "helpfulness": 3, "total": 8', "no JSON object"),
+    ('{"accuracy": 3, "clarity": 2, "total": 5}', "helpfulness"),
+    ('{"accuracy": 4, "clarity": 2, "helpfulness": 3, "total": 9}', "accuracy"),
+    ('{"accuracy": 2.5, "clarity": 2, "helpfulness": 3, "total": 7}', "accuracy"),
+    ('{"accuracy": 3, "clarity": 2, "helpfulness": 3, "total": 9}', "not the sum"),
+    ('{"accuracy": 3, "clarity": true, "helpfulness": 3, "total": 7}', "clarity"),
+])
+def test_invalid_verdicts_are_rejected(text, message):
+    with pytest.raises(VerdictError, match=message):
+        parse_verdict(text)
+
+
+def test_only_failing_or_borderline_scores_need_explaining():
+    assert needs_explanation(5, min_score=6)
+    assert needs_explanation(6, min_score=6)
+    assert not needs_explanation(7, min_score=6)
+    assert not needs_explanation(6, min_score=6, margin=0)
+
+
+def test_scores_come_from_the_verdict_not_the_first_number():
+    review = "In 2 of 3 examples the bot was vague.\n**TOTAL SCORE: 7/10**"
+
+    assert extract_score(review) == 7
+    assert extract_score('{"accuracy": 1, "clarity": 1, "helpfulness": 0, "total": 2}') == 2
+    assert extract_score("no score here") is None
+    assert BotTestHelper.extract_score(review) == 7
+    assert BotTestHelper.extract_score("I'd give it 6 out of 10") == 6
+
+
+def test_helper_keeps_the_ollama_judge_name():
+    assert BotTestHelper.judge_response_with_ollama is BotTestHelper.judge_response
+
+
+def test_only_verdicts_that_parse_are_cached():
+    assert worth_caching('{"accuracy": 3, "clarity": 2, "helpfulness": 3, "total": 8}', "fast")
+    assert not worth_caching('{"accuracy": 3, "clarity": 2}', "fast")
+    assert not worth_caching("", "fast")
+    assert worth_caching("**TOTAL SCORE: 7/10**\nClear and correct.")
+    assert not worth_caching("Sorry, I can't review that.")
+    assert worth_caching("It lost a point on clarity.", "explain")
+    assert not worth_caching("  ", "explain")
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from utils.load_generator import (
+    LatencyHistogram, LoadGenerator, PromptMix, load_corpus, parse_mix, parse_stages, target_at,
+)
+
+
+def test_histogram_percentiles_are_within_one_percent():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+    assert histogram.percentile(100) == pytest.approx(1.0)
+    assert len(histogram.counts) < 1000
+
+
+def test_histogram_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.1)
+    b.record(2.0)
+    a.merge(b)
+
+    assert a.count == 2
+    assert a.max == 2.0
+
+
+def test_stages_ramp_linearly():
+    stages = parse_stages("10s:10,500ms:10,1m:0")
+
+    assert [s.duration for s in stages] == [10, 0.5, 60]
+    assert target_at(stages, 5) == pytest.approx(5)
+    assert target_at(stages, 10.2) == pytest.approx(10)
+    assert target_at(stages, 40.5) == pytest.approx(5)
+    assert target_at(stages, 71) is None
+
+
+def test_mix_rejects_unknown_category():
+    with pytest.raises(ValueError):
+        parse_mix("tutor=1,crypto=2")
+
+
+def test_mix_follows_weights():
+    corpus = load_corpus()
+    mix = PromptMix(corpus, parse_mix("tutor=1,live=0"), seed=1)
+
+    assert {mix.choose()[0] for _ in range(50)} == {"tutor"}
+
+
+def make_transport(fail_every=0):
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        if fail_every and calls % fail_every == 0:
+            return httpx.Response(503)
+        await asyncio.sleep(0.05)
+        body = json.dumps({"event": "chat_streaming", "data": {"chunk": "ok"}}) + "\n"
+        return httpx.Response(200, content=body.encode("utf-8"))
+
+    return httpx.MockTransport(handler)
+
+
+def test_open_loop_rate_run_reports_throughput_and_errors():
+    mix = PromptMix(load_corpus(), seed=3)
+    generator = LoadGenerator("http://bot.local/api/prompt/", "token", mix, parse_stages("1s:20"),
+                              arrivals="uniform", transport=make_transport(fail_every=4), seed=3)
+
+    report = asyncio.run(generator.run())
+    summary = report.summary()
+
+    # Ramp from 0 to 20 req/s over one second is about 10 arrivals
+    assert 7 <= summary["sent"] <= 12
+    assert summary["failed"] == summary["errors"]["HTTP 503"]
+    assert summary["completed"] + summary["failed"] == summary["sent"]
+    assert summary["ttft"]["all"]["count"] == summary["completed"]
+    assert summary["total"]["all"]["p50"] >= 0.05
+
+
+def test_concurrency_mode_caps_open_streams():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(200, content=b'{"event": "chat_streaming", "data": {"chunk": "ok"}}\n')
+
+    mix = PromptMix(load_corpus(), seed=3)
+    generator = LoadGenerator("http://bot.local/api/prompt/", "token", mix, parse_stages("100ms:3,500ms:3"),
+                              mode="concurrency", transport=httpx.MockTransport(handler))
+
+    report = asyncio.run(generator.run())
+
+    assert peak == 3
+    assert report.ok > 10
@@ -1,307 +1,214 @@
 import pytest
 import allure
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
+
+from utils.browser_pool import APP_URL
 
 
 @allure.title("Login Test - Valid Credentials")
 @allure.description("Checks login functionality with valid credentials.")
-def test_login_valid():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
+def test_login_valid(driver, waits):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
 
-        with allure.step("Enter valid username"):
-            username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
-            username_input.send_keys("vyom")
+    with allure.step("Enter valid username"):
+        username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
+        username_input.send_keys("vyom")
 
-        with allure.step("Enter valid password"):
-            password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
-            password_input.send_keys("1234")
+    with allure.step("Enter valid password"):
+        password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
+        password_input.send_keys("1234")
 
-        with allure.step("Click Sign In"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
-            sign_in_btn.click()
-            time.sleep(5)
+    with allure.step("Click Sign In"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
+        since = waits.page_time()
+        sign_in_btn.click()
+        waits.login_settled(since)
 
-        with allure.step("Check login success"):
-            if "chat" in driver.current_url:
-                allure.attach(driver.get_screenshot_as_png(), name="login_success", attachment_type=allure.attachment_type.PNG)
-                assert True
-            else:
-                allure.attach(driver.get_screenshot_as_png(), name="login_fail", attachment_type=allure.attachment_type.PNG)
-                assert False, "Login failed - Unexpected URL"
-
-    finally:
-        driver.quit()
+    with allure.step("Check login success"):
+        assert "chat" in driver.current_url, "Login failed - Unexpected URL"
 
 
 @allure.title("Login Test - Invalid Credentials")
 @allure.description("Checks login fails with wrong credentials.")
-def test_login_invalid():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
-
-        with allure.step("Enter invalid username"):
-            username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
-            username_input.send_keys("aryan")
-
-        with allure.step("Enter invalid password"):
-            password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
-            password_input.send_keys("aryan@1234")
-
-        with allure.step("Click Sign In"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
-            sign_in_btn.click()
-            time.sleep(5)
-
-        with allure.step("Check login failure"):
-            if "chat" not in driver.current_url:
-                allure.attach(driver.get_screenshot_as_png(), name="login_failure_expected", attachment_type=allure.attachment_type.PNG)
-                assert True
-            else:
-                allure.attach(driver.get_screenshot_as_png(), name="login_unexpected_success", attachment_type=allure.attachment_type.PNG)
-                assert False, "Login should have failed but succeeded"
-
-    finally:
-        driver.quit()
+def test_login_invalid(driver, waits):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+
+    with allure.step("Enter invalid username"):
+        username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
+        username_input.send_keys("aryan")
+
+    with allure.step("Enter invalid password"):
+        password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
+        password_input.send_keys("aryan@1234")
+
+    with allure.step("Click Sign In"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
+        since = waits.page_time()
+        sign_in_btn.click()
+        waits.login_settled(since)
+
+    with allure.step("Check login failure"):
+        assert "chat" not in driver.current_url, "Login should have failed but succeeded"
+
 
 @allure.title("Login Test - Empty Username")
 @allure.description("Checks validation when username field is empty.")
-def test_empty_username():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
-            
-        with allure.step("Fill password only"):
-            password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
-            password_input.send_keys("password123")
-            
-        with allure.step("Try to submit form"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
-            sign_in_btn.click()
-            time.sleep(1)
-            
-        with allure.step("Check username validation message"):
-            username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
-            validation_message = username_input.get_property("validationMessage")
-            allure.attach(driver.get_screenshot_as_png(), name="empty_username_validation", attachment_type=allure.attachment_type.PNG)
-            assert "fill out this field" in validation_message.lower(), f"Unexpected validation message: {validation_message}"
-    finally:
-        driver.quit()
+def test_empty_username(driver, waits):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+        
+    with allure.step("Fill password only"):
+        password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
+        password_input.send_keys("password123")
+        
+    with allure.step("Try to submit form"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
+        sign_in_btn.click()
+        
+    with allure.step("Check username validation message"):
+        username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
+        validation_message = waits.property_set(username_input, "validationMessage", timeout=2, raise_on_timeout=False) or ""
+        assert "fill out this field" in validation_message.lower(), f"Unexpected validation message: {validation_message}"
 
 @allure.title("Login Test - Empty Password")
 @allure.description("Checks validation when password field is empty.")
-def test_empty_password():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
-            
-        with allure.step("Fill username only"):
-            username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
-            username_input.send_keys("testuser")
-            
-        with allure.step("Try to submit form"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
-            sign_in_btn.click()
-            time.sleep(1)
-            
-        with allure.step("Check password validation message"):
-            password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
-            validation_message = password_input.get_property("validationMessage")
-            allure.attach(driver.get_screenshot_as_png(), name="empty_password_validation", attachment_type=allure.attachment_type.PNG)
-            assert "fill out this field" in validation_message.lower(), f"Unexpected validation message: {validation_message}"
-    finally:
-        driver.quit()
+def test_empty_password(driver, waits):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+        
+    with allure.step("Fill username only"):
+        username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
+        username_input.send_keys("testuser")
+        
+    with allure.step("Try to submit form"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
+        sign_in_btn.click()
+        
+    with allure.step("Check password validation message"):
+        password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
+        validation_message = waits.property_set(password_input, "validationMessage", timeout=2, raise_on_timeout=False) or ""
+        assert "fill out this field" in validation_message.lower(), f"Unexpected validation message: {validation_message}"
 
 @allure.title("Login Test - Both Fields Empty")
 @allure.description("Checks validation when both fields are empty.")
-def test_both_fields_empty():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
-            
-        with allure.step("Try to submit empty form"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
-            sign_in_btn.click()
-            time.sleep(1)
-            
-        with allure.step("Check validation message on first required field"):
-            # Browser will typically show validation on the first required field only
-            username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
-            validation_message = username_input.get_property("validationMessage")
-            allure.attach(driver.get_screenshot_as_png(), name="both_empty_validation", attachment_type=allure.attachment_type.PNG)
-            assert "fill out this field" in validation_message.lower(), f"Unexpected validation message: {validation_message}"
-    finally:
-        driver.quit()
+def test_both_fields_empty(driver, waits):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+        
+    with allure.step("Try to submit empty form"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
+        sign_in_btn.click()
+        
+    with allure.step("Check validation message on first required field"):
+        # Browser will typically show validation on the first required field only
+        username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
+        validation_message = waits.property_set(username_input, "validationMessage", timeout=2, raise_on_timeout=False) or ""
+        assert "fill out this field" in validation_message.lower(), f"Unexpected validation message: {validation_message}"
 
 @allure.title("Login Test - SQL Injection")
 @allure.description("Tests SQL injection protection in login form.")
-def test_login_sql_injection():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
-
-        with allure.step("Enter SQL injection in username"):
-            username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
-            username_input.send_keys("' OR '1'='1' -- ")
-
-        with allure.step("Enter SQL injection in password"):
-            password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
-            password_input.send_keys("' OR '1'='1' -- ")
-
-        with allure.step("Click Sign In"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
-            sign_in_btn.click()
-            time.sleep(5)
-
-        with allure.step("Check login failure"):
-            if "chat" not in driver.current_url:
-                allure.attach(driver.get_screenshot_as_png(), name="sql_injection_blocked", attachment_type=allure.attachment_type.PNG)
-                assert True
-            else:
-                allure.attach(driver.get_screenshot_as_png(), name="sql_injection_successful", attachment_type=allure.attachment_type.PNG)
-                assert False, "SQL Injection attempt succeeded - security risk detected"
-
-    finally:
-        driver.quit()
+def test_login_sql_injection(driver, waits):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+
+    with allure.step("Enter SQL injection in username"):
+        username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
+        username_input.send_keys("' OR '1'='1' -- ")
+
+    with allure.step("Enter SQL injection in password"):
+        password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
+        password_input.send_keys("' OR '1'='1' -- ")
+
+    with allure.step("Click Sign In"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
+        since = waits.page_time()
+        sign_in_btn.click()
+        waits.login_settled(since)
+
+    with allure.step("Check login failure"):
+        assert "chat" not in driver.current_url, "SQL Injection attempt succeeded - security risk detected"
+
 
 @allure.title("Login Test - Session Timeout")
 @allure.description("Tests if login session expires after a delay.")
-def test_login_delay():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
-
-    try:
-        with allure.step("Open login page"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            time.sleep(2)
-
-        with allure.step("Enter valid username"):
-            username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
-            username_input.send_keys("vyom")
-
-        with allure.step("Enter valid password"):
-            password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
-            password_input.send_keys("1234")
-            
-        with allure.step("Wait for potential session timeout"):
-            # Wait for 2 minutes - adjust based on expected session timeout
-            time.sleep(60)
-            
-        with allure.step("Click Sign In after delay"):
-            sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
-            sign_in_btn.click()
-            time.sleep(10)
-            
-        with allure.step("Check if login still works after delay"):
-            if "chat" in driver.current_url:
-                allure.attach(driver.get_screenshot_as_png(), name="login_after_delay_success", attachment_type=allure.attachment_type.PNG)
-                assert True
-            else:
-                allure.attach(driver.get_screenshot_as_png(), name="login_after_delay_fail", attachment_type=allure.attachment_type.PNG)
-                assert False, "Login failed after delay - session might have expired"
-
-    finally:
-        driver.quit()
+def test_login_delay(driver, waits, virtual_clock):
+    with allure.step("Open login page"):
+        driver.get(APP_URL)
+        waits.page_ready(By.XPATH, "//button[@type='submit']")
+
+    with allure.step("Enter valid username"):
+        username_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input")[0]
+        username_input.send_keys("vyom")
+
+    with allure.step("Enter valid password"):
+        password_input = driver.find_elements(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input")[0]
+        password_input.send_keys("1234")
+        
+    with allure.step("Wait for potential session timeout"):
+        # Move the page clock a minute ahead instead of idling for it
+        virtual_clock.advance(60)
+        
+    with allure.step("Click Sign In after delay"):
+        sign_in_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
+        since = waits.page_time()
+        sign_in_btn.click()
+        waits.login_settled(since)
+        
+    with allure.step("Check if login still works after delay"):
+        assert "chat" in driver.current_url, "Login failed after delay - session might have expired"
+
 
 @allure.title("Login Test - Form Reset")
 @allure.description("Verifies that user can logout and login form is reset.")
-def test_login_form_reset():
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.maximize_window()
+def test_login_form_reset(logged_in_driver, waits):
+    driver = logged_in_driver
+
+    # Start logged in with an API-issued token instead of typing credentials
+    with allure.step("Open app with a seeded login"):
+        driver.get(APP_URL)
+
+        # Wait for navigation to complete
+        waits.url_contains("chat")
     
-    try:
-        # Login first
-        with allure.step("Login with valid credentials"):
-            driver.get("https://stock-sense-infodesk.onrender.com/")
-            username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
-            password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
-            username_input.send_keys("vyom")
-            password_input.send_keys("1234")
-            sign_in_btn = driver.find_element(By.XPATH, "//button[text()='Sign in']")
-            sign_in_btn.click()
-            
-            # Wait for navigation to complete
-            WebDriverWait(driver, 10).until(
-                EC.url_contains("chat")
-            )
-        
-        # Logout process
-        with allure.step("Navigate back to login by logging out"):
-            # First click on the user profile
-            user_profile = driver.find_element(By.XPATH, "//div[@class='w-8 h-8 rounded-full bg-blue-500 flex items-center justify-center flex-shrink-0']")
-            driver.execute_script("arguments[0].scrollIntoView(true);", user_profile)
-            driver.execute_script("arguments[0].click();", user_profile)
-
-            time.sleep(2)
-            
-            # Wait for logout button to appear
-            logout_button = WebDriverWait(driver,2).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[.//span[text()='Logout']]"))
-            )
-            
-            # Click logout
-            driver.execute_script("arguments[0].click();", logout_button)
-
-            time.sleep(2)
-            
-            # Wait for redirect to login page
-            WebDriverWait(driver, 10).until(
-                EC.url_contains("login")
-            )
+    # Logout process
+    with allure.step("Navigate back to login by logging out"):
+        # First click on the user profile
+        user_profile = waits.element(By.XPATH, "//div[@class='w-8 h-8 rounded-full bg-blue-500 flex items-center justify-center flex-shrink-0']")
+        driver.execute_script("arguments[0].scrollIntoView(true);", user_profile)
+        driver.execute_script("arguments[0].click();", user_profile)
+
+        # Wait for logout button to appear
+        logout_button = waits.clickable(By.XPATH, "//button[.//span[text()='Logout']]", timeout=4)
         
-        # Verify form is reset
-        with allure.step("Verify login form is reset"):
-          username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
-          password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
+        # Click logout
+        driver.execute_script("arguments[0].click();", logout_button)
 
-           # Check that fields are empty
-          assert username_input.get_attribute("value") == "", "Username field is not empty after logout"
-          assert password_input.get_attribute("value") == "", "Password field is not empty after logout"
-
-    # Check the custom 'Remember me' checkbox (based on presence of checked class or SVG)
-          remember_me_div = driver.find_element(By.XPATH, "//label[contains(text(), 'Remember me')]/parent::div")
+        # Wait for redirect to login page
+        waits.url_contains("login")
+    
+    # Verify form is reset
+    with allure.step("Verify login form is reset"):
+        username_input = driver.find_element(By.CSS_SELECTOR, "input[type='text'][required]")
+        password_input = driver.find_element(By.CSS_SELECTOR, "input[type='password'][required]")
 
-          checkbox_inner = remember_me_div.find_element(By.XPATH, ".//div[contains(@class, 'h-5 w-5')]")
+        # Check that fields are empty
+        assert username_input.get_attribute("value") == "", "Username field is not empty after logout"
+        assert password_input.get_attribute("value") == "", "Password field is not empty after logout"
 
-    # Check if the checkbox is "checked" based on its classes (adjust this according to your styles)
-          is_checked = "bg-blue-600" in checkbox_inner.get_attribute("class")  # or check if SVG is present
+        # Check the custom 'Remember me' checkbox (based on presence of checked class or SVG)
+        remember_me_div = driver.find_element(By.XPATH, "//label[contains(text(), 'Remember me')]/parent::div")
 
-          assert is_checked, "Remember me checkbox is still checked after logout"
+        checkbox_inner = remember_me_div.find_element(By.XPATH, ".//div[contains(@class, 'h-5 w-5')]")
 
-          allure.attach(driver.get_screenshot_as_png(), name="reset_form_after_logout", attachment_type=allure.attachment_type.PNG)
+        # Check if the checkbox is "checked" based on its classes (adjust this according to your styles)
+        is_checked = "bg-blue-600" in checkbox_inner.get_attribute("class")  # or check if SVG is present
 
-    
-    finally:
-        driver.quit()
+        assert is_checked, "Remember me checkbox is still checked after logout"
@@ -0,0 +1,83 @@
+import json
+import random
+import time
+
+from utils.markdown_normaliser import MarkdownNormaliser, benchmark, normalise_markdown, synthetic_reply
+from utils.stream_decoder import read_reply
+
+
+def stream(text, sizes):
+    normaliser = MarkdownNormaliser()
+    start = 0
+    for size in sizes:
+        normaliser.feed(text[start:start + size])
+        start += size
+    normaliser.feed(text[start:])
+    normaliser.flush()
+    return normaliser.text
+
+
+def test_numbers_and_tickers_survive():
+    text = "AAPL fell -2.4% while BRK-B rose +1.1%; RDS_A -> RDS-B at 3 - 1 = 2, not 5 * 3 * 2"
+
+    assert normalise_markdown(text) == text
+
+
+def test_markup_is_stripped():
+    text = "\n".join([
+        "## Apple (AAPL) ##",
+        "**Price**: *$187.20* (__-2.4%__) ~~old~~",
+        "- See [the filing](https://sec.gov/x) or <https://example.com>",
+        "> Quoted `P/E` of ***31.2***",
+        "---",
+        "1. Buy_the_dip is **not** advice",
+    ])
+
+    assert normalise_markdown(text) == "\n".join([
+        "Apple (AAPL)",
+        "Price: $187.20 (-2.4%) old",
+        "See the filing or https://example.com",
+        "Quoted P/E of 31.2",
+        "",
+        "1. Buy_the_dip is not advice",
+    ])
+
+
+def test_code_fences_are_dropped_but_their_contents_kept():
+    text = "Ratio:\n```python\npe = price / eps  # **not bold**\n```\nDone"
+
+    assert normalise_markdown(text) == "Ratio:\npe = price / eps  # **not bold**\nDone"
+
+
+def test_streamed_output_matches_one_shot_for_any_chunking():
+    text = synthetic_reply(4000, seed=3)
+    expected = normalise_markdown(text)
+    rng = random.Random(11)
+
+    for _ in range(50):
+        sizes = [rng.randint(1, 40) for _ in range(rng.randint(1, 200))]
+        assert stream(text, sizes) == expected
+
+
+def test_unclosed_markers_stay_linear():
+    text = "*" + "a" * 20000 + " _" * 20000 + " `" * 20000
+
+    started = time.perf_counter()
+    normalise_markdown(text)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_read_reply_feeds_the_normaliser_while_streaming():
+    events = [{"event": "chat_streaming", "data": {"chunk": part}} for part in ("**TS", "LA** is ", "up *3%*")]
+    data = b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in events)
+    normaliser = MarkdownNormaliser()
+
+    assert read_reply([data[:10], data[10:]], normaliser=normaliser) == "**TSLA** is up *3%*"
+    assert normaliser.text == "TSLA is up 3%"
+
+
+def test_benchmark_reports_throughput():
+    results = benchmark(size=20000, chunk_size=32, repeat=1)
+
+    assert set(results) == {"one-shot", "streamed"}
+    assert all(throughput > 0 for throughput in results.values())
@@ -0,0 +1,69 @@
+import json
+
+from utils.microbenchmarks import BENCHMARKS, build_workload, compare, judge_review, main, ndjson_blocks, run_benchmarks
+from utils.prompt_corpus import load_prompts
+from utils.stream_decoder import read_reply
+
+
+def test_workloads_have_the_requested_shape(tmp_path):
+    workload = build_workload(str(tmp_path), reply_kb=4, chunks=500, csv_rows=300, review_kb=1, reviews=3,
+                              attachments=2)
+
+    assert read_reply(workload.blocks) == workload.reply
+    assert len(workload.blocks) > 1
+    assert len(load_prompts(workload.csv_path)) == 300
+    assert all(review.endswith("/10**") and len(review) > 1024 for review in workload.reviews)
+    assert len(workload.results) == 2
+
+
+def test_stream_events_match_the_chunk_count():
+    blocks = ndjson_blocks("x" * 1000, 100)
+
+    assert b"".join(blocks).count(b"chat_streaming") == 100
+
+
+def test_every_benchmark_reports_time_and_peak_memory(tmp_path):
+    workload = build_workload(str(tmp_path), reply_kb=2, chunks=50, csv_rows=50, review_kb=1, reviews=2,
+                              attachments=2)
+
+    results = run_benchmarks(workload, repeat=1)
+
+    assert set(results) == set(BENCHMARKS)
+    for result in results.values():
+        assert result["best"] > 0
+        assert result["peak_kb"] >= 0
+
+
+def test_both_score_extractors_agree_on_verbose_reviews():
+    from utils.bot_helpers import BotTestHelper
+    from utils.judge_verdict import review_score
+
+    review = judge_review(2000, 4, seed=3)
+
+    assert review_score(review) == BotTestHelper.extract_score(review) == 4
+
+
+def test_compare_flags_slowdowns_past_the_limit():
+    previous = {"a": {"best": 0.010}, "b": {"best": 0.010}}
+    current = {"a": {"best": 0.011}, "b": {"best": 0.015}, "new": {"best": 1.0}}
+
+    rows = compare(current, previous, max_slowdown=1.2)
+
+    assert [(name, slower) for name, _, _, _, slower in rows] == [("a", False), ("b", True)]
+
+
+def test_results_are_saved_and_compared(tmp_path, capsys):
+    first = tmp_path / "first.json"
+    args = ["--only", "clean_markdown,extract_score_helper", "--repeat", "1", "--reply-kb", "2", "--chunks", "20",
+            "--csv-rows", "10", "--review-kb", "1"]
+
+    assert main(args + ["--output", str(first)]) == 0
+    saved = json.loads(first.read_text())
+    assert set(saved["results"]) == {"clean_markdown", "extract_score_helper"}
+
+    # Pretend the previous commit was far faster
+    for result in saved["results"].values():
+        result["best"] /= 1000
+    first.write_text(json.dumps(saved))
+    assert main(args + ["--output", str(tmp_path / "second.json"), "--compare", str(first)]) == 1
+    assert "SLOWER" in capsys.readouterr().out
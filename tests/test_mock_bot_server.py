@@ -0,0 +1,136 @@
+import time
+
+import pytest
+import requests
+
+from utils.async_client import AsyncBotClient
+from utils.http_session import BotSession
+from utils.mock_bot_server import MockBotConfig, make_token, parse_profile
+from utils.stream_decoder import StreamDecoder, read_reply
+from utils.stream_metrics import StreamTimer
+
+TOKEN = make_token()
+
+
+def stream(server, prompt, token=TOKEN, timer=None):
+    session = BotSession()
+    try:
+        response = session.post(server.url, headers={"Authorization": f"Bearer {token}"}, json={"prompt": prompt},
+                                stream=True)
+        if response.status_code != 200:
+            return response.status_code, response.json()
+        if timer is not None:
+            timer.mark_headers()
+        return 200, read_reply(session.iter_bytes(response), timer)
+    finally:
+        session.close()
+
+
+def test_replies_stream_as_chat_events(mock_bot_server):
+    status, reply = stream(mock_bot_server, "What is a P/E ratio?")
+
+    assert status == 200
+    assert reply == mock_bot_server.reply_for("What is a P/E ratio?")
+    assert mock_bot_server.streams == 1
+
+
+@pytest.mark.mock_bot(secret="s3cret", verify_expiry=True)
+def test_bearer_token_is_checked(mock_bot_server):
+    assert stream(mock_bot_server, "hi", token="not-a-jwt")[0] == 401
+    assert stream(mock_bot_server, "hi", token=make_token("wrong"))[0] == 401
+    assert stream(mock_bot_server, "hi", token=make_token("s3cret", expires_in=-10)) == (401, {
+        "detail": "Token is expired", "code": "token_not_valid"})
+    assert stream(mock_bot_server, "hi", token=make_token("s3cret"))[0] == 200
+
+
+def test_missing_prompt_is_rejected(mock_bot_server):
+    response = requests.post(mock_bot_server.url, headers={"Authorization": f"Bearer {TOKEN}"}, json={})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.mock_bot(ttft=0.2, chunk_delay=0.01, reply_size=400, chunk_size=40)
+def test_ttft_and_chunk_delay_show_up_in_stream_metrics(mock_bot_server):
+    timer = StreamTimer()
+
+    stream(mock_bot_server, "Explain beta", timer=timer)
+
+    assert timer.metrics.ttfc >= 0.2
+    assert timer.metrics.chunk_count >= 10
+    assert min(timer.metrics.gaps) >= 0.005
+
+
+@pytest.mark.mock_bot(throughput=20000, reply_size=4000)
+def test_throughput_is_capped(mock_bot_server):
+    started = time.perf_counter()
+    stream(mock_bot_server, "Compare ETFs and mutual funds")
+
+    # ~4.9KB of events at 20KB/s
+    assert time.perf_counter() - started >= 0.2
+
+
+@pytest.mark.mock_bot(cold_start=0.3)
+def test_first_request_after_idling_stalls(mock_bot_server):
+    started = time.perf_counter()
+    stream(mock_bot_server, "first")
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    stream(mock_bot_server, "second")
+    second = time.perf_counter() - started
+
+    assert first >= 0.3 > second
+    assert mock_bot_server.cold_starts == 1
+
+
+@pytest.mark.mock_bot(drop_rate=1.0)
+def test_dropped_connections_surface_as_errors(mock_bot_server):
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        stream(mock_bot_server, "Will this finish?")
+    assert mock_bot_server.dropped == 1
+
+
+@pytest.mark.mock_bot(malformed_rate=0.3, seed=4)
+def test_malformed_events_are_counted_not_fatal(mock_bot_server):
+    timer = StreamTimer()
+
+    reply = stream(mock_bot_server, "What is a dividend?", timer=timer)[1]
+
+    assert mock_bot_server.malformed > 0
+    assert timer.metrics.malformed_events == mock_bot_server.malformed
+    assert len(reply) < len(mock_bot_server.reply_for("What is a dividend?"))
+
+
+@pytest.mark.mock_bot(chunk_delay=0.01)
+def test_async_client_under_concurrent_load(mock_bot_server):
+    client = AsyncBotClient(mock_bot_server.url, TOKEN, concurrency=8, max_connections_per_host=8)
+    prompts = [f"prompt {i}" for i in range(24)]
+
+    results = client.run(prompts)
+
+    assert results == {p: mock_bot_server.reply_for(p) for p in prompts}
+    assert 2 <= mock_bot_server.peak_active <= 8
+
+
+def test_same_seed_replays_the_same_faults():
+    from utils.mock_bot_server import MockBotServer
+
+    counts = []
+    for _ in range(2):
+        with MockBotServer(MockBotConfig(malformed_rate=0.2, seed=7)) as server:
+            decoder = StreamDecoder()
+            session = BotSession()
+            response = session.post(server.url, headers={"Authorization": f"Bearer {TOKEN}"},
+                                    json={"prompt": "same"}, stream=True)
+            read_reply(session.iter_bytes(response), decoder=decoder)
+            session.close()
+            counts.append(decoder.malformed)
+
+    assert counts[0] == counts[1] > 0
+
+
+def test_profiles_parse_into_config():
+    config = parse_profile("ttft=0.4, chunk_size=16,verify_expiry=true,secret=abc")
+
+    assert (config.ttft, config.chunk_size, config.verify_expiry, config.secret) == (0.4, 16, True, "abc")
+    with pytest.raises(ValueError, match="Unknown mock bot setting"):
+        parse_profile("latency=1")
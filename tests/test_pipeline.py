@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from utils.pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_every_stage():
+    pipeline = Pipeline([
+        Stage("double", lambda d: {**d, "x": d["x"] * 2}, workers=3),
+        Stage("inc", lambda d: {**d, "x": d["x"] + 1}),
+    ])
+
+    items = sorted(pipeline.run({"x": i} for i in range(20)), key=lambda item: item.index)
+
+    assert [item.data["x"] for item in items] == [i * 2 + 1 for i in range(20)]
+    assert pipeline.stats["double"].processed == 20
+
+
+def test_stages_overlap():
+    def slow(data):
+        time.sleep(0.1)
+        return data
+
+    pipeline = Pipeline([Stage("stream", slow), Stage("judge", slow)])
+
+    started = time.perf_counter()
+    list(pipeline.run({} for _ in range(5)))
+    elapsed = time.perf_counter() - started
+
+    # Sequential would be 1.0s; overlapped is about (5 + 1) * 0.1s
+    assert elapsed < 0.85
+
+
+def test_slow_stage_applies_backpressure():
+    released = threading.Event()
+    produced = []
+
+    def source():
+        for i in range(50):
+            produced.append(i)
+            yield {"i": i}
+
+    def blocked(data):
+        released.wait()
+        return data
+
+    pipeline = Pipeline([Stage("fast", lambda d: d), Stage("slow", blocked)], queue_size=2)
+    results = pipeline.run(source())
+    consumer = threading.Thread(target=lambda: list(results))
+    consumer.start()
+    time.sleep(0.2)
+
+    # Only a handful of items fit in the bounded queues while the slow stage is stuck
+    assert len(produced) <= 8
+    released.set()
+    consumer.join(timeout=5)
+    assert len(produced) == 50
+
+
+def test_failure_skips_later_stages_and_is_reported():
+    def fail_on_three(data):
+        if data["i"] == 3:
+            raise ValueError("bad reply")
+        return data
+
+    later = []
+    pipeline = Pipeline([Stage("stream", fail_on_three), Stage("judge", lambda d: later.append(d["i"]) or d)])
+
+    futures = pipeline.start([(f"p{i}", {"i": i}) for i in range(5)])
+
+    assert futures["p1"].result(timeout=5) == {"i": 1}
+    with pytest.raises(ValueError):
+        futures["p3"].result(timeout=5)
+    assert 3 not in later
+
+
+def test_stop_cancels_queued_items_and_waits_for_running_ones():
+    started, release = threading.Event(), threading.Event()
+    finished = []
+
+    def stream(data):
+        started.set()
+        release.wait(5)
+        finished.append(data["i"])
+        return data
+
+    pipeline = Pipeline([Stage("stream", stream)], queue_size=2)
+    futures = pipeline.start([(f"p{i}", {"i": i}) for i in range(10)])
+    started.wait(5)
+
+    stopper = threading.Thread(target=pipeline.stop)
+    stopper.start()
+    time.sleep(0.05)
+    # stop() blocks while a stage call is still running
+    assert stopper.is_alive()
+    release.set()
+    stopper.join(5)
+
+    assert not stopper.is_alive()
+    assert finished == [0]
+    assert futures["p0"].result() == {"i": 0}
+    assert all(future.done() for future in futures.values())
+    assert isinstance(futures["p1"].exception(), CancelledError)
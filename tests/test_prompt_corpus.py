@@ -0,0 +1,82 @@
+from collections import Counter
+
+from utils.prompt_corpus import PromptCorpus, allocate, iter_csv, load_prompts, normalise
+
+
+def write_csv(path, header, rows):
+    path.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+    return path
+
+
+def test_metadata_columns_are_parsed(tmp_path):
+    path = write_csv(tmp_path / "mixed.csv", "prompt,category,min_score,tags", [
+        '"What is a P/E ratio?",tutor,7,ratios;beginner',
+        '"Price of TSLA?",,,',
+    ])
+
+    first, second = list(iter_csv(str(path)))
+
+    assert (first.category, first.min_score, first.tags) == ("tutor", 7, ("ratios", "beginner"))
+    assert (second.category, second.min_score, second.tags) == ("mixed", None, ())
+    assert first.line == 2
+
+
+def test_built_in_files_map_to_categories(tmp_path):
+    path = write_csv(tmp_path / "live_data_prompts.csv", "prompt", ['"Price of AAPL?"'])
+
+    assert next(iter_csv(str(path))).category == "live"
+
+
+def test_exact_and_normalised_duplicates_are_dropped(tmp_path):
+    write_csv(tmp_path / "a_prompts.csv", "prompt", [
+        '"What is an ETF?"', '"What is an ETF?"', '"what is  an ETF"', '"What is a bond?"',
+    ])
+    write_csv(tmp_path / "b_prompts.csv", "prompt", ['"WHAT IS A BOND!"', '"Explain dividends"'])
+    corpus = PromptCorpus(str(tmp_path))
+
+    prompts = [record.prompt for record in corpus]
+
+    assert prompts == ["What is an ETF?", "What is a bond?", "Explain dividends"]
+    assert (corpus.stats.rows, corpus.stats.exact, corpus.stats.normalised, corpus.stats.kept) == (6, 1, 2, 3)
+
+
+def test_normalise_keeps_tickers_and_numbers_distinct():
+    assert normalise("Price of  TSLA?") == normalise("price of tsla")
+    assert normalise("Is -5% bad?") != normalise("Is 5% bad?")
+
+
+def test_balanced_sample_spreads_across_categories(tmp_path):
+    rows = [f'"tutor question {i}",tutor' for i in range(500)]
+    rows += [f'"live question {i}",live' for i in range(100)]
+    rows += [f'"basic question {i}",basic' for i in range(10)]
+    write_csv(tmp_path / "big.csv", "prompt,category", rows)
+    corpus = PromptCorpus(str(tmp_path))
+
+    sample = corpus.sample(90, seed=7)
+
+    assert Counter(r.category for r in sample) == {"tutor": 40, "live": 40, "basic": 10}
+    assert len({r.prompt for r in sample}) == 90
+    assert sample == corpus.sample(90, seed=7)
+    assert sample != corpus.sample(90, seed=8)
+    # Corpus order is kept
+    assert [r.line for r in sample] == sorted(r.line for r in sample)
+
+
+def test_proportional_sample_follows_category_sizes(tmp_path):
+    rows = [f'"tutor question {i}",tutor' for i in range(300)] + [f'"live question {i}",live' for i in range(100)]
+    write_csv(tmp_path / "big.csv", "prompt,category", rows)
+
+    sample = PromptCorpus(str(tmp_path)).sample(40, balanced=False)
+
+    assert Counter(r.category for r in sample) == {"tutor": 30, "live": 10}
+
+
+def test_allocate_never_exceeds_what_is_available():
+    assert allocate({"a": 2, "b": 50, "c": 50}, 30) == {"a": 2, "b": 14, "c": 14}
+    assert allocate({"a": 2, "b": 3}, 30) == {"a": 2, "b": 3}
+
+
+def test_load_prompts_returns_unique_strings(tmp_path):
+    path = write_csv(tmp_path / "p.csv", "prompt", ['"Hi"', '"Hi"', '"Hello"'])
+
+    assert load_prompts(str(path)) == ["Hi", "Hello"]
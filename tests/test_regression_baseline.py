@@ -0,0 +1,98 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from utils.regression_baseline import (BaselinePlugin, HistoryStore, PromptBaseline, check_prompt,
+                                       compare_categories, mann_whitney_greater, samples_from_results)
+from utils.results_sink import ResultsSink
+
+
+def samples(category, n, total, score, seed, prompt="p{}"):
+    rng = random.Random(seed)
+    return [{"prompt": prompt.format(i), "category": category, "ttft": total / 4 * rng.uniform(0.8, 1.2),
+             "total": total * rng.uniform(0.8, 1.2), "score": score + rng.choice([-1, 0, 0, 1])} for i in range(n)]
+
+
+def test_mann_whitney_separates_shifted_samples_from_noise():
+    rng = random.Random(1)
+    base = [rng.gauss(2.0, 0.3) for _ in range(40)]
+    slower = [rng.gauss(3.0, 0.3) for _ in range(40)]
+    same = [rng.gauss(2.0, 0.3) for _ in range(40)]
+
+    assert mann_whitney_greater(slower, base) < 0.001
+    assert mann_whitney_greater(same, base) > 0.05
+    assert mann_whitney_greater(base, slower) > 0.99
+    # All ties carry no evidence either way
+    assert mann_whitney_greater([7] * 5, [7] * 5) == 1.0
+
+
+def test_prompt_regressions_against_its_own_history():
+    history = [{"prompt": "What is a bond?", "ttft": 0.5, "total": t, "score": 8} for t in (2.0, 2.2, 2.1, 1.9)]
+
+    regressions = check_prompt({"prompt": "What is a bond?", "ttft": 0.5, "total": 3.5, "score": 6}, history)
+
+    assert [(r.metric, r.current) for r in regressions] == [("total", 3.5), ("score", 6)]
+    assert check_prompt({"prompt": "What is a bond?", "ttft": 0.5, "total": 2.6, "score": 7}, history) == []
+    assert check_prompt({"prompt": "x", "total": 99.0, "score": 0}, history[:2]) == []
+
+
+def test_category_regressions_need_the_limit_and_the_test():
+    baseline = samples("tutor", 30, 2.0, 8, seed=1) + samples("live", 30, 3.0, 7, seed=2)
+    current = samples("tutor", 20, 3.2, 8, seed=3) + samples("live", 20, 3.1, 5, seed=4)
+
+    regressions = compare_categories(current, baseline)
+
+    assert {(r.name, r.metric) for r in regressions} == {("tutor", "ttft"), ("tutor", "total"), ("live", "score")}
+    assert all(r.p_value < 0.05 for r in regressions)
+    # Too few samples to test
+    assert compare_categories(current[:3], baseline) == []
+
+
+def test_cold_starts_skips_and_offline_runs_stay_out_of_the_history():
+    records = [
+        {"prompt": "a", "category": "tutor", "outcome": "passed", "ttfc": 0.4, "total": 2.0, "score": 8},
+        {"prompt": "b", "category": "tutor", "outcome": "failed", "ttfc": 0.5, "total": 2.5, "score": 4},
+        {"prompt": "c", "category": "tutor", "outcome": "passed", "cold_start": True, "total": 40.0, "score": 8},
+        {"prompt": "d", "category": "tutor", "outcome": "skipped"},
+        {"prompt": "e", "category": "tutor", "outcome": "passed", "source": "replay", "ttfc": 0.0, "total": 0.01},
+        {"prompt": "f", "category": "tutor", "outcome": "passed", "source": "mock", "ttfc": 0.0, "total": 0.02},
+    ]
+
+    assert samples_from_results(records) == [
+        {"prompt": "a", "category": "tutor", "score": 8, "ttft": 0.4, "total": 2.0},
+        {"prompt": "b", "category": "tutor", "score": 4, "ttft": 0.5, "total": 2.5},
+    ]
+
+
+def write_run(path, run_id, rows):
+    sink = ResultsSink(path, run_id=run_id)
+    for row in rows:
+        sink.add({"outcome": "passed", "ttfc": row["ttft"], **{k: v for k, v in row.items() if k != "ttft"}})
+    sink.close()
+
+
+def test_plugin_compares_each_run_with_the_previous_ones(tmp_path):
+    results = str(tmp_path / "prompt_results.jsonl")
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    for run in range(3):
+        write_run(results, f"run{run}", samples("tutor", 10, 2.0, 8, seed=run))
+        plugin = BaselinePlugin(store, results, f"run{run}", action="fail")
+        assert plugin.evaluate() == []
+
+    write_run(results, "run3", samples("tutor", 10, 3.5, 8, seed=9))
+    plugin = BaselinePlugin(store, results, "run3", action="fail")
+    session = SimpleNamespace(exitstatus=pytest.ExitCode.OK)
+    plugin.pytest_sessionfinish(session)
+
+    assert plugin.baseline_runs == 3
+    assert {r.metric for r in plugin.regressions} == {"ttft", "total"}
+    assert session.exitstatus == pytest.ExitCode.TESTS_FAILED
+    assert any(line.startswith("REGRESSION category 'tutor': total") for line in plugin.summary_lines())
+    assert store.recent_runs(10) == ["run3", "run2", "run1", "run0"]
+
+    baseline = PromptBaseline(store, run_id="run4")
+    assert len(baseline.history["p0"]) == 4
+    assert baseline.check({"prompt": "p0", "category": "tutor", "ttfc": 0.5, "total": 9.0, "score": 8})
+    store.close()
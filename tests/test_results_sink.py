@@ -0,0 +1,81 @@
+import json
+
+import utils.results_sink as results_sink
+from utils.results_sink import AttachmentBuffer, ResultsSink, load_results, should_capture, worker_path
+
+
+def test_records_are_written_in_batches(tmp_path):
+    path = tmp_path / "results.jsonl"
+    sink = ResultsSink(str(path), run_id="run-1", batch_size=3, flush_interval=3600)
+
+    sink.add({"prompt": "a", "score": 7})
+    sink.add({"prompt": "b", "score": 4})
+    assert not path.exists()
+
+    sink.add({"prompt": "c", "score": 9})
+    sink.add({"prompt": "d", "score": 8})
+    sink.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["prompt"] for r in records] == ["a", "b", "c", "d"]
+    assert {r["run_id"] for r in records} == {"run-1"}
+    assert sink.flushes == 2
+    assert sink.summary_lines()[0].startswith("4 prompt results in 2 writes")
+
+
+def test_stale_buffer_is_flushed_by_interval(tmp_path):
+    now = [0.0]
+    sink = ResultsSink(str(tmp_path / "r.jsonl"), batch_size=100, flush_interval=5, clock=lambda: now[0])
+
+    sink.add({"prompt": "a"})
+    now[0] = 6.0
+    sink.add({"prompt": "b"})
+
+    assert sink.written == 2
+
+
+def test_load_results_reads_worker_files_and_filters_runs(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    first = ResultsSink(worker_path(path, "gw0"), run_id="old")
+    first.add({"prompt": "a"})
+    first.close()
+    second = ResultsSink(worker_path(path, "gw1"), run_id="new")
+    second.add({"prompt": "b"})
+    second.close()
+
+    assert {r["prompt"] for r in load_results(path)} == {"a", "b"}
+    assert [r["prompt"] for r in load_results(path, run_id="latest")] == ["b"]
+
+
+def test_attachments_wait_for_the_outcome(monkeypatch):
+    attached = []
+    monkeypatch.setattr(results_sink.AttachmentBuffer, "_attach", staticmethod(lambda *args: attached.append(args)))
+
+    passing = AttachmentBuffer("failure", "test_a")
+    passing.attach("raw", "Bot Response (Raw)", "text")
+    passing.finish(failed=False)
+    assert attached == []
+
+    failing = AttachmentBuffer("failure", "test_b")
+    failing.attach("raw", "Bot Response (Raw)", "text")
+    failing.finish(failed=True)
+    assert attached == [("raw", "Bot Response (Raw)", "text")]
+
+    AttachmentBuffer("always", "test_c").attach("now", "Prompt", "text")
+    assert attached[-1] == ("now", "Prompt", "text")
+
+    dropped = AttachmentBuffer("never", "test_d")
+    dropped.attach("x", "Prompt", "text")
+    dropped.finish(failed=True)
+    assert len(attached) == 2
+
+
+def test_capture_policy():
+    assert should_capture("failure", True, "t1")
+    assert not should_capture("failure", False, "t1")
+    assert not should_capture("never", True, "t1")
+    assert should_capture("always", False, "t1")
+
+    sampled = [should_capture("sample", False, f"test_{i}", sample_rate=0.25) for i in range(2000)]
+    assert 0.2 < sum(sampled) / len(sampled) < 0.3
+    assert sampled == [should_capture("sample", False, f"test_{i}", sample_rate=0.25) for i in range(2000)]
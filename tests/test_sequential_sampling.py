@@ -0,0 +1,75 @@
+import pytest
+
+from utils.sequential_sampling import SamplingStats, SequentialTest, t_coverage, t_quantile
+
+
+def sample(test, scores):
+    for score in scores:
+        decision = test.add(score)
+        if test.done:
+            return decision
+    return test.decision
+
+
+@pytest.mark.parametrize("df, expected", [(1, 12.706), (2, 4.303), (4, 2.776), (9, 2.262), (30, 2.042)])
+def test_t_quantiles_match_the_table(df, expected):
+    assert t_quantile(0.95, df) == pytest.approx(expected, abs=1e-3)
+    assert t_coverage(expected, df) == pytest.approx(0.95, abs=1e-4)
+
+
+def test_clear_pass_stops_early():
+    decision = sample(SequentialTest(6, max_samples=5), [8, 8, 8, 8, 8])
+
+    assert (decision.verdict, decision.samples, decision.settled) == ("pass", 3, True)
+    assert decision.low >= 6
+
+
+def test_clear_fail_stops_early():
+    decision = sample(SequentialTest(6, max_samples=5), [2, 3, 2, 2, 2])
+
+    assert (decision.verdict, decision.samples, decision.settled) == ("fail", 3, True)
+    assert decision.high < 6
+
+
+def test_borderline_scores_run_to_the_cap_and_decide_by_the_mean():
+    decision = sample(SequentialTest(6, max_samples=5), [6, 5, 7, 6, 6])
+
+    assert (decision.verdict, decision.samples, decision.settled) == ("pass", 5, False)
+
+
+def test_identical_scores_are_not_taken_as_noise_free():
+    test = SequentialTest(6, max_samples=5, min_spread=0.5)
+
+    assert test.add(7).verdict is None
+    assert test.add(7).verdict is None
+
+
+def test_curtailment_stops_once_the_cap_mean_is_out_of_reach():
+    # Three perfect scores after two zeros still only average 6; the interval alone is far too wide
+    decision = sample(SequentialTest(7, max_samples=5, min_spread=10), [0, 0, 0])
+
+    assert (decision.verdict, decision.samples, decision.settled) == ("fail", 2, True)
+
+
+def test_single_sample_keeps_the_old_behaviour():
+    test = SequentialTest(6, max_samples=1)
+
+    assert test.add(6).verdict == "pass"
+    with pytest.raises(RuntimeError):
+        test.add(6)
+
+
+def test_stats_report_calls_saved_against_fixed_n():
+    stats = SamplingStats(max_samples=5)
+    for scores, judge_calls in (([9, 9, 9], 3), ([6, 5, 7, 6, 6], 7)):
+        test = stats.start(6)
+        sample(test, scores)
+        stats.record("tutor", test, test.decision.samples, judge_calls)
+
+    totals = stats.totals()
+    assert (totals["bot_calls"], totals["fixed_bot_calls"]) == (8, 10)
+    assert (totals["judge_calls"], totals["fixed_judge_calls"]) == (10, 12)
+    lines = stats.summary_lines()
+    assert "tutor: 2 prompts, 4.0 samples each, 1 inconclusive" in lines
+    assert "bot calls: 8 vs 10 fixed-N, saved 2 (20%)" in lines
+    assert "judge calls: 10 vs 12 fixed-N, saved 2 (17%)" in lines
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from utils.merge_results import merge_allure_dirs, merge_environment, merge_metrics
+from utils.sharding import shard_key, shard_of, split_items
+from utils.stream_metrics import MetricsRecorder, StreamMetrics
+
+
+class FakeCallSpec:
+    def __init__(self, params):
+        self.params = params
+
+
+class FakeItem:
+    def __init__(self, nodeid, prompt=None):
+        self.nodeid = nodeid
+        if prompt is not None:
+            self.callspec = FakeCallSpec({"prompt": prompt})
+
+
+def test_prompt_tests_are_keyed_on_the_prompt():
+    assert shard_key(FakeItem("tests/test_bot.py::test_tutor[x]", prompt="What is a bond?")) == "prompt:What is a bond?"
+    assert shard_key(FakeItem("tests/test_login.py::test_login_valid")) == "tests/test_login.py::test_login_valid"
+
+
+def test_shards_are_stable_and_cover_every_item_once():
+    items = [FakeItem(f"t::p[{i}]", prompt=f"prompt {i}") for i in range(200)] + [FakeItem(f"login::{i}") for i in range(20)]
+
+    shards = [split_items(items, index, 4)[0] for index in range(4)]
+
+    assert sorted(item.nodeid for shard in shards for item in shard) == sorted(item.nodeid for item in items)
+    assert all(30 < len(shard) < 80 for shard in shards)
+    # Fixed values: a layout change would move prompts between nodes
+    assert [shard_of(f"prompt:prompt {i}", 4) for i in range(6)] == [1, 3, 0, 1, 3, 0]
+
+
+def test_bad_shard_index_is_rejected():
+    with pytest.raises(ValueError, match="0..1"):
+        split_items([], 2, 2)
+
+
+def write_node(directory, uuid, status, environment):
+    directory.mkdir()
+    (directory / f"{uuid}-result.json").write_text(json.dumps({"uuid": uuid, "status": status}))
+    (directory / f"{uuid}-attachment.txt").write_text("judgment")
+    (directory / "environment.properties").write_text(environment)
+    return str(directory)
+
+
+def test_merge_combines_results_and_environment(tmp_path):
+    node0 = write_node(tmp_path / "n0", "aaa", "passed", "Environment=dev\nShard=0/2\n")
+    node1 = write_node(tmp_path / "n1", "bbb", "failed", "Environment=dev\nShard=1/2\n")
+    merged = tmp_path / "merged"
+
+    statuses = merge_allure_dirs([node0, node1], str(merged))
+
+    assert statuses == {"passed": 1, "failed": 1}
+    assert {p.name for p in merged.iterdir()} == {
+        "aaa-result.json", "aaa-attachment.txt", "bbb-result.json", "bbb-attachment.txt", "environment.properties"}
+    assert (merged / "environment.properties").read_text() == "Environment=dev\nShard=0/2, 1/2\nNodes=2\n"
+
+
+def test_merge_environment_keeps_node_order(tmp_path):
+    a = tmp_path / "a.properties"
+    b = tmp_path / "b.properties"
+    a.write_text("Python Version=Python 3.11.7\n")
+    b.write_text("Python Version=Python 3.12.1\n")
+
+    assert merge_environment([str(a), str(b)])["Python Version"] == "Python 3.11.7, Python 3.12.1"
+
+
+def test_merged_metrics_summarise_latency_and_scores(tmp_path):
+    paths = []
+    for node, (total, score) in enumerate([(1.0, 8), (3.0, 5)]):
+        recorder = MetricsRecorder()
+        recorder.add("tutor", f"prompt {node}", StreamMetrics(ttfb=0.1, ttfc=0.2, total=total))
+        recorder.set_score(f"prompt {node}", score)
+        path = tmp_path / f"node{node}.jsonl"
+        recorder.write(str(path))
+        paths.append(str(path))
+
+    summary = merge_metrics(paths).summary_by_category()["tutor"]
+
+    assert summary["count"] == 2
+    assert summary["total"]["p50"] == 2.0
+    assert summary["score"] == {"count": 2, "mean": 6.5, "min": 5, "p50": 6.5}
@@ -0,0 +1,18 @@
+from utils.startup_benchmark import loaded_modules, parse_importtime
+
+
+def test_importing_the_test_modules_loads_no_heavy_sdks():
+    assert loaded_modules() == []
+
+
+def test_parse_importtime_keeps_top_level_imports():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |     _json",
+        "import time:       300 |        420 |   json",
+        "import time:      5000 |     250000 | langchain_core",
+        "some other warning",
+    ])
+
+    assert parse_importtime(stderr) == {"langchain_core": 250000}
+
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from utils.stream_decoder import StreamDecoder, read_reply
+from utils.stream_metrics import StreamTimer
+
+
+def ndjson(*events):
+    return b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in events)
+
+
+def chunk(text):
+    return {"event": "chat_streaming", "data": {"chunk": text}}
+
+
+def split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_events_split_across_reads_are_reassembled():
+    data = ndjson(chunk("Price: "), chunk("-2.5% "), chunk("€ ok"))
+
+    for size in (1, 3, 7, len(data)):
+        assert read_reply(split_every(data, size)) == "Price: -2.5% € ok"
+
+
+def test_chunks_are_yielded_before_the_stream_ends():
+    decoder = StreamDecoder()
+    blocks = iter([ndjson(chunk("first")), ndjson(chunk("second"))])
+    chunks = decoder.iter_chunks(blocks)
+
+    assert next(chunks) == "first"
+    assert decoder.text == "first"
+
+
+def test_malformed_events_are_counted_not_raised():
+    data = b'{"event": "chat_streaming", "data": {"chunk": "a"}}\n{broken\n[1, 2]\n' + ndjson(chunk("b"))
+    timer = StreamTimer()
+
+    assert read_reply([data], timer) == "ab"
+    assert timer.metrics.malformed_events == 2
+
+
+def test_terminal_event_stops_reading():
+    def blocks():
+        yield ndjson(chunk("done"), {"event": "chat_end", "data": {}})
+        raise AssertionError("read past the terminal event")
+
+    assert read_reply(blocks()) == "done"
+
+
+def test_other_events_are_ignored():
+    data = ndjson({"event": "chat_started", "data": {}}, chunk("x"), {"event": "sources", "data": [1]})
+
+    decoder = StreamDecoder()
+    decoder.feed(data)
+
+    assert decoder.text == "x"
+    assert decoder.malformed == 0
+
+
+def test_sse_framing_with_named_and_unnamed_events():
+    data = (
+        b": keep-alive\r\n\r\n"
+        b"event: chat_streaming\r\ndata: {\"chunk\": \"Hello\"}\r\n\r\n"
+        b"data: {\"event\": \"chat_streaming\", \"data\": {\"chunk\": \" there\"}}\n\n"
+        b"data: [DONE]\n\n"
+        b"event: chat_streaming\ndata: {\"chunk\": \"ignored\"}\n\n"
+    )
+    decoder = StreamDecoder()
+
+    assert read_reply(split_every(data, 5), decoder=decoder) == "Hello there"
+    assert decoder.framing == "sse"
+    assert decoder.done
+
+
+def test_trailing_line_without_newline_is_flushed():
+    data = ndjson(chunk("a")) + json.dumps(chunk("b")).encode("utf-8")
+
+    assert read_reply([data]) == "ab"
+
+
+def test_async_iteration():
+    async def blocks():
+        for block in split_every(ndjson(chunk("x"), chunk("y")), 4):
+            yield block
+
+    async def collect():
+        return [c async for c in StreamDecoder().aiter_chunks(blocks())]
+
+    assert asyncio.run(collect()) == ["x", "y"]
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from utils.stream_metrics import MetricsRecorder, StreamMetrics, StreamTimer, percentile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_percentile_interpolates():
+    values = [1, 2, 3, 4, 5]
+
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == pytest.approx(4.8)
+    assert percentile([], 50) is None
+
+
+def test_timer_captures_first_byte_first_chunk_and_gaps():
+    clock = FakeClock()
+    timer = StreamTimer(clock)
+    clock.now = 0.4
+    timer.mark_headers()
+    clock.now = 0.5
+    timer.on_bytes(60)
+    timer.on_chunk()
+    clock.now = 0.7
+    timer.on_bytes(60)
+    timer.on_chunk()
+    clock.now = 1.0
+    timer.on_bytes(60)
+    timer.on_chunk()
+
+    metrics = timer.finish()
+
+    assert metrics.ttfb == pytest.approx(0.4)
+    assert metrics.ttfc == pytest.approx(0.5)
+    assert metrics.gaps == pytest.approx([0.2, 0.3])
+    assert metrics.chunk_count == 3
+    assert metrics.bytes_per_second == pytest.approx(180.0)
+
+
+def test_recorder_summarises_per_category_without_cold_starts(tmp_path):
+    recorder = MetricsRecorder()
+    for total in (1.0, 2.0, 3.0):
+        recorder.add("Live Data", "p", StreamMetrics(ttfb=0.1, ttfc=0.2, total=total, chunk_count=10))
+    recorder.add("Live Data", "cold", StreamMetrics(ttfb=40, ttfc=41, total=60, cold_start=True))
+    recorder.add("Stock Tutor", "p", StreamMetrics(ttfb=0.3, ttfc=0.4, total=5.0))
+
+    summary = recorder.summary_by_category()
+
+    assert summary["Live Data"]["count"] == 3
+    assert summary["Live Data"]["total"]["p50"] == 2.0
+    assert summary["Stock Tutor"]["ttfc"]["p99"] == 0.4
+
+    path = tmp_path / "metrics.jsonl"
+    summary_path = recorder.write(str(path))
+    assert len(path.read_text().splitlines()) == 5
+    assert json.loads(open(summary_path).read())["Live Data"]["count"] == 3
+
+
+def test_replayed_and_mock_timings_are_summarised_apart_from_live_ones():
+    recorder = MetricsRecorder()
+    recorder.add("Live Data", "p", StreamMetrics(ttfb=0.1, ttfc=2.0, total=8.0))
+    recorder.add("Live Data", "q", StreamMetrics(ttfb=0.0, ttfc=0.01, total=0.02), source="replay")
+    recorder.add("Live Data", "r", StreamMetrics(ttfb=0.4, ttfc=0.4, total=0.5), source="mock")
+    # Records written before the source was kept count as live
+    recorder.records.append({**recorder.records[0], "prompt": "old"})
+    del recorder.records[-1]["source"]
+
+    summary = recorder.summary_by_category()
+
+    assert sorted(summary) == ["Live Data", "Live Data (mock)", "Live Data (replay)"]
+    assert summary["Live Data"]["count"] == 2
+    assert summary["Live Data"]["ttfc"]["p50"] == 2.0
+    assert summary["Live Data (replay)"]["total"]["p50"] == 0.02
+
+
+def test_worker_files_are_merged_and_removed(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    for worker, total in (("gw0", 1.0), ("gw1", 3.0)):
+        recorder = MetricsRecorder()
+        recorder.add("Live Data", f"p{worker}", StreamMetrics(ttfb=0.1, ttfc=0.2, total=total))
+        assert recorder.write(str(tmp_path / f"metrics.{worker}.jsonl"), summary=False) is None
+
+    merged = MetricsRecorder.collect_workers(path)
+
+    assert sorted(r["total"] for r in merged.records) == [1.0, 3.0]
+    assert list(tmp_path.iterdir()) == []
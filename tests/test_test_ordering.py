@@ -0,0 +1,149 @@
+from types import SimpleNamespace
+
+from utils.test_ordering import (LongestFirstScheduling, NodeHistory, OrderingPlugin, RunHistory, expected_durations,
+                                 order_items)
+
+
+def items(*nodeids):
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+def report(nodeid, when, duration, outcome="passed", worker=None):
+    node = SimpleNamespace(gateway=SimpleNamespace(id=worker)) if worker else None
+    return SimpleNamespace(nodeid=nodeid, when=when, duration=duration, failed=outcome == "failed",
+                           skipped=outcome == "skipped", node=node)
+
+
+def test_history_keeps_the_last_runs_newest_first(tmp_path):
+    store = RunHistory(str(tmp_path / "history.sqlite3"))
+    store.add_run("r1", [("a", 1.0, "passed"), ("b", 5.0, "passed")])
+    store.add_run("r2", [("a", 2.0, "failed")])
+    store.add_run("r3", [("a", 3.0, "passed")])
+
+    stats = store.recent(runs=2)
+    store.close()
+
+    assert stats["a"].durations == [3.0, 2.0]
+    assert stats["a"].outcomes == ["passed", "failed"]
+    assert "b" not in stats
+
+
+def test_node_history_measures_failures_and_flips():
+    history = NodeHistory(durations=[4.0, 1.0, 2.0], outcomes=["failed", "passed", "failed"])
+
+    assert history.duration == 2.0
+    assert history.last_failed
+    assert history.failure_rate == 2 / 3
+    assert history.flips == 2
+
+
+def test_longest_first_with_the_median_for_unknown_tests():
+    stats = {
+        "fast": NodeHistory([1.0], ["passed"]),
+        "slow": NodeHistory([30.0, 20.0, 25.0], ["passed"] * 3),
+        "medium": NodeHistory([5.0], ["passed"]),
+    }
+    collected = items("fast", "new", "slow", "medium")
+
+    assert expected_durations(["fast", "new", "slow", "medium"], stats)["new"] == 5.0
+    # "new" ties with "medium" at the median and keeps its place ahead of it
+    assert [item.nodeid for item in order_items(collected, stats)] == ["slow", "new", "medium", "fast"]
+
+
+def test_without_history_the_collection_is_unchanged():
+    collected = items("c", "a", "b")
+
+    assert order_items(collected, {}) == collected
+    assert order_items(collected, {"a": NodeHistory([9.0], ["passed"])}, "file") == collected
+
+
+def test_flaky_first_puts_recent_failures_then_flaky_tests_ahead():
+    stats = {
+        "slow": NodeHistory([60.0] * 4, ["passed"] * 4),
+        "flaky": NodeHistory([1.0] * 4, ["passed", "failed", "passed", "passed"]),
+        "broken": NodeHistory([2.0] * 4, ["failed"] * 4),
+        "flapping": NodeHistory([1.0] * 4, ["failed", "passed", "passed", "passed"]),
+        "quick": NodeHistory([0.5] * 4, ["passed"] * 4),
+    }
+    collected = items("quick", "slow", "flaky", "flapping", "broken")
+
+    ordered = [item.nodeid for item in order_items(collected, stats, "flaky-first")]
+
+    assert ordered == ["broken", "flapping", "flaky", "slow", "quick"]
+
+
+def test_plugin_records_call_durations_and_worker_busy_time(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    plugin = OrderingPlugin(RunHistory(path), "run-1", order="longest-first")
+    for r in (report("t::a", "setup", 0.5, worker="gw0"), report("t::a", "call", 2.0, worker="gw0"),
+              report("t::a", "teardown", 0.5, worker="gw0"),
+              report("t::b", "setup", 0.1, worker="gw1"), report("t::b", "call", 1.0, "failed", worker="gw1"),
+              report("t::b", "teardown", 0.1, worker="gw1"),
+              report("t::c", "setup", 0.1, "skipped", worker="gw1"), report("t::c", "teardown", 0.0, worker="gw1")):
+        plugin.pytest_runtest_logreport(r)
+    plugin.pytest_sessionfinish(session=None)
+
+    store = RunHistory(path)
+    stats = store.recent()
+    store.close()
+    # Call phase only; setup and teardown still count towards the worker's busy time
+    assert (stats["t::a"].durations, stats["t::a"].outcomes) == ([2.0], ["passed"])
+    assert stats["t::b"].outcomes == ["failed"]
+    assert "t::c" not in stats
+    lines = plugin.summary_lines()
+    assert lines[0].startswith("order: longest-first; 2 test durations recorded")
+    assert lines[1] == "worker busy time: gw0 3.0s, gw1 1.3s (spread 1.7s)"
+
+
+class FakeNode:
+    def __init__(self, name):
+        self.gateway = SimpleNamespace(id=name)
+        self.sent = []
+        self.batches = []
+        self.shutting_down = False
+
+    def send_runtest_some(self, indices):
+        self.sent.extend(indices)
+        self.batches.append(list(indices))
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+class FakeConfig:
+    def getvalue(self, name):
+        return ["2*popen"]
+
+    def getoption(self, name):
+        return None
+
+
+def test_scheduler_deals_the_longest_tests_to_different_workers():
+    scheduler = LongestFirstScheduling(FakeConfig())
+    nodes = [FakeNode("gw0"), FakeNode("gw1")]
+    collection = [f"t::{i}" for i in range(10)]
+    for node in nodes:
+        scheduler.add_node(node)
+        scheduler.add_node_collection(node, collection)
+
+    scheduler.schedule()
+    assert [node.sent for node in nodes] == [[0, 2], [1, 3]]
+
+    # A worker that finishes takes the next test in order, one at a time
+    scheduler.mark_test_complete(nodes[1], 1)
+    assert nodes[1].sent == [1, 3, 4]
+    scheduler.mark_test_complete(nodes[0], 0)
+    assert nodes[0].sent == [0, 2, 5]
+
+
+def test_scheduler_sends_no_empty_batches_when_tests_run_short():
+    scheduler = LongestFirstScheduling(FakeConfig())
+    nodes = [FakeNode("gw0"), FakeNode("gw1")]
+    for node in nodes:
+        scheduler.add_node(node)
+        scheduler.add_node_collection(node, ["t::0", "t::1", "t::2"])
+
+    scheduler.schedule()
+
+    assert [node.batches for node in nodes] == [[[0], [2]], [[1]]]
+    assert all(node.shutting_down for node in nodes)
@@ -0,0 +1,121 @@
+import pytest
+
+from utils.waits import VirtualClock, Waiter, WaitRecorder, WaitTimeout
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeDriver:
+    def __init__(self, clock, url="https://app/login", navigate_at=None, target="https://app/chat"):
+        self.clock = clock
+        self.url = url
+        self.navigate_at = navigate_at
+        self.target = target
+        self.scripts = []
+        self.cdp = []
+
+    @property
+    def current_url(self):
+        if self.navigate_at is not None and self.clock.now >= self.navigate_at:
+            return self.target
+        return self.url
+
+    def execute_script(self, script, *args):
+        self.scripts.append((script, args))
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+        return {"identifier": "1"}
+
+
+def make_waiter(driver, clock, **kwargs):
+    return Waiter(driver, recorder=WaitRecorder(), clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_wait_returns_as_soon_as_condition_holds():
+    clock = FakeClock()
+    driver = FakeDriver(clock, navigate_at=0.3)
+    waiter = make_waiter(driver, clock)
+
+    assert waiter.url_contains("chat")
+
+    record = waiter.records[0]
+    assert record.satisfied
+    assert 0.3 <= record.elapsed < 0.5
+    assert record.polls > 1
+
+
+def test_poll_interval_backs_off_to_the_cap():
+    clock = FakeClock()
+    waiter = make_waiter(FakeDriver(clock), clock, timeout=5, initial_interval=0.1, max_interval=0.4, backoff=2)
+
+    assert waiter.url_contains("chat", raise_on_timeout=False) is None
+
+    assert clock.sleeps[:4] == pytest.approx([0.1, 0.2, 0.4, 0.4])
+    assert sum(clock.sleeps) == pytest.approx(5)
+    assert not waiter.records[0].satisfied
+
+
+def test_timeout_raises_with_last_condition_error():
+    clock = FakeClock()
+    waiter = make_waiter(FakeDriver(clock), clock, timeout=1)
+
+    def missing(driver):
+        raise LookupError("no such element")
+
+    with pytest.raises(WaitTimeout, match="no such element"):
+        waiter.until(missing, description="profile menu")
+
+
+def test_login_settled_waits_for_redirect_after_request_finishes():
+    clock = FakeClock()
+    driver = FakeDriver(clock, navigate_at=0.5)
+    waiter = make_waiter(driver, clock)
+    waiter.request_finished_condition = lambda url_part, since: (lambda d: clock.now >= 0.2)
+
+    assert waiter.login_settled(since=0, settle=1.0)
+    assert clock.now < 1.5
+
+
+def test_failed_login_is_reported_without_full_timeout():
+    clock = FakeClock()
+    waiter = make_waiter(FakeDriver(clock), clock)
+    waiter.request_finished_condition = lambda url_part, since: (lambda d: clock.now >= 0.2)
+
+    assert not waiter.login_settled(since=0, timeout=10, settle=1.0)
+    assert clock.now < 2
+
+
+def test_recorder_summarises_waits():
+    clock = FakeClock()
+    recorder = WaitRecorder()
+    waiter = Waiter(FakeDriver(clock, navigate_at=0.2), recorder=recorder, clock=clock, sleep=clock.sleep)
+    waiter.url_contains("chat")
+    waiter.url_contains("nowhere", timeout=1, raise_on_timeout=False)
+
+    assert recorder.summary_lines()[0].startswith("2 waits")
+    assert "1 timed out" in recorder.summary_lines()[0]
+    assert "nowhere" in recorder.report()
+
+
+def test_virtual_clock_installs_advances_and_removes_shim():
+    driver = FakeDriver(FakeClock())
+    clock = VirtualClock(driver).install()
+    clock.advance(60)
+    clock.uninstall()
+
+    assert driver.cdp[0][0] == "Page.addScriptToEvaluateOnNewDocument"
+    assert driver.cdp[-1] == ("Page.removeScriptToEvaluateOnNewDocument", {"identifier": "1"})
+    assert driver.scripts[-1][1] == (60000,)
+    assert clock.advanced == 60
@@ -0,0 +1,97 @@
+# utils/async_client.py
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.stream_decoder import StreamDecoder
+from utils.stream_metrics import StreamTimer
+
+
+class AsyncBotClient:
+    """Concurrent streaming client for the StockSense prompt endpoint"""
+
+    def __init__(self, bot_url, jwt_token, concurrency=8, max_connections_per_host=8,
+                 timeout=None, transport=None, cold_start_threshold=None, cassettes=None):
+        self.bot_url = bot_url
+        self.jwt_token = jwt_token
+        self.concurrency = max(1, int(concurrency))
+        self.max_connections_per_host = max(1, int(max_connections_per_host))
+        self.timeout = timeout
+        self.transport = transport
+        self.cold_start_threshold = cold_start_threshold
+        self.cassettes = cassettes
+        self.cold_starts = set()
+        self.results = {}
+        self.metrics = {}
+        self._host_slots = {}
+
+    def _headers(self):
+        return {
+            "Authorization": f"Bearer {self.jwt_token}",
+            "Content-Type": "application/json"
+        }
+
+    def _host_slot(self, url):
+        # httpx only caps the pool as a whole, so per-host limits are enforced here
+        host = urlsplit(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_slots[host]
+
+    def _make_client(self):
+        limits = httpx.Limits(
+            max_connections=max(self.concurrency, self.max_connections_per_host),
+            max_keepalive_connections=self.max_connections_per_host
+        )
+        return httpx.AsyncClient(limits=limits, timeout=self.timeout, transport=self.transport)
+
+    async def stream_response(self, client, prompt):
+        """Stream one prompt and return the accumulated reply text"""
+        async with self._host_slot(self.bot_url):
+            started = time.perf_counter()
+            timer = StreamTimer()
+            async with client.stream("POST", self.bot_url, headers=self._headers(),
+                                     json={"prompt": prompt}) as response:
+                timer.mark_headers()
+                if (self.cold_start_threshold is not None
+                        and time.perf_counter() - started > self.cold_start_threshold):
+                    self.cold_starts.add(prompt)
+                    timer.metrics.cold_start = True
+                blocks = response.aiter_bytes()
+                if self.cassettes is not None and self.cassettes.mode == "record":
+                    blocks = self.cassettes.arecord(prompt, blocks, started)
+                decoder = StreamDecoder()
+                async for _ in decoder.aiter_chunks(blocks, timer):
+                    pass
+        timer.metrics.malformed_events = decoder.malformed
+        self.metrics[prompt] = timer.finish()
+        return decoder.text.strip()
+
+    async def stream_many(self, prompts):
+        """Stream all prompts concurrently; results keep the input order.
+
+        A prompt that fails yields its exception in place of the text so one
+        bad request does not sink the rest of the batch.
+        """
+        gate = asyncio.Semaphore(self.concurrency)
+
+        async with self._make_client() as client:
+            async def worker(prompt):
+                async with gate:
+                    try:
+                        return await self.stream_response(client, prompt)
+                    except Exception as e:
+                        return e
+
+            return await asyncio.gather(*(worker(p) for p in prompts))
+
+    def run(self, prompts):
+        """Blocking wrapper around stream_many that returns {prompt: text or exception}"""
+        unique = list(dict.fromkeys(prompts))
+        self._host_slots = {}
+        self.metrics = {}
+        results = asyncio.run(self.stream_many(unique))
+        self.results = dict(zip(unique, results))
+        return self.results
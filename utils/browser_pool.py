@@ -0,0 +1,294 @@
+# utils/browser_pool.py
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from urllib.parse import urlsplit
+
+APP_URL = os.environ.get("APP_URL", "https://stock-sense-infodesk.onrender.com/")
+LOGIN_API_URL = os.environ.get("LOGIN_API_URL", "https://stocksense-backend.onrender.com/api/token/")
+DRIVER_PATH_CACHE = os.path.join(".stocksense_cache", "chromedriver_path")
+
+
+def parse_storage_keys(spec):
+    """``"storage_key=field,..."`` as {localStorage key: token response field}"""
+    pairs = (item.split("=", 1) for item in spec.split(",") if item.strip())
+    return {key.strip(): field.strip() for key, field in pairs}
+
+
+# localStorage keys the web app reads its tokens from, mapped to fields of the token response;
+# logged_in_driver falls back to the login form if they don't log the app in
+AUTH_STORAGE_KEYS = parse_storage_keys(os.environ.get("AUTH_STORAGE_KEYS", "access_token=access,refresh_token=refresh"))
+
+_driver_path_lock = threading.Lock()
+_driver_path = None
+
+
+def cached_driver_path(cache_file=DRIVER_PATH_CACHE):
+    """Path to a chromedriver binary, resolved over the network at most once.
+
+    ``CHROMEDRIVER`` wins if set. Otherwise the path webdriver_manager last
+    installed is remembered in ``cache_file`` and reused while the binary is
+    still there, or until start_chrome finds it no longer matches Chrome.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        path = os.environ.get("CHROMEDRIVER")
+        if not path and os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as f:
+                path = f.read().strip()
+        if not path or not os.path.exists(path):
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            if os.path.dirname(cache_file):
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                f.write(path)
+
+        _driver_path = path
+        return path
+
+
+def forget_driver_path(cache_file=DRIVER_PATH_CACHE):
+    """Drop the remembered chromedriver, so the next start resolves one for the installed Chrome"""
+    global _driver_path
+    with _driver_path_lock:
+        _driver_path = None
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+
+
+def chrome_options(headless=False, window_size=(1920, 1080)):
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument(f"--window-size={window_size[0]},{window_size[1]}")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+    return options
+
+
+def start_chrome(headless=False):
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service
+
+    try:
+        return webdriver.Chrome(service=Service(cached_driver_path()), options=chrome_options(headless))
+    except SessionNotCreatedException:
+        if os.environ.get("CHROMEDRIVER"):
+            raise
+        # Most likely Chrome was upgraded past the cached chromedriver; resolve a matching one once
+        forget_driver_path()
+        return webdriver.Chrome(service=Service(cached_driver_path()), options=chrome_options(headless))
+
+
+def reset_browser(driver, origin=APP_URL):
+    """Wipe cookies and storage so the next test starts logged out, without relaunching Chrome"""
+    parts = urlsplit(origin)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    try:
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    except Exception:
+        # Not Chromium: fall back to clearing storage from a page on the app's origin
+        if driver.current_url.startswith(origin):
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+def is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+@dataclass
+class BrowserUsage:
+    """How much of its life one pooled browser spent running tests"""
+    browser: str
+    created: float
+    closed: float = None
+    tests: int = 0
+    busy: float = 0.0
+
+    @property
+    def lifetime(self):
+        return (self.closed or time.monotonic()) - self.created
+
+    @property
+    def utilisation(self):
+        return self.busy / self.lifetime if self.lifetime > 0 else 0.0
+
+    def as_dict(self):
+        data = asdict(self)
+        del data["created"], data["closed"]
+        data.update({"lifetime": self.lifetime, "utilisation": self.utilisation})
+        return data
+
+
+class BrowserPool:
+    """Fixed-size pool of Chrome sessions that are reset between tests instead of relaunched"""
+
+    def __init__(self, size=1, factory=start_chrome, reset=reset_browser, name="main", clock=time.monotonic):
+        self.size = size
+        self.factory = factory
+        self.reset = reset
+        self.name = name
+        self.clock = clock
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.drivers = []
+        self.usage = {}
+        self.retired = []
+        self.in_use = {}
+        self.acquire_wait = 0.0
+
+    def _start(self):
+        driver = self.factory()
+        self.drivers.append(driver)
+        self.usage[id(driver)] = BrowserUsage(f"{self.name}/{len(self.usage) + len(self.retired)}", self.clock())
+        return driver
+
+    def acquire(self, timeout=None):
+        started = self.clock()
+        try:
+            driver = self.idle.get_nowait()
+        except queue.Empty:
+            driver = None
+        if driver is None:
+            with self.lock:
+                if self.created < self.size:
+                    self.created += 1
+                    driver = self._start()
+        if driver is None:
+            driver = self.idle.get(timeout=timeout)
+        now = self.clock()
+        with self.lock:
+            self.acquire_wait += now - started
+            self.in_use[id(driver)] = now
+        return driver
+
+    def release(self, driver):
+        """Reset ``driver`` and put it back, replacing it if the session died"""
+        with self.lock:
+            acquired = self.in_use.pop(id(driver), None)
+            usage = self.usage.get(id(driver))
+            if acquired is not None and usage is not None:
+                usage.busy += self.clock() - acquired
+                usage.tests += 1
+        try:
+            self.reset(driver)
+        except Exception:
+            pass
+        if not is_alive(driver):
+            self._discard(driver)
+            with self.lock:
+                driver = self._start()
+        self.idle.put(driver)
+
+    def _retire(self, driver):
+        usage = self.usage.pop(id(driver), None)
+        if usage is not None:
+            usage.closed = self.clock()
+            self.retired.append(usage)
+
+    def _discard(self, driver):
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+            self._retire(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        with self.lock:
+            drivers, self.drivers = self.drivers, []
+            for driver in drivers:
+                self._retire(driver)
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def usage_rows(self):
+        """Per-browser usage as plain dicts, safe to send from an xdist worker"""
+        with self.lock:
+            usages = self.retired + list(self.usage.values())
+        return [usage.as_dict() for usage in usages]
+
+
+class BrowserUsageReport:
+    """Browser usage gathered from every pool in the run (one per xdist worker)"""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, rows):
+        self.rows.extend(rows)
+
+    def summary_lines(self):
+        lines = [
+            f"{row['browser']}: {row['tests']} tests, busy {row['busy']:.1f}s of {row['lifetime']:.1f}s "
+            f"({row['utilisation']:.0%})"
+            for row in sorted(self.rows, key=lambda r: r["browser"])
+        ]
+        if len(self.rows) > 1:
+            busy = sum(row["busy"] for row in self.rows)
+            lifetime = sum(row["lifetime"] for row in self.rows)
+            lines.append(f"overall: {len(self.rows)} browsers, {busy / lifetime if lifetime else 0:.0%} utilised")
+        return lines
+
+
+def capture_page(driver):
+    """Screenshot PNG and page source of ``driver``; either is None if the browser can't give it"""
+    try:
+        png = driver.get_screenshot_as_png()
+    except Exception:
+        png = None
+    try:
+        html = driver.page_source
+    except Exception:
+        html = None
+    return png, html
+
+
+def fetch_auth_tokens(username, password, url=LOGIN_API_URL, timeout=(10, 60)):
+    """Log in through the API and return the token response"""
+    import requests
+
+    response = requests.post(url, json={"username": username, "password": password}, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def inject_auth(driver, tokens, app_url=APP_URL, storage_keys=None):
+    """Seed the app's localStorage with ``tokens`` so the next page load is already logged in"""
+    storage_keys = storage_keys or AUTH_STORAGE_KEYS
+    driver.get(app_url)
+    for storage_key, field in storage_keys.items():
+        if field in tokens:
+            driver.execute_script("window.localStorage.setItem(arguments[0], arguments[1]);",
+                                  storage_key, tokens[field])
+
+
+def submit_login_form(driver, username, password):
+    """Type the credentials into the open login page and sign in; the caller waits for the outcome"""
+    from selenium.webdriver.common.by import By
+
+    driver.find_element(By.XPATH, "//label[contains(text(), 'Username')]/following-sibling::input").send_keys(username)
+    driver.find_element(By.XPATH, "//label[contains(text(), 'Password')]/following-sibling::input").send_keys(password)
+    driver.find_element(By.XPATH, "//button[@type='submit']").click()
@@ -0,0 +1,142 @@
+# utils/cassettes.py
+import gzip
+import hashlib
+import json
+import os
+import time
+
+from utils.stream_decoder import StreamDecoder
+
+DEFAULT_CASSETTE_DIR = os.path.join(".stocksense_cache", "cassettes")
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteNotFound(LookupError):
+    """Replay was asked for a prompt that has never been recorded"""
+
+
+class CassetteStore:
+    """Record/replay store for raw ``chat_streaming`` event streams.
+
+    Each prompt gets one gzip'd NDJSON file: a header line with the prompt,
+    then one ``[delay, block]`` pair per network read, where ``delay`` is the
+    seconds since the previous read (or since the request was sent). Older
+    cassettes that stored one stream line per entry are still replayed.
+    """
+
+    def __init__(self, directory=DEFAULT_CASSETTE_DIR, mode="record", pace="fast", sleep=time.sleep):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if pace not in ("fast", "recorded"):
+            raise ValueError(f"Unknown replay pace: {pace}")
+        self.directory = directory
+        self.mode = mode
+        self.pace = pace
+        self.sleep = sleep
+
+    @staticmethod
+    def cassette_name(prompt):
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:24] + ".ndjson.gz"
+
+    def path_for(self, prompt):
+        return os.path.join(self.directory, self.cassette_name(prompt))
+
+    def __contains__(self, prompt):
+        return os.path.exists(self.path_for(prompt))
+
+    def save(self, prompt, events):
+        """Write ``events`` as a list of (delay_seconds, raw_block_bytes)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(prompt)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            header = {"prompt": prompt, "recorded_at": time.time(), "format": "blocks", "blocks": len(events)}
+            f.write(json.dumps(header) + "\n")
+            for delay, block in events:
+                # surrogateescape round-trips blocks that split a multi-byte character
+                text = block.decode("utf-8", "surrogateescape")
+                f.write(json.dumps([round(delay, 6), text]) + "\n")
+        # Rename so a crash mid-record never leaves a truncated cassette behind
+        os.replace(tmp_path, path)
+
+    def load(self, prompt):
+        """Return the recorded (delay_seconds, raw_block_bytes) pairs for ``prompt``"""
+        path = self.path_for(prompt)
+        if not os.path.exists(path):
+            raise CassetteNotFound(f"No cassette recorded for prompt: {prompt!r}")
+
+        events = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header["prompt"] != prompt:
+                raise CassetteNotFound(f"Cassette {path} belongs to a different prompt")
+            # Line-format cassettes dropped the newline after every line
+            suffix = b"" if header.get("format") == "blocks" else b"\n"
+            for line in f:
+                delay, text = json.loads(line)
+                events.append((delay, text.encode("utf-8", "surrogateescape") + suffix))
+        return events
+
+    def record(self, prompt, blocks, started=None):
+        """Pass ``blocks`` through unchanged while recording them with their timings"""
+        events = []
+        last = started if started is not None else time.perf_counter()
+        # Only watches for the terminal event; the caller does its own decoding
+        decoder = StreamDecoder()
+        try:
+            for block in blocks:
+                now = time.perf_counter()
+                events.append((now - last, block))
+                last = now
+                decoder.feed(block)
+                yield block
+        except GeneratorExit:
+            # A reader that stopped at the terminal event leaves a complete recording; one that
+            # gave up halfway would replay as a truncated reply
+            if decoder.done:
+                self.save(prompt, events)
+            raise
+        self.save(prompt, events)
+
+    async def arecord(self, prompt, blocks, started=None):
+        """Async counterpart of record for an async iterable of byte blocks"""
+        events = []
+        last = started if started is not None else time.perf_counter()
+        decoder = StreamDecoder()
+        try:
+            async for block in blocks:
+                now = time.perf_counter()
+                events.append((now - last, block))
+                last = now
+                decoder.feed(block)
+                yield block
+        except GeneratorExit:
+            if decoder.done:
+                self.save(prompt, events)
+            raise
+        self.save(prompt, events)
+
+    def replay(self, prompt):
+        """Recorded blocks for ``prompt``, at full speed or at the recorded pace.
+
+        The cassette is loaded up front so a missing one fails here rather than
+        halfway through the caller's loop.
+        """
+        return self._play(self.load(prompt))
+
+    def _play(self, events):
+        for delay, block in events:
+            if self.pace == "recorded" and delay > 0:
+                self.sleep(delay)
+            yield block
+
+    def stream_for(self, prompt, fetch_live):
+        """Raw stream blocks for ``prompt``: replayed, recorded from ``fetch_live()``, or live"""
+        if self.mode == "replay":
+            return self.replay(prompt)
+        started = time.perf_counter()
+        blocks = fetch_live()
+        if self.mode == "record":
+            return self.record(prompt, blocks, started)
+        return blocks
@@ -0,0 +1,132 @@
+# utils/http_session.py
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TotalTimeout(requests.Timeout):
+    """Raised when a streamed response runs past its total time budget"""
+
+
+@dataclass(frozen=True)
+class Timeouts:
+    """Connect/read/total limits in seconds for one request"""
+    connect: float = 10.0
+    read: float = 60.0
+    total: float = 180.0
+
+    def as_requests(self):
+        return (self.connect, self.read)
+
+    def as_httpx(self):
+        import httpx
+        return httpx.Timeout(connect=self.connect, read=self.read, write=self.read, pool=self.connect)
+
+
+@dataclass
+class RequestRecord:
+    """What the session saw for one request"""
+    url: str
+    started_at: float
+    time_to_headers: float
+    status_code: int
+    cold_start: bool
+
+
+@dataclass
+class WarmUpResult:
+    attempts: int
+    elapsed: float
+    warm: bool
+    was_cold: bool
+
+
+class BotSession:
+    """Pooled keep-alive HTTP session shared across a test run.
+
+    Every request goes over the same connection pool, carries real timeouts
+    and is tagged as a cold start when the backend took longer than
+    ``cold_start_threshold`` to send headers.
+    """
+
+    def __init__(self, timeouts=None, pool_maxsize=8, cold_start_threshold=15.0):
+        self.timeouts = timeouts or Timeouts()
+        self.cold_start_threshold = cold_start_threshold
+        self.warm_hosts = set()
+        self.records = []
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def is_warm(self, url):
+        return urlsplit(url).netloc in self.warm_hosts
+
+    def post(self, url, timeouts=None, track_cold_start=True, **kwargs):
+        """POST with the session's timeouts and record whether it hit a cold start"""
+        timeouts = timeouts or self.timeouts
+        started = time.perf_counter()
+        response = self.session.post(url, timeout=timeouts.as_requests(), **kwargs)
+        elapsed = time.perf_counter() - started
+
+        cold = track_cold_start and elapsed > self.cold_start_threshold
+        if not cold:
+            # A quick answer shows the host is awake, with or without warm_up()
+            self.warm_hosts.add(urlsplit(url).netloc)
+        response.cold_start = cold
+        response.deadline = started + timeouts.total
+        self.records.append(RequestRecord(url, started, elapsed, response.status_code, cold))
+        return response
+
+    @staticmethod
+    def iter_bytes(response):
+        """Raw body blocks as they arrive, enforcing the total deadline set by post()"""
+        deadline = getattr(response, "deadline", None)
+        try:
+            for block in response.iter_content(chunk_size=None):
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise TotalTimeout(f"Stream exceeded its total timeout: {response.url}")
+                yield block
+        finally:
+            # Releases the connection, or drops it if the reader stopped early
+            response.close()
+
+    def warm_up(self, url, max_wait=120.0, interval=3.0, hot_threshold=3.0):
+        """Ping ``url`` until it answers quickly, so the first measured prompt is not a cold start.
+
+        Any answer below 500 counts (a GET on the prompt endpoint is usually a 405);
+        the backend is hot once such an answer comes back within ``hot_threshold``.
+        """
+        started = time.perf_counter()
+        attempts = 0
+        was_cold = False
+
+        while True:
+            attempts += 1
+            ping_started = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=(self.timeouts.connect, max_wait))
+                took = time.perf_counter() - ping_started
+                if response.status_code < 500 and took <= hot_threshold:
+                    self.warm_hosts.add(urlsplit(url).netloc)
+                    break
+            except requests.RequestException:
+                pass
+            was_cold = True
+
+            if time.perf_counter() - started + interval > max_wait:
+                break
+            time.sleep(interval)
+
+        return WarmUpResult(attempts, time.perf_counter() - started, self.is_warm(url), was_cold)
+
+    @property
+    def cold_start_count(self):
+        return sum(1 for r in self.records if r.cold_start)
+
+    def close(self):
+        self.session.close()
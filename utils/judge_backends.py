@@ -0,0 +1,350 @@
+# utils/judge_backends.py
+"""Interchangeable judge backends, and a judge that hedges and fails over across them.
+
+Every backend takes LangChain-style messages and returns something with
+``content`` and ``response_metadata["token_usage"]``, so JudgeScheduler
+can drive a single backend or a HedgedJudge over several.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from utils.judge_scheduler import (DEFAULT_OUTPUT_TOKENS, GROQ_RATE_LIMITS, TokenBucket, estimate_tokens,
+                                   retry_after_seconds, worker_share)
+from utils.stream_metrics import percentile
+
+# A local model has no server-side quota; this only keeps a runaway loop in check
+LOCAL_RATE_LIMITS = (600, 10_000_000)
+
+# LangChain message types to chat API roles
+ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def chat_message(message):
+    """A LangChain message or a (type, content) tuple as a chat API message"""
+    if isinstance(message, tuple):
+        kind, content = message
+    else:
+        kind, content = getattr(message, "type", "human"), message.content
+    return {"role": ROLES.get(kind, "user"), "content": content}
+
+
+@dataclass
+class JudgeResponse:
+    content: str
+    response_metadata: dict = field(default_factory=dict)
+
+
+class JudgeBackend:
+    """One judge model; subclasses implement ``invoke(messages, **kwargs)``"""
+    name = "judge"
+    model_name = ""
+    rate_limits = LOCAL_RATE_LIMITS
+
+    def invoke(self, messages, **kwargs):
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load the model before the first measured call; returns seconds spent"""
+        return 0.0
+
+
+class GroqBackend(JudgeBackend):
+    name = "groq"
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.model_name = getattr(llm, "model_name", "")
+        self.rate_limits = GROQ_RATE_LIMITS.get(self.model_name, LOCAL_RATE_LIMITS)
+
+    @classmethod
+    def create(cls, model="llama3-8b-8192", api_key=None):
+        from langchain_groq import ChatGroq
+
+        return cls(ChatGroq(
+            model=model,
+            groq_api_key=api_key or os.environ.get("GROQ_API_KEY"),
+            max_retries=0  # the scheduler retries on 429 and honours Retry-After
+        ))
+
+    def invoke(self, messages, **kwargs):
+        return self.llm.invoke(messages, **kwargs)
+
+
+class OllamaBackend(JudgeBackend):
+    """Local Ollama chat model, kept loaded between calls with ``keep_alive``"""
+    name = "ollama"
+
+    def __init__(self, model="mistral", url="http://localhost:11434", keep_alive="30m", session=None, timeouts=None):
+        from utils.http_session import BotSession, Timeouts
+
+        self.model_name = model
+        self.url = url.rstrip("/")
+        # Also accept the chat endpoint itself, which OLLAMA_URL used to hold
+        if self.url.endswith("/api/chat"):
+            self.url = self.url[:-len("/api/chat")]
+        self.keep_alive = keep_alive
+        self.session = session or BotSession()
+        self.timeouts = timeouts or Timeouts(connect=5.0, read=120.0, total=180.0)
+
+    def _post(self, path, payload):
+        response = self.session.post(self.url + path, timeouts=self.timeouts, track_cold_start=False, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def invoke(self, messages, response_format=None, max_tokens=None):
+        payload = {
+            "model": self.model_name,
+            "messages": [chat_message(m) for m in messages],
+            "stream": False,
+            "keep_alive": self.keep_alive,
+        }
+        if response_format and response_format.get("type") == "json_object":
+            payload["format"] = "json"
+        if max_tokens:
+            payload["options"] = {"num_predict": max_tokens}
+
+        data = self._post("/api/chat", payload)
+        prompt_tokens = data.get("prompt_eval_count", 0)
+        output_tokens = data.get("eval_count", 0)
+        return JudgeResponse(data["message"]["content"], {
+            "token_usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+            },
+            # Nanoseconds spent loading the model; near zero once it is resident
+            "load_duration": data.get("load_duration", 0) / 1e9,
+        })
+
+    def warm_up(self):
+        """Load the model with an empty request and keep it resident for ``keep_alive``"""
+        started = time.perf_counter()
+        self._post("/api/generate", {"model": self.model_name, "keep_alive": self.keep_alive})
+        return time.perf_counter() - started
+
+
+def create_backend(name, groq_model="llama3-8b-8192", ollama_model="mistral", ollama_url="http://localhost:11434",
+                   keep_alive="30m"):
+    if name == "groq":
+        return GroqBackend.create(groq_model)
+    if name == "ollama":
+        return OllamaBackend(ollama_model, ollama_url, keep_alive)
+    raise ValueError(f"Unknown judge backend {name!r}; expected groq or ollama")
+
+
+@dataclass
+class BackendHealth:
+    latencies: deque
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    unhealthy_until: float = 0.0
+    answered: int = 0
+    warm_up: float = None
+    requests: TokenBucket = None
+    tokens: TokenBucket = None
+    rate_limited: int = 0
+    paused_until: float = 0.0
+
+
+class HedgedJudge:
+    """Sends each call to the first healthy backend and hedges to the next when it is slow.
+
+    If the backend has not answered within the ``hedge_percentile`` of its
+    recent latencies, the same request also goes to the next healthy backend
+    and the first answer wins. A failed call moves straight on to the next
+    backend, and one that fails ``failure_threshold`` times in a row is
+    skipped for ``cooldown`` seconds.
+
+    Each backend is paced to its own ``rate_limits`` before a request goes
+    to it, and the hedge timer starts once the primary's request is sent;
+    the time spent waiting for slots is returned as ``queue_wait`` in the
+    response metadata. A 429 is not a failure: the backend is held back for its
+    Retry-After and the call moves on to the next one, or waits the pause
+    out when every backend is rate limited (up to ``max_retries`` times).
+    With ``workers`` processes sharing the quotas, each gets its share.
+    """
+
+    def __init__(self, backends, hedge_percentile=95, min_samples=5, initial_hedge_delay=10.0, window=50,
+                 failure_threshold=3, cooldown=60.0, max_workers=8, max_retries=3, workers=1,
+                 clock=time.monotonic, sleep=time.sleep):
+        if not backends:
+            raise ValueError("HedgedJudge needs at least one backend")
+        self.backends = list(backends)
+        self.model_name = "|".join(f"{b.name}:{b.model_name}" for b in self.backends)
+        # Each backend is paced to its own quota; the scheduler in front only caps the total at the
+        # largest of them, so it never holds back a call that the backend taking it could make
+        self.rate_limits = tuple(map(max, zip(*(b.rate_limits for b in self.backends))))
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.initial_hedge_delay = initial_hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self.health = {}
+        for backend in self.backends:
+            rpm, tpm = worker_share(backend.rate_limits, workers)
+            self.health[backend.name] = BackendHealth(
+                deque(maxlen=window),
+                requests=TokenBucket(rpm, rpm / 60.0, clock),
+                tokens=TokenBucket(tpm, tpm / 60.0, clock)
+            )
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="judge-backend")
+
+    def warm_up(self):
+        """Warm every backend; one that can't be reached starts out skipped"""
+        for backend in self.backends:
+            try:
+                self.health[backend.name].warm_up = backend.warm_up()
+            except Exception:
+                self._record(backend, None, force_unhealthy=True)
+
+    def hedge_delay(self, backend):
+        latencies = self.health[backend.name].latencies
+        if len(latencies) < self.min_samples:
+            return self.initial_hedge_delay
+        return percentile(latencies, self.hedge_percentile)
+
+    def available(self):
+        now = self.clock()
+        healthy = [b for b in self.backends if self._due_back(b) <= now]
+        # All of them are down or rate limited: try the one due back first rather than fail outright
+        return healthy or [min(self.backends, key=self._due_back)]
+
+    def _due_back(self, backend):
+        health = self.health[backend.name]
+        return max(health.unhealthy_until, health.paused_until)
+
+    def _record(self, backend, latency, force_unhealthy=False, retry_after=None):
+        with self.lock:
+            health = self.health[backend.name]
+            health.calls += 1
+            if retry_after is not None:
+                # Rate limited, not broken: hold it back without counting a failure
+                health.rate_limited += 1
+                health.paused_until = max(health.paused_until, self.clock() + retry_after)
+            elif latency is None:
+                health.failures += 1
+                health.consecutive_failures += 1
+                if force_unhealthy or health.consecutive_failures >= self.failure_threshold:
+                    health.unhealthy_until = self.clock() + self.cooldown
+            else:
+                health.consecutive_failures = 0
+                health.unhealthy_until = 0.0
+                health.latencies.append(latency)
+
+    def _wait_for_slot(self, backend, estimated):
+        health = self.health[backend.name]
+        wait = max(health.requests.reserve(1), health.tokens.reserve(estimated))
+        wait = max(wait, health.paused_until - self.clock())
+        if wait > 0:
+            self.sleep(wait)
+        return max(wait, 0.0)
+
+    def _call(self, backend, messages, kwargs, estimated):
+        started = self.clock()
+        try:
+            response = backend.invoke(messages, **kwargs)
+        except Exception as e:
+            self._record(backend, None, retry_after=retry_after_seconds(e))
+            raise
+        self._record(backend, self.clock() - started)
+        metadata = getattr(response, "response_metadata", None)
+        if isinstance(metadata, dict):
+            metadata["judge_backend"] = backend.name
+            usage = metadata.get("token_usage", {})
+            self.health[backend.name].tokens.adjust(estimated - usage.get("total_tokens", estimated))
+        return response
+
+    def invoke(self, messages, **kwargs):
+        estimated = estimate_tokens(messages, kwargs.get("max_tokens") or DEFAULT_OUTPUT_TOKENS)
+        queue = self.available()
+        primary = queue[0]
+        running = {}
+        errors = []
+        rate_limited = []
+        retries = 0
+        hedged = False
+        queue_wait = 0.0
+
+        def launch():
+            nonlocal queue_wait
+            backend = queue.pop(0)
+            # Wait for the backend's slot here, so neither model latency nor the hedge timer includes it
+            queue_wait += self._wait_for_slot(backend, estimated)
+            running[self.executor.submit(self._call, backend, messages, kwargs, estimated)] = backend
+
+        launch()
+        while running:
+            timeout = self.hedge_delay(primary) if queue and not hedged else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than usual: ask the next backend as well
+                hedged = True
+                with self.lock:
+                    self.hedges += 1
+                launch()
+                continue
+
+            for future in done:
+                backend = running.pop(future)
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    if retry_after_seconds(future.exception()) is not None:
+                        rate_limited.append(backend)
+                    continue
+                with self.lock:
+                    self.health[backend.name].answered += 1
+                    if backend is not primary:
+                        if hedged:
+                            self.hedge_wins += 1
+                        else:
+                            self.failovers += 1
+                response = future.result()
+                metadata = getattr(response, "response_metadata", None)
+                if isinstance(metadata, dict):
+                    metadata["queue_wait"] = queue_wait
+                return response
+
+            if not running and not queue and rate_limited and retries < self.max_retries:
+                # Every backend is rate limited: wait out the Retry-After that ends first
+                retries += 1
+                queue.append(min(rate_limited, key=self._due_back))
+                rate_limited.clear()
+            if not running and queue:
+                launch()
+        # Re-raise the first error (normally the primary's) so the scheduler still sees 429s
+        raise errors[0]
+
+    def summary_lines(self):
+        now = self.clock()
+        lines = []
+        for backend in self.backends:
+            health = self.health[backend.name]
+            line = f"{backend.name} ({backend.model_name}): {health.calls} calls, {health.answered} answers, " \
+                   f"{health.failures} failures"
+            if health.rate_limited:
+                line += f", {health.rate_limited} rate limited"
+            if health.latencies:
+                line += f", p50 {percentile(health.latencies, 50):.2f}s, " \
+                        f"p{self.hedge_percentile:g} {percentile(health.latencies, self.hedge_percentile):.2f}s"
+            if health.warm_up is not None:
+                line += f", warm-up {health.warm_up:.1f}s"
+            if health.unhealthy_until > now:
+                line += f", skipped for another {health.unhealthy_until - now:.0f}s"
+            lines.append(line)
+        lines.append(f"hedged calls: {self.hedges} (hedge answered first: {self.hedge_wins}), failovers: {self.failovers}")
+        return lines
+
+    def close(self):
+        self.executor.shutdown(wait=False)
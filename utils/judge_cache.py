@@ -0,0 +1,123 @@
+# utils/judge_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(".stocksense_cache", "judge_verdicts.sqlite3")
+
+
+class JudgeCache:
+    """Content-addressed on-disk cache of judge verdicts.
+
+    Entries are keyed by a hash of everything that can change a verdict: the
+    prompt, the cleaned reply, the judge model and the judge system prompt.
+    Old entries are dropped by age, then least-recently-used ones by count.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=20000, max_age_days=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.entries = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " verdict TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.evict()
+
+    @staticmethod
+    def make_key(prompt, response, model, system_prompt):
+        digest = hashlib.sha256()
+        for part in (prompt, response, model, system_prompt):
+            data = part.encode("utf-8")
+            # Length-prefix each part so different splits never collide
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT verdict, created FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE verdicts SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, verdict, model):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, model, verdict, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, model, verdict, now, now)
+            )
+            self.conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        with self.lock:
+            self.conn.execute("DELETE FROM verdicts WHERE created < ?", (time.time() - self.max_age,))
+            self.conn.execute(
+                "DELETE FROM verdicts WHERE key IN ("
+                " SELECT key FROM verdicts ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+            self.entries = self.conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def usage(self):
+        """Hit and miss counts, for an xdist worker to hand to the controller"""
+        return {"hits": self.hits, "misses": self.misses, "entries": self.entries, "path": self.path}
+
+    def summary_lines(self):
+        return cache_summary_lines(self.hits, self.misses, self.entries, self.path)
+
+    def close(self):
+        self.evict()
+        self.conn.close()
+
+
+class CacheUsage:
+    """Judge cache hits and misses of every xdist worker, added up on the controller"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.entries = 0
+        self.path = None
+
+    def add(self, usage):
+        self.hits += usage["hits"]
+        self.misses += usage["misses"]
+        # The workers share one cache file; the last to close saw the most entries
+        self.entries = max(self.entries, usage["entries"])
+        self.path = usage["path"]
+
+    def summary_lines(self):
+        return cache_summary_lines(self.hits, self.misses, self.entries, self.path)
+
+
+def cache_summary_lines(hits, misses, entries, path):
+    lookups = hits + misses
+    rate = hits / lookups if lookups else 0.0
+    return [f"judge cache: {hits} hits, {misses} misses ({rate:.0%} hit rate), {entries} entries in {path}"]
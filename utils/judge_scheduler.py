@@ -0,0 +1,198 @@
+# utils/judge_scheduler.py
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+# (requests per minute, tokens per minute) on the Groq free tier
+GROQ_RATE_LIMITS = {
+    "llama3-8b-8192": (30, 30000),
+}
+
+# Room left for the judge's reply when estimating a request's token cost
+DEFAULT_OUTPUT_TOKENS = 512
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations instead of blocking.
+
+    The balance may go negative: each caller reserves what it needs and is told
+    how long to wait, which keeps callers in FIFO order without a condition variable.
+    """
+
+    def __init__(self, capacity, per_second, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.per_second = float(per_second)
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def reserve(self, amount=1.0):
+        """Take ``amount`` tokens and return how many seconds to wait before using them"""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.per_second
+
+    def adjust(self, amount):
+        """Give back (positive) or charge (negative) tokens after the real cost is known"""
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+@dataclass
+class JudgeCall:
+    """One judge request with its queue wait kept apart from model latency"""
+    content: str
+    queue_wait: float = 0.0
+    model_latency: float = 0.0
+    retries: int = 0
+    tokens: int = 0
+    output_tokens: int = 0
+    cached: bool = False
+    mode: str = "verbose"
+    backend: str = ""
+
+
+@dataclass
+class ModeStats:
+    """Output tokens and model latency of one judge mode (verbose, fast, explain)"""
+    calls: int = 0
+    output_tokens: int = 0
+    model_latency: float = 0.0
+
+
+@dataclass
+class JudgeStats:
+    calls: int = 0
+    rate_limited: int = 0
+    queue_wait: float = 0.0
+    model_latency: float = 0.0
+    tokens: int = 0
+    history: list = field(default_factory=list)
+    modes: dict = field(default_factory=dict)
+
+    def summary_lines(self):
+        if not self.calls:
+            return ["judge calls: 0"]
+        lines = [
+            f"judge calls: {self.calls} (429 retries: {self.rate_limited})",
+            f"queue wait: total {self.queue_wait:.1f}s, mean {self.queue_wait / self.calls:.2f}s",
+            f"model latency: total {self.model_latency:.1f}s, mean {self.model_latency / self.calls:.2f}s",
+            f"tokens: {self.tokens}",
+        ]
+        for mode, stats in sorted(self.modes.items()):
+            lines.append(
+                f"{mode}: {stats.calls} calls, mean {stats.output_tokens / stats.calls:.0f} output tokens, "
+                f"mean latency {stats.model_latency / stats.calls:.2f}s"
+            )
+        return lines
+
+
+def retry_after_seconds(exc):
+    """Seconds to back off from a 429 error, or None if it is not one"""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    if value is None:
+        return 1.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 1.0
+
+
+def worker_share(limits, workers=1):
+    """(rpm, tpm) for one of ``workers`` processes drawing on the same quota"""
+    return tuple(max(1, limit // workers) for limit in limits)
+
+
+def estimate_tokens(messages, output_tokens=DEFAULT_OUTPUT_TOKENS):
+    # Roughly four characters per token for English text
+    chars = sum(len(getattr(m, "content", "")) for m in messages)
+    return chars // 4 + output_tokens
+
+
+class JudgeScheduler:
+    """Shares one judge client across a run and paces calls to its RPM/TPM budget"""
+
+    def __init__(self, llm, rpm, tpm, max_retries=3, clock=time.monotonic, sleep=time.sleep):
+        self.llm = llm
+        self.model = getattr(llm, "model_name", "")
+        self.requests = TokenBucket(rpm, rpm / 60.0, clock)
+        self.tokens = TokenBucket(tpm, tpm / 60.0, clock)
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = JudgeStats()
+        self.stats_lock = threading.Lock()
+        self.paused_until = 0.0
+
+    def _wait_for_slot(self, estimated):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated))
+        # A Retry-After from any caller holds back everyone
+        wait = max(wait, self.paused_until - self.clock())
+        if wait > 0:
+            self.sleep(wait)
+        return max(wait, 0.0)
+
+    def invoke(self, messages, mode="verbose", output_tokens=DEFAULT_OUTPUT_TOKENS, **kwargs):
+        """Call the judge once a slot is free; ``kwargs`` go to the model (max_tokens, response_format)"""
+        estimated = estimate_tokens(messages, output_tokens)
+        call = JudgeCall(content="", mode=mode)
+
+        while True:
+            call.queue_wait += self._wait_for_slot(estimated)
+            started = self.clock()
+            try:
+                response = self.llm.invoke(messages, **kwargs)
+            except Exception as e:
+                backoff = retry_after_seconds(e)
+                if backoff is None or call.retries >= self.max_retries:
+                    raise
+                call.retries += 1
+                self.paused_until = max(self.paused_until, self.clock() + backoff)
+                continue
+            call.model_latency = self.clock() - started
+            break
+
+        call.content = response.content
+        metadata = getattr(response, "response_metadata", None) or {}
+        usage = metadata.get("token_usage", {})
+        call.backend = metadata.get("judge_backend", "")
+        # A HedgedJudge paces its backends itself; that wait is queueing, not model time
+        backend_wait = metadata.get("queue_wait", 0.0)
+        call.queue_wait += backend_wait
+        call.model_latency -= backend_wait
+        call.tokens = usage.get("total_tokens", estimated)
+        call.output_tokens = usage.get("completion_tokens", len(call.content) // 4)
+        self.tokens.adjust(estimated - call.tokens)
+
+        with self.stats_lock:
+            self.stats.calls += 1
+            self.stats.rate_limited += call.retries
+            self.stats.queue_wait += call.queue_wait
+            self.stats.model_latency += call.model_latency
+            self.stats.tokens += call.tokens
+            self.stats.history.append(call)
+            mode_stats = self.stats.modes.setdefault(mode, ModeStats())
+            mode_stats.calls += 1
+            mode_stats.output_tokens += call.output_tokens
+            mode_stats.model_latency += call.model_latency
+        return call
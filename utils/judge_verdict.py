@@ -0,0 +1,114 @@
+# utils/judge_verdict.py
+import json
+import re
+from dataclasses import asdict, dataclass
+
+# Points available per category; the total is their sum (0-10)
+VERDICT_CATEGORIES = {"accuracy": 3, "clarity": 3, "helpfulness": 4}
+
+FAST_SYSTEM_PROMPT = """You are a financial expert scoring answers given by a financial chatbot named StockSense.
+
+Score the reply in three categories:
+- accuracy (0-3): is the information correct and are the concepts explained reasonably?
+- clarity (0-3): is it clear and easy to follow, with terms explained simply?
+- helpfulness (0-4): does it answer the question and is it useful or educational?
+
+Reply with one JSON object and nothing else, using whole numbers:
+{"accuracy": 0, "clarity": 0, "helpfulness": 0, "total": 0}
+where total is the sum of the three scores.
+"""
+
+EXPLAIN_SYSTEM_PROMPT = """You are a friendly financial expert reviewing answers given by a financial chatbot named StockSense.
+
+The reply has already been scored (accuracy 0-3, clarity 0-3, helpfulness 0-4):
+{verdict}
+
+Do not score it again. In a few sentences, explain where it lost points, quote 1-2 parts of the reply \
+that show what worked or what needs improvement, and say what would raise the score.
+"""
+
+# Request options for fast verdicts: JSON mode and a small output budget
+FAST_OUTPUT_TOKENS = 48
+FAST_REQUEST = {"response_format": {"type": "json_object"}, "max_tokens": FAST_OUTPUT_TOKENS}
+
+_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+_TOTAL_SCORE = re.compile(r"\bTOTAL SCORE[:\s*]*(10|[0-9])\s*/\s*10\b", re.IGNORECASE)
+# The stricter "TOTAL SCORE: x/10" line the prompt tests score verbose reviews by
+_REVIEW_SCORE = re.compile(r"\bTOTAL SCORE[:\s]*([1-9]|10)/10\b", re.IGNORECASE)
+
+
+class VerdictError(ValueError):
+    """The judge's fast verdict did not match the schema"""
+
+
+@dataclass
+class Verdict:
+    accuracy: int
+    clarity: int
+    helpfulness: int
+    total: int
+
+    def as_dict(self):
+        return asdict(self)
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+
+def parse_verdict(text):
+    """Validate a fast verdict: every category present, whole, in range, and a matching total"""
+    match = _OBJECT.search(text)
+    if match is None:
+        raise VerdictError("no JSON object in the judge's reply")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise VerdictError(f"invalid JSON from the judge: {e}") from e
+    if not isinstance(data, dict):
+        raise VerdictError("the judge's verdict is not a JSON object")
+
+    scores = {}
+    for name, top in {**VERDICT_CATEGORIES, "total": sum(VERDICT_CATEGORIES.values())}.items():
+        value = data.get(name)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= top:
+            raise VerdictError(f"{name} must be a whole number from 0 to {top}, got {value!r}")
+        scores[name] = value
+    if scores["total"] != sum(scores[name] for name in VERDICT_CATEGORIES):
+        raise VerdictError(f"total {scores['total']} is not the sum of the category scores")
+    return Verdict(**scores)
+
+
+def needs_explanation(total, min_score, margin=1):
+    """Failing or borderline scores (within ``margin`` of passing) get a written explanation"""
+    return total < min_score + margin
+
+
+def extract_score(text):
+    """Total score of a fast JSON verdict or a "TOTAL SCORE: x/10" line, or None"""
+    try:
+        return parse_verdict(text).total
+    except VerdictError:
+        pass
+    match = _TOTAL_SCORE.search(text)
+    return int(match.group(1)) if match else None
+
+
+def review_score(text):
+    """Score of a verbose review's "TOTAL SCORE: x/10" line, or 0 without one"""
+    match = _REVIEW_SCORE.search(text)
+    return int(match.group(1)) if match else 0
+
+
+def worth_caching(text, mode="verbose"):
+    """Whether a judge reply may go into the verdict cache: only ones that parse, so a bad one isn't replayed"""
+    if mode == "fast":
+        try:
+            parse_verdict(text)
+        except VerdictError:
+            return False
+        return True
+    if mode == "explain":
+        return bool(text.strip())
+    return extract_score(text) is not None
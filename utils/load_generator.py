@@ -0,0 +1,421 @@
+# utils/load_generator.py
+"""Drive the test_prompts corpora against a StockSense endpoint under load.
+
+Usage::
+
+    python -m utils.load_generator --stages 30s:1,60s:5,30s:5 --mix tutor=2,live=1
+    python -m utils.load_generator --mode concurrency --stages 20s:10,60s:10 --url http://127.0.0.1:8000/api/prompt/
+
+Each stage is ``duration:target``; the target (requests per second, or
+concurrent users with ``--mode concurrency``) ramps linearly from the
+previous stage's target over the stage's duration. Rate mode is open-loop:
+arrivals are scheduled on the clock and never wait for earlier replies.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from utils.prompt_corpus import CATEGORY_FILES, DATA_DIR, PromptCorpus
+from utils.stream_decoder import StreamDecoder
+from utils.stream_metrics import StreamTimer
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies, about 1% relative precision.
+
+    Values are stored as whole microseconds: exactly below 256us, then in
+    128 linear sub-buckets per power of two, so memory stays small no matter
+    how many samples are recorded.
+    """
+
+    SUB_BITS = 8
+    SUB = 1 << SUB_BITS
+    HALF = SUB >> 1
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        if value < self.SUB:
+            return value
+        shift = value.bit_length() - self.SUB_BITS
+        return self.SUB + (shift - 1) * self.HALF + ((value >> shift) - self.HALF)
+
+    def _highest_equivalent(self, index):
+        if index < self.SUB:
+            return index
+        shift = (index - self.SUB) // self.HALF + 1
+        sub = (index - self.SUB) % self.HALF + self.HALF
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds):
+        micros = max(0, int(round(seconds * 1e6)))
+        index = self._index(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        """Value at percentile ``q`` in seconds, or None when empty"""
+        if not self.count:
+            return None
+        target = max(1, math.ceil(q / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "min": self.min,
+            "mean": self.total / self.count if self.count else None,
+            **{f"p{q:g}": self.percentile(q) for q in (50, 90, 95, 99, 99.9)},
+            "max": self.max,
+        }
+
+
+@dataclass
+class LoadStage:
+    duration: float
+    target: float
+
+
+def parse_duration(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)(ms|s|m)?", text.strip())
+    if not match:
+        raise ValueError(f"Bad duration: {text!r}")
+    value, unit = float(match.group(1)), match.group(2) or "s"
+    return value * {"ms": 0.001, "s": 1, "m": 60}[unit]
+
+
+def parse_stages(spec):
+    """Parse ``"30s:2,1m:5"`` into LoadStages"""
+    stages = []
+    for part in spec.split(","):
+        duration, _, target = part.partition(":")
+        if not target:
+            raise ValueError(f"Stage needs duration:target, got {part!r}")
+        stages.append(LoadStage(parse_duration(duration), float(target)))
+    return stages
+
+
+def parse_mix(spec):
+    """Parse ``"tutor=2,live=1"`` into category weights"""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in CATEGORY_FILES:
+            raise ValueError(f"Unknown category {name!r}, expected one of {', '.join(CATEGORY_FILES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def target_at(stages, elapsed):
+    """Ramped target at ``elapsed`` seconds, or None once all stages are over"""
+    previous = 0.0
+    for stage in stages:
+        if elapsed < stage.duration:
+            return previous + (stage.target - previous) * (elapsed / stage.duration)
+        elapsed -= stage.duration
+        previous = stage.target
+    return None
+
+
+def load_corpus(data_dir=DATA_DIR, categories=CATEGORY_FILES):
+    corpus = PromptCorpus(data_dir, files=list(categories.values())).by_category()
+    return {name: corpus.get(name, []) for name in categories}
+
+
+class PromptMix:
+    """Weighted random choice of a category, then of a prompt within it"""
+
+    def __init__(self, corpus, weights=None, seed=None):
+        weights = weights or {name: 1.0 for name in corpus}
+        self.categories = [name for name in weights if weights[name] > 0 and corpus.get(name)]
+        if not self.categories:
+            raise ValueError("Prompt mix selects no prompts")
+        self.weights = [weights[name] for name in self.categories]
+        self.corpus = corpus
+        self.rng = random.Random(seed)
+
+    def choose(self):
+        category = self.rng.choices(self.categories, self.weights)[0]
+        return category, self.rng.choice(self.corpus[category])
+
+
+@dataclass
+class RequestResult:
+    category: str
+    ok: bool
+    status: int = None
+    error: str = None
+    ttfb: float = None
+    ttft: float = None
+    total: float = None
+    chunks: int = 0
+
+
+class LoadReport:
+    """Throughput, error counts and latency histograms for a load run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.sent = 0
+        self.dropped = 0
+        self.ok = 0
+        self.errors = {}
+        self.ttft = {}
+        self.total = {}
+
+    def record(self, result):
+        if result.ok:
+            self.ok += 1
+            for histograms, value in ((self.ttft, result.ttft), (self.total, result.total)):
+                if value is not None:
+                    histograms.setdefault(result.category, LatencyHistogram()).record(value)
+        else:
+            self.errors[result.error] = self.errors.get(result.error, 0) + 1
+
+    @staticmethod
+    def _overall(histograms):
+        merged = LatencyHistogram()
+        for histogram in histograms.values():
+            merged.merge(histogram)
+        return merged
+
+    def summary(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        failed = sum(self.errors.values())
+        done = self.ok + failed
+        return {
+            "elapsed": elapsed,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "completed": self.ok,
+            "failed": failed,
+            "throughput_rps": self.ok / elapsed if elapsed else 0.0,
+            "error_rate": failed / done if done else 0.0,
+            "errors": dict(self.errors),
+            "ttft": {"all": self._overall(self.ttft).summary(),
+                     **{c: h.summary() for c, h in sorted(self.ttft.items())}},
+            "total": {"all": self._overall(self.total).summary(),
+                      **{c: h.summary() for c, h in sorted(self.total.items())}},
+        }
+
+    def summary_lines(self):
+        summary = self.summary()
+        lines = [
+            f"elapsed {summary['elapsed']:.1f}s, sent {summary['sent']}, dropped {summary['dropped']}, "
+            f"completed {summary['completed']}, failed {summary['failed']}",
+            f"throughput {summary['throughput_rps']:.2f} req/s, error rate {summary['error_rate']:.1%}",
+        ]
+        for error, count in sorted(summary["errors"].items()):
+            lines.append(f"  error {error}: {count}")
+        for metric in ("ttft", "total"):
+            lines.append(f"{metric} (seconds)      count     p50     p90     p95     p99   p99.9     max")
+            for name, stats in summary[metric].items():
+                if not stats["count"]:
+                    continue
+                values = " ".join(f"{stats[k]:7.3f}" for k in ("p50", "p90", "p95", "p99", "p99.9", "max"))
+                lines.append(f"  {name:<14} {stats['count']:>7} {values}")
+        return lines
+
+
+class LoadGenerator:
+    """Replays the prompt mix against ``url`` following the load stages"""
+
+    def __init__(self, url, token, mix, stages, mode="rate", arrivals="poisson",
+                 max_in_flight=256, timeout=None, transport=None, seed=None):
+        if mode not in ("rate", "concurrency"):
+            raise ValueError(f"Unknown mode: {mode}")
+        if arrivals not in ("poisson", "uniform"):
+            raise ValueError(f"Unknown arrival process: {arrivals}")
+        self.url = url
+        self.token = token
+        self.mix = mix
+        self.stages = stages
+        self.mode = mode
+        self.arrivals = arrivals
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.transport = transport
+        self.rng = random.Random(seed)
+        self.report = None
+
+    async def _send(self, client, category, prompt):
+        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+        timer = StreamTimer()
+        result = RequestResult(category, ok=False)
+        try:
+            async with client.stream("POST", self.url, headers=headers, json={"prompt": prompt}) as response:
+                timer.mark_headers()
+                result.status = response.status_code
+                if response.status_code >= 400:
+                    result.error = f"HTTP {response.status_code}"
+                    return result
+                decoder = StreamDecoder()
+                async for _ in decoder.aiter_chunks(response.aiter_bytes(), timer):
+                    pass
+            metrics = timer.finish()
+            result.ok = True
+            result.ttfb, result.ttft, result.total = metrics.ttfb, metrics.ttfc, metrics.total
+            result.chunks = metrics.chunk_count
+        except httpx.HTTPError as e:
+            result.error = type(e).__name__
+        return result
+
+    def _next_arrival(self, elapsed, step=0.001):
+        """Time of the next arrival after ``elapsed``, or None past the last stage.
+
+        Integrates the ramped rate until one expected arrival (uniform) or an
+        Exp(1) amount of them (Poisson, by time rescaling) has accumulated, so
+        ramps that start from zero behave.
+        """
+        need = self.rng.expovariate(1.0) if self.arrivals == "poisson" else 1.0
+        accumulated = 0.0
+        while accumulated < need:
+            rate = target_at(self.stages, elapsed)
+            if rate is None:
+                return None
+            accumulated += rate * step
+            elapsed += step
+        return elapsed
+
+    async def _run_rate(self, client, report, in_flight, started):
+        loop = asyncio.get_running_loop()
+        elapsed = 0.0
+        while True:
+            elapsed = self._next_arrival(elapsed)
+            if elapsed is None:
+                break
+            delay = started + elapsed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= self.max_in_flight:
+                # Open loop: never delay an arrival, count it as dropped instead
+                report.dropped += 1
+                continue
+            self._launch(client, report, in_flight)
+
+    async def _run_concurrency(self, client, report, started):
+        loop = asyncio.get_running_loop()
+        users = []
+
+        async def user(number):
+            while True:
+                target = target_at(self.stages, loop.time() - started)
+                if target is None or number >= math.ceil(target):
+                    return
+                category, prompt = self.mix.choose()
+                report.sent += 1
+                report.record(await self._send(client, category, prompt))
+
+        while True:
+            target = target_at(self.stages, loop.time() - started)
+            if target is None:
+                break
+            # Users above the target retire on their own; refill any slot below it
+            for number in range(math.ceil(target)):
+                if number >= len(users):
+                    users.append(asyncio.create_task(user(number)))
+                elif users[number].done():
+                    users[number] = asyncio.create_task(user(number))
+            await asyncio.sleep(0.05)
+        await asyncio.gather(*users)
+
+    def _launch(self, client, report, in_flight):
+        category, prompt = self.mix.choose()
+        report.sent += 1
+
+        async def one():
+            report.record(await self._send(client, category, prompt))
+
+        task = asyncio.create_task(one())
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    async def run(self):
+        report = LoadReport()
+        self.report = report
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout, transport=self.transport) as client:
+            started = asyncio.get_running_loop().time()
+            if self.mode == "rate":
+                in_flight = set()
+                await self._run_rate(client, report, in_flight, started)
+                if in_flight:
+                    await asyncio.gather(*in_flight)
+            else:
+                await self._run_concurrency(client, report, started)
+        report.finished = time.perf_counter()
+        return report
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
+    parser = argparse.ArgumentParser(description="Load-test a StockSense endpoint with the prompt corpora")
+    parser.add_argument("--url", default=os.environ.get("BOT_URL", "https://stocksense-backend.onrender.com/api/prompt/"))
+    parser.add_argument("--token", default=os.environ.get("JWT_TOKEN", ""))
+    parser.add_argument("--mode", choices=("rate", "concurrency"), default="rate",
+                        help="Open-loop arrival rate (req/s) or closed-loop concurrent users")
+    parser.add_argument("--stages", default="30s:1,60s:1",
+                        help="Comma-separated duration:target stages, ramped linearly")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--mix", default="tutor=1,live=1,basic=1,comparison=1",
+                        help="Category weights, e.g. tutor=3,live=1")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="Rate mode drops arrivals beyond this many open streams")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    args = parser.parse_args(argv)
+
+    mix = PromptMix(load_corpus(args.data_dir), parse_mix(args.mix), seed=args.seed)
+    generator = LoadGenerator(
+        args.url, args.token, mix, parse_stages(args.stages),
+        mode=args.mode, arrivals=args.arrivals, max_in_flight=args.max_in_flight,
+        timeout=httpx.Timeout(args.timeout, connect=10.0), seed=args.seed
+    )
+    report = asyncio.run(generator.run())
+
+    for line in report.summary_lines():
+        print(line)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report.summary(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# utils/markdown_normaliser.py
+"""Strip markdown from bot replies, chunk by chunk as they stream in.
+
+Usage (throughput benchmark on synthetic replies)::
+
+    python -m utils.markdown_normaliser --size-kb 512 --chunk-size 64 --repeat 5
+
+Only markup is removed: headers, emphasis, strikethrough, code spans and
+fences, links, images, block quotes, list bullets and rules. Hyphens,
+``>`` and underscores that are part of the text (-2.4%, BRK-B, a -> b,
+snake_case) are left alone.
+"""
+import argparse
+import random
+import re
+import time
+
+_FENCE = re.compile(r"^[ \t]{0,3}(`{3,}|~{3,})")
+_QUOTE = re.compile(r"^[ \t]{0,3}(?:>[ \t]?)+")
+_RULE = re.compile(r"^[ \t]{0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_HEADER = re.compile(r"^[ \t]{0,3}#{1,6}(?:[ \t]+|$)")
+_CLOSING_HASHES = re.compile(r"[ \t]+#+[ \t]*$")
+_BULLET = re.compile(r"^([ \t]*)[-*+][ \t]+")
+
+# One alternation, one scan per line. Emphasis bodies can't contain their own
+# delimiter, so an unclosed marker costs a scan to the next one, not the line
+_INLINE = re.compile(r"""
+      \\(?P<escaped>[\\`*_{}\[\]()\#+\-.!>~|])
+    | ``(?P<code2>.+?)``
+    | `(?P<code>[^`]+)`
+    | !\[(?P<alt>[^\]]*)\]\([^)]*\)
+    | \[(?P<link>[^\]]+)\]\([^)]*\)
+    | <(?P<autolink>(?:https?|mailto):[^>\s]+)>
+    | \*\*\*(?=\S)(?P<strong_em>[^*]+?)(?<=\S)\*\*\*
+    | \*\*(?=\S)(?P<strong>(?:[^*]|\*(?!\*))+?)(?<=\S)\*\*
+    | (?<!\w)__(?=\S)(?P<strong_under>(?:[^_]|_(?!_))+?)(?<=\S)__(?!\w)
+    | ~~(?=\S)(?P<strike>[^~]+?)(?<=\S)~~
+    | \*(?=[^\s*])(?P<em>[^*]+?)(?<=\S)\*
+    | (?<!\w)_(?=[^\s_])(?P<em_under>[^_]+?)(?<=\S)_(?!\w)
+""", re.VERBOSE)
+
+_VERBATIM = ("escaped", "code2", "code", "alt", "autolink")
+
+
+def _inline(match):
+    group = match.lastgroup
+    text = match.group(group)
+    if group in _VERBATIM:
+        return text
+    # Emphasis and link text can hold more markup
+    return _INLINE.sub(_inline, text)
+
+
+def normalise_line(line):
+    """Strip block and inline markdown from one line outside a code fence"""
+    quote = _QUOTE.match(line)
+    if quote:
+        line = line[quote.end():]
+    if _RULE.match(line):
+        return ""
+    header = _HEADER.match(line)
+    if header:
+        line = _CLOSING_HASHES.sub("", line[header.end():])
+    else:
+        bullet = _BULLET.match(line)
+        if bullet:
+            line = bullet.group(1) + line[bullet.end():]
+    return _INLINE.sub(_inline, line)
+
+
+class MarkdownNormaliser:
+    """Incremental markdown stripper; feed it chunks in any split.
+
+    Only the unfinished last line and whether a code fence is open are
+    carried between chunks, so the output is the same however the reply
+    was cut up by the stream.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.fence = None
+        self.parts = []
+
+    def feed(self, chunk):
+        """Normalise every line completed by ``chunk`` and return that text"""
+        cut = chunk.rfind("\n")
+        if cut == -1:
+            self.pending.append(chunk)
+            return ""
+        self.pending.append(chunk[:cut])
+        lines = "".join(self.pending).split("\n")
+        self.pending = [chunk[cut + 1:]]
+        out = "".join(self._line(line) + "\n" for line in lines if self._keep(line))
+        self.parts.append(out)
+        return out
+
+    def flush(self):
+        """Normalise whatever is left after the stream ended"""
+        line, self.pending = "".join(self.pending), []
+        out = self._line(line) if line and self._keep(line) else ""
+        self.parts.append(out)
+        return out
+
+    @property
+    def text(self):
+        return "".join(self.parts).strip()
+
+    def _keep(self, line):
+        # Fence lines open or close a code block and are dropped
+        fence = _FENCE.match(line)
+        if fence is None:
+            return True
+        marker = fence.group(1)
+        if self.fence is None:
+            self.fence = marker
+            return False
+        if marker[0] == self.fence[0] and len(marker) >= len(self.fence) and not line.strip()[len(marker):]:
+            self.fence = None
+            return False
+        return True
+
+    def _line(self, line):
+        if self.fence is not None:
+            return line
+        return normalise_line(line)
+
+
+def normalise_markdown(text):
+    """Strip markdown from a whole reply"""
+    normaliser = MarkdownNormaliser()
+    normaliser.feed(text)
+    normaliser.flush()
+    return normaliser.text
+
+
+SYNTHETIC_LINES = (
+    "## {ticker} outlook",
+    "**{ticker}** closed at ${price:.2f}, a change of {change:+.2f}% on the day.",
+    "- Support near *${price:.2f}*; resistance at __${high:.2f}__",
+    "> Analysts at [Example Research](https://example.com/{ticker}) rate it `{rating}`.",
+    "1. P/E ratio: {pe:.1f} vs sector {sector_pe:.1f} ({diff:+.1f})",
+    "The {ticker} -> {other} spread moved {change:+.2f}% (~~old~~ new estimate).",
+    "```",
+    "ratio = price / earnings  # {pe:.1f}",
+    "```",
+    "---",
+)
+
+
+def synthetic_reply(size, seed=0):
+    """A markdown-heavy reply of about ``size`` characters with tickers and signed numbers"""
+    rng = random.Random(seed)
+    tickers = ["AAPL", "TSLA", "BRK-B", "RDS_A", "NVDA", "MSFT"]
+    lines = []
+    length = 0
+    while length < size:
+        for template in SYNTHETIC_LINES:
+            price = rng.uniform(10, 900)
+            line = template.format(
+                ticker=rng.choice(tickers), other=rng.choice(tickers), price=price, high=price * 1.1,
+                change=rng.uniform(-9, 9), rating=rng.choice(["BUY", "HOLD", "SELL"]),
+                pe=rng.uniform(5, 60), sector_pe=rng.uniform(5, 60), diff=rng.uniform(-20, 20)
+            )
+            lines.append(line)
+            length += len(line) + 1
+    return "\n".join(lines)
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def benchmark(size=512 * 1024, chunk_size=64, repeat=5, seed=0):
+    """Best-of-``repeat`` throughput in MB/s for one-shot and streamed normalising"""
+    text = synthetic_reply(size, seed)
+    chunks = chunked(text, chunk_size)
+    megabytes = len(text.encode("utf-8")) / 1e6
+
+    def one_shot():
+        normalise_markdown(text)
+
+    def streamed():
+        normaliser = MarkdownNormaliser()
+        for chunk in chunks:
+            normaliser.feed(chunk)
+        normaliser.flush()
+
+    results = {}
+    for name, func in (("one-shot", one_shot), ("streamed", streamed)):
+        best = min(_timed(func) for _ in range(repeat))
+        results[name] = megabytes / best
+    return results
+
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the markdown normaliser on synthetic replies")
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--chunk-size", type=int, default=64, help="Characters per streamed chunk")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for name, throughput in benchmark(args.size_kb * 1024, args.chunk_size, args.repeat).items():
+        print(f"{name:9s} {throughput:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
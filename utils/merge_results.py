@@ -0,0 +1,111 @@
+# utils/merge_results.py
+"""Combine the allure-results and stream metrics of sharded runs into one report.
+
+Usage::
+
+    python -m utils.merge_results node-0/allure-results node-1/allure-results -o allure-results \\
+        --metrics node-0/stream_metrics.jsonl node-1/stream_metrics.jsonl
+
+Result, container and attachment files are copied as they are (Allure
+names them by UUID, so nodes never clash). ``environment.properties`` is
+merged key by key: values that differ between nodes are listed together.
+The stream metrics of all nodes are written as one JSONL file with
+combined latency and score summaries next to it.
+"""
+import argparse
+import json
+import os
+import shutil
+
+from utils.stream_metrics import MetricsRecorder
+
+ENVIRONMENT_FILE = "environment.properties"
+
+
+def read_properties(path):
+    properties = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, _, value = line.partition("=")
+                properties[key.strip()] = value.strip()
+    return properties
+
+
+def merge_environment(paths):
+    """One set of properties from several files; differing values are joined in node order"""
+    values = {}
+    for path in paths:
+        for key, value in read_properties(path).items():
+            seen = values.setdefault(key, [])
+            if value not in seen:
+                seen.append(value)
+    merged = {key: ", ".join(seen) for key, seen in values.items()}
+    merged["Nodes"] = str(len(paths))
+    return merged
+
+
+def merge_allure_dirs(sources, destination):
+    """Copy every node's results into ``destination``; returns test counts by status"""
+    os.makedirs(destination, exist_ok=True)
+    statuses = {}
+    environments = []
+    for source in sources:
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if not os.path.isfile(path):
+                continue
+            if name == ENVIRONMENT_FILE:
+                environments.append(path)
+                continue
+            target = os.path.join(destination, name)
+            if os.path.exists(target):
+                if name.endswith("-result.json"):
+                    raise ValueError(f"{name} appears in more than one node's results")
+                # categories.json, executor.json and the like: keep the first node's copy
+                continue
+            shutil.copy2(path, target)
+            if name.endswith("-result.json"):
+                with open(path, "r", encoding="utf-8") as f:
+                    status = json.load(f).get("status", "unknown")
+                statuses[status] = statuses.get(status, 0) + 1
+
+    if environments:
+        with open(os.path.join(destination, ENVIRONMENT_FILE), "w", encoding="utf-8") as f:
+            for key, value in merge_environment(environments).items():
+                f.write(f"{key}={value}\n")
+    return statuses
+
+
+def merge_metrics(paths):
+    records = []
+    for path in paths:
+        records.extend(MetricsRecorder.load(path).records)
+    return MetricsRecorder(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge per-node allure-results and stream metrics")
+    parser.add_argument("sources", nargs="+", help="allure-results directories of the nodes")
+    parser.add_argument("-o", "--output", default="allure-results", help="Merged allure-results directory")
+    parser.add_argument("--metrics", nargs="*", default=[], help="stream_metrics.jsonl files of the nodes")
+    parser.add_argument("--metrics-output", default=os.path.join("results", "stream_metrics.jsonl"),
+                        help="Where to write the merged stream metrics")
+    args = parser.parse_args(argv)
+
+    statuses = merge_allure_dirs(args.sources, args.output)
+    total = sum(statuses.values())
+    print(f"{total} results from {len(args.sources)} nodes: "
+          + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+
+    if args.metrics:
+        recorder = merge_metrics(args.metrics)
+        summary_path = recorder.write(args.metrics_output)
+        for line in recorder.summary_lines():
+            print(line)
+        print(f"merged metrics: {args.metrics_output} (summary {summary_path})")
+
+
+if __name__ == "__main__":
+    main()
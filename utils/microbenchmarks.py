@@ -0,0 +1,305 @@
+# utils/microbenchmarks.py
+"""Time and peak memory of the harness's own hot paths on synthetic workloads.
+
+Usage::
+
+    python -m utils.microbenchmarks
+    python -m utils.microbenchmarks --only stream_decode,clean_markdown --repeat 10
+    python -m utils.microbenchmarks --compare results/microbench/3f2c1ab.json --max-slowdown 1.25
+
+Workloads are built from a fixed seed: a ~50KB markdown reply streamed as
+thousands of NDJSON chunks in uneven network reads, a 100k-row prompt CSV,
+long verbose judge reviews and a batch of Allure attachments. Each
+component is timed best-of-``--repeat``, then run once more under
+tracemalloc for its peak allocation. Results are saved per commit under
+``results/microbench/`` so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+
+from utils.markdown_normaliser import MarkdownNormaliser, normalise_markdown, synthetic_reply
+
+DEFAULT_OUTPUT_DIR = os.path.join("results", "microbench")
+
+
+@dataclass
+class Workload:
+    reply: str
+    blocks: list
+    csv_path: str
+    reviews: list
+    results: list
+
+
+def ndjson_blocks(text, chunk_count, seed=0):
+    """``text`` as ``chunk_count`` chat_streaming events, cut into uneven network reads"""
+    rng = random.Random(seed)
+    size = max(1, len(text) // chunk_count)
+    events = b"".join(
+        json.dumps({"event": "chat_streaming", "data": {"chunk": text[i:i + size]}}).encode("utf-8") + b"\n"
+        for i in range(0, len(text), size)
+    ) + json.dumps({"event": "chat_end", "data": {}}).encode("utf-8") + b"\n"
+    blocks = []
+    start = 0
+    while start < len(events):
+        read = rng.randint(64, 4096)
+        blocks.append(events[start:start + read])
+        start += read
+    return blocks
+
+
+def write_prompt_csv(path, rows, seed=0):
+    """A prompt CSV of ``rows`` distinct prompts with min_score and tags columns"""
+    rng = random.Random(seed)
+    tickers = ["AAPL", "TSLA", "BRK-B", "RDS_A", "NVDA", "MSFT"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("prompt,min_score,tags\n")
+        for i in range(rows):
+            f.write(f"\"What is the {rng.choice(['P/E', 'dividend yield', 'beta'])} of "
+                    f"{rng.choice(tickers)} in quarter {i}?\",{rng.randint(5, 8)},live;q{i % 4}\n")
+
+
+def judge_review(size, score, seed=0):
+    """A verbose judge review of about ``size`` characters with lots of numbers before the score"""
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = (f"In example {rng.randint(1, 9)} the bot quoted {rng.uniform(1, 900):.2f} "
+                f"({rng.uniform(-9, 9):+.1f}%), which is {rng.choice(['fine', 'vague', 'wrong'])}.")
+        lines.append(line)
+        length += len(line) + 1
+    lines.append(f"**TOTAL SCORE: {score}/10**")
+    return "\n".join(lines)
+
+
+def build_workload(directory, reply_kb=50, chunks=5000, csv_rows=100_000, review_kb=8, reviews=200,
+                   attachments=200, seed=0):
+    reply = synthetic_reply(reply_kb * 1024, seed)
+    csv_path = os.path.join(directory, "prompts.csv")
+    write_prompt_csv(csv_path, csv_rows, seed)
+    rng = random.Random(seed)
+    return Workload(
+        reply=reply,
+        blocks=ndjson_blocks(reply, chunks, seed),
+        csv_path=csv_path,
+        reviews=[judge_review(review_kb * 1024, rng.randint(1, 10), seed + i) for i in range(reviews)],
+        # One results record per attached test, about the size of a real one
+        results=[{"prompt": f"prompt {i}", "raw_response": reply[:2000], "cleaned_response": reply[:1800],
+                  "judgment": judge_review(1500, 7, i), "score": 7} for i in range(attachments)],
+    )
+
+
+def bench_stream_decode(workload):
+    from utils.stream_decoder import read_reply
+
+    return lambda: read_reply(workload.blocks)
+
+
+def bench_stream_decode_normalised(workload):
+    from utils.stream_decoder import read_reply
+
+    return lambda: read_reply(workload.blocks, normaliser=MarkdownNormaliser())
+
+
+def bench_clean_markdown(workload):
+    return lambda: normalise_markdown(workload.reply)
+
+
+def bench_extract_score_total(workload):
+    # judge_verdict.review_score, which TestStockSenseBot.extract_score uses: the "TOTAL SCORE: x/10" line
+    from utils.judge_verdict import review_score
+
+    return lambda: [review_score(review) for review in workload.reviews]
+
+
+def bench_extract_score_helper(workload):
+    # BotTestHelper.extract_score: JSON verdict or TOTAL SCORE line, then the first bare number
+    from utils.bot_helpers import BotTestHelper
+
+    return lambda: [BotTestHelper.extract_score(review) for review in workload.reviews]
+
+
+def bench_load_prompts(workload):
+    from utils.prompt_corpus import load_prompts
+
+    return lambda: load_prompts(workload.csv_path)
+
+
+def bench_allure_attachments(workload):
+    """The four text attachments a prompt test writes under --allure-attachments always"""
+    from allure_commons import plugin_manager
+    from allure_commons.logger import AllureFileLogger
+    from allure_commons.model2 import TestResult
+    from allure_commons.reporter import AllureReporter
+    from allure_commons.types import AttachmentType
+
+    def run():
+        directory = tempfile.mkdtemp(prefix="microbench-allure-")
+        logger = AllureFileLogger(directory)
+        plugin_manager.register(logger)
+        try:
+            reporter = AllureReporter()
+            for record in workload.results:
+                test_uuid = str(uuid.uuid4())
+                reporter.schedule_test(test_uuid, TestResult(uuid=test_uuid, name=record["prompt"]))
+                for name in ("raw_response", "cleaned_response", "judgment"):
+                    reporter.attach_data(uuid.uuid4().hex, record[name], name=name,
+                                         attachment_type=AttachmentType.TEXT, parent_uuid=test_uuid)
+                reporter.attach_data(uuid.uuid4().hex, json.dumps({"score": record["score"]}), name="metrics",
+                                     attachment_type=AttachmentType.JSON, parent_uuid=test_uuid)
+                reporter.close_test(test_uuid)
+        finally:
+            plugin_manager.unregister(logger)
+            shutil.rmtree(directory, ignore_errors=True)
+    return run
+
+
+def bench_results_sink(workload):
+    """The same records as one batched JSONL file instead of attachments"""
+    from utils.results_sink import ResultsSink
+
+    def run():
+        directory = tempfile.mkdtemp(prefix="microbench-sink-")
+        try:
+            sink = ResultsSink(os.path.join(directory, "results.jsonl"), run_id="bench")
+            for record in workload.results:
+                sink.add(record)
+            sink.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return run
+
+
+BENCHMARKS = {
+    "stream_decode": bench_stream_decode,
+    "stream_decode_normalised": bench_stream_decode_normalised,
+    "clean_markdown": bench_clean_markdown,
+    "extract_score_total": bench_extract_score_total,
+    "extract_score_helper": bench_extract_score_helper,
+    "load_prompts_csv": bench_load_prompts,
+    "allure_attachments": bench_allure_attachments,
+    "results_sink": bench_results_sink,
+}
+
+
+def measure(func, repeat=5):
+    """Best and median wall time of ``repeat`` runs, then peak traced memory of one more"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"best": timings[0], "median": timings[len(timings) // 2], "peak_kb": peak / 1024}
+
+
+def run_benchmarks(workload, names=None, repeat=5):
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = measure(BENCHMARKS[name](workload), repeat)
+    return results
+
+
+def git_revision():
+    """Short commit hash, with "-dirty" for uncommitted changes; "unknown" outside git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def compare(current, previous, max_slowdown=1.2):
+    """Rows of (name, previous best, current best, ratio, regressed) for benchmarks in both runs"""
+    rows = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if before is None or not before["best"]:
+            continue
+        ratio = result["best"] / before["best"]
+        rows.append((name, before["best"], result["best"], ratio, ratio > max_slowdown))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the harness's stream, cleaning, scoring, CSV and report paths")
+    parser.add_argument("--only", help="Comma-separated benchmarks to run: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reply-kb", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=5000, help="Stream events per reply")
+    parser.add_argument("--csv-rows", type=int, default=100_000)
+    parser.add_argument("--review-kb", type=int, default=8, help="Size of each verbose judge review")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help=f"JSON file for the results (default {DEFAULT_OUTPUT_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=1.2,
+                        help="With --compare, fail if a benchmark is this many times slower")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix="microbench-") as directory:
+        workload = build_workload(directory, args.reply_kb, args.chunks, args.csv_rows, args.review_kb,
+                                  seed=args.seed)
+        results = run_benchmarks(workload, names, args.repeat)
+
+    revision = git_revision()
+    for name, result in results.items():
+        print(f"{name:26s} best {result['best'] * 1000:9.2f} ms  median {result['median'] * 1000:9.2f} ms  "
+              f"peak {result['peak_kb']:9.0f} KB")
+
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"{revision}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": f"{platform.system()} {platform.machine()}",
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "results": results,
+        }, f, indent=2)
+    print(f"saved {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"compared with {previous.get('revision', args.compare)}:")
+        regressed = False
+        for name, before, after, ratio, slower in compare(results, previous["results"], args.max_slowdown):
+            regressed = regressed or slower
+            print(f"  {name:26s} {before * 1000:9.2f} -> {after * 1000:9.2f} ms  x{ratio:.2f}"
+                  + ("  SLOWER" if slower else ""))
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+# utils/mock_bot_server.py
+"""Local stand-in for the StockSense ``/api/prompt/`` endpoint.
+
+Usage::
+
+    python -m utils.mock_bot_server --port 8765 --profile ttft=0.4,chunk_delay=0.02,drop_rate=0.05
+
+It speaks the same contract as the Render backend: a POST with a JWT
+bearer token and ``{"prompt": ...}`` gets a ``chat_streaming`` NDJSON
+event stream (chunked transfer encoding) ending with ``chat_end``. Timing
+and faults come from MockBotConfig: chunk size, TTFT, inter-chunk delay,
+a throughput cap, cold-start stalls after idling, dropped connections and
+malformed events. Replies and faults are seeded per prompt, so a run
+under the same config is reproducible.
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.markdown_normaliser import synthetic_reply
+
+PROMPT_PATH = "/api/prompt/"
+
+
+@dataclass
+class MockBotConfig:
+    reply_size: int = 1500          # characters per reply
+    chunk_size: int = 40            # characters per chat_streaming event
+    ttft: float = 0.0               # seconds from headers to the first chunk
+    chunk_delay: float = 0.0        # seconds between chunks
+    throughput: float = 0.0         # cap in bytes per second per stream (0: none)
+    cold_start: float = 0.0         # stall before answering the first request, and after idling
+    idle_timeout: float = 900.0     # seconds without requests before the next one is cold again
+    drop_rate: float = 0.0          # share of streams cut off midway without a final chunk
+    malformed_rate: float = 0.0     # share of events sent as broken JSON
+    secret: str = ""                # verify HS256 signatures with this secret (else any well-formed JWT)
+    verify_expiry: bool = False
+    seed: int = 0
+
+
+def parse_profile(spec):
+    """Parse ``"ttft=0.4,chunk_delay=0.02"`` into a MockBotConfig"""
+    types = {f.name: f.type for f in fields(MockBotConfig)}
+    values = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in types:
+            raise ValueError(f"Unknown mock bot setting {name!r}, expected one of {', '.join(types)}")
+        kind = types[name]
+        if kind is bool:
+            values[name] = value.strip().lower() in ("1", "true", "yes")
+        else:
+            values[name] = kind(value.strip())
+    return MockBotConfig(**values)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def make_token(secret="mock-secret", user_id=3, expires_in=3600):
+    """An HS256 access token shaped like the backend's"""
+    now = int(time.time())
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64(json.dumps({"token_type": "access", "exp": now + expires_in, "iat": now,
+                               "user_id": user_id}).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+def check_token(authorization, secret="", verify_expiry=False):
+    """None if the Authorization header carries an acceptable JWT, else the reason it doesn't"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme != "Bearer" or not token:
+        return "Authentication credentials were not provided."
+    parts = token.split(".")
+    if len(parts) != 3:
+        return "Given token not valid for any token type"
+    try:
+        payload = json.loads(_unb64(parts[1]))
+        signature = _unb64(parts[2])
+    except (binascii.Error, ValueError):
+        return "Given token not valid for any token type"
+    if secret:
+        expected = hmac.new(secret.encode(), f"{parts[0]}.{parts[1]}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(signature, expected):
+            return "Given token not valid for any token type"
+    if verify_expiry and payload.get("exp", 0) < time.time():
+        return "Token is expired"
+    return None
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections (or hanging up on a drop) are expected
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockBotServer:
+    """Threaded HTTP server answering prompts per ``config``; also a context manager"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockBotConfig()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.streams = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.cold_starts = 0
+        self.active = 0
+        self.peak_active = 0
+        self.last_request = None
+        self.ready_at = 0.0
+        self.httpd = _HTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{PROMPT_PATH}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05},
+                                       name="mock-bot-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reply_for(self, prompt):
+        return synthetic_reply(self.config.reply_size, seed=self.config.seed ^ zlib.crc32(prompt.encode("utf-8")))
+
+    def _begin(self):
+        """Count a request and return how long it stalls for a cold start"""
+        with self.lock:
+            now = time.monotonic()
+            cold = self.last_request is None or now - self.last_request > self.config.idle_timeout
+            self.last_request = now
+            self.requests += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            if cold and self.config.cold_start:
+                self.cold_starts += 1
+                self.ready_at = now + self.config.cold_start
+            # Everything arriving while the backend wakes up waits for it
+            return max(0.0, self.ready_at - now)
+
+    def _end(self):
+        with self.lock:
+            self.active -= 1
+            # Idle time counts from when the last request finished
+            self.last_request = time.monotonic()
+
+    def summary_lines(self):
+        return [
+            f"mock bot {self.url}: {self.requests} requests, {self.streams} streams, peak {self.peak_active} concurrent",
+            f"injected: {self.cold_starts} cold starts, {self.dropped} dropped streams, {self.malformed} malformed events",
+        ]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                # What the warm-up ping sees on the prompt endpoint
+                stall = server._begin()
+                try:
+                    time.sleep(stall)
+                    self._json(405, {"detail": 'Method "GET" not allowed.'})
+                finally:
+                    server._end()
+
+            def do_POST(self):
+                stall = server._begin()
+                try:
+                    time.sleep(stall)
+                    self._prompt()
+                finally:
+                    server._end()
+
+            def _prompt(self):
+                config = server.config
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.split("?")[0] != PROMPT_PATH:
+                    self._json(404, {"detail": "Not found."})
+                    return
+                problem = check_token(self.headers.get("Authorization"), config.secret, config.verify_expiry)
+                if problem:
+                    self._json(401, {"detail": problem, "code": "token_not_valid"})
+                    return
+                try:
+                    prompt = json.loads(body or b"{}").get("prompt")
+                except (ValueError, AttributeError):
+                    prompt = None
+                if not isinstance(prompt, str) or not prompt.strip():
+                    self._json(400, {"prompt": ["This field is required."]})
+                    return
+
+                with server.lock:
+                    server.streams += 1
+                    stream_no = server.streams
+                # Seeded per prompt and per stream, so reruns inject the same faults
+                rng = random.Random(f"{config.seed}:{prompt}:{stream_no}")
+                reply = server.reply_for(prompt)
+                chunks = [reply[i:i + config.chunk_size] for i in range(0, len(reply), config.chunk_size)]
+                drop_at = rng.randrange(1, max(2, len(chunks))) if rng.random() < config.drop_rate else None
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.wfile.flush()
+
+                started = time.monotonic()
+                sent = 0
+                time.sleep(config.ttft)
+                for index, chunk in enumerate(chunks):
+                    if index == drop_at:
+                        with server.lock:
+                            server.dropped += 1
+                        # Cut the connection without the terminating chunk
+                        self.close_connection = True
+                        return
+                    if index and config.chunk_delay:
+                        time.sleep(config.chunk_delay)
+                    if rng.random() < config.malformed_rate:
+                        with server.lock:
+                            server.malformed += 1
+                        line = b'{"event": "chat_streaming", "data": {"chunk": \n'
+                    else:
+                        line = json.dumps({"event": "chat_streaming", "data": {"chunk": chunk}}).encode("utf-8") + b"\n"
+                    sent += self._send_chunk(line)
+                    if config.throughput:
+                        # Hold the stream back to the byte-rate cap
+                        ahead = sent / config.throughput - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+                self._send_chunk(json.dumps({"event": "chat_end", "data": {}}).encode("utf-8") + b"\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def _send_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+                return len(data)
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local mock of the StockSense prompt endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", default="", help="Comma-separated MockBotConfig settings, e.g. ttft=0.4,drop_rate=0.05")
+    args = parser.parse_args(argv)
+
+    config = parse_profile(args.profile)
+    with MockBotServer(config, args.host, args.port) as server:
+        print(f"mock bot listening on {server.url}")
+        print(f"BOT_URL={server.url} JWT_TOKEN={make_token(config.secret or 'mock-secret')}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        for line in server.summary_lines():
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
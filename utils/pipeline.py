@@ -0,0 +1,171 @@
+# utils/pipeline.py
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass, field
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """One step of the pipeline; ``func`` takes and returns the item's data dict"""
+    name: str
+    func: object
+    workers: int = 1
+
+
+@dataclass
+class PipelineItem:
+    index: int
+    data: dict
+    error: BaseException = None
+    failed_stage: str = None
+    timings: dict = field(default_factory=dict)
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    busy: float = 0.0
+    max_queue_depth: int = 0
+
+
+class Pipeline:
+    """Thread-based producer/consumer pipeline with bounded queues between stages.
+
+    Every stage has its own worker count. Queues hold at most ``queue_size``
+    items, so a slow stage makes the ones before it block instead of piling
+    up finished work in memory. An item whose stage raises skips the rest of
+    the stages and comes out with ``error`` set. After ``stop`` no new work
+    starts: items still queued come out with a CancelledError.
+    """
+
+    def __init__(self, stages, queue_size=4):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = {stage.name: StageStats() for stage in stages}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._drain = None
+
+    def run(self, items):
+        """Push ``items`` (data dicts) through all stages, yielding PipelineItems as they finish"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        output = queue.Queue(maxsize=self.queue_size)
+        queues.append(output)
+        remaining = [stage.workers for stage in self.stages]
+        threads = []
+
+        def feed():
+            for index, data in enumerate(items):
+                if self._stop.is_set():
+                    break
+                self._put(queues[0], PipelineItem(index, data), self.stages[0].name)
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+        def work(position):
+            stage = self.stages[position]
+            inbox, outbox = queues[position], queues[position + 1]
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                if item.error is None and self._stop.is_set():
+                    item.error = CancelledError()
+                    item.failed_stage = stage.name
+                if item.error is None:
+                    started = time.perf_counter()
+                    try:
+                        item.data = stage.func(item.data)
+                    except BaseException as e:
+                        item.error = e
+                        item.failed_stage = stage.name
+                    took = time.perf_counter() - started
+                    item.timings[stage.name] = took
+                    with self._lock:
+                        self.stats[stage.name].processed += 1
+                        self.stats[stage.name].busy += took
+                next_name = self.stages[position + 1].name if position + 1 < len(self.stages) else None
+                self._put(outbox, item, next_name)
+
+            # The last worker out tells the next stage there is nothing more to come
+            with self._lock:
+                remaining[position] -= 1
+                last = remaining[position] == 0
+            if last:
+                downstream = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+                for _ in range(downstream):
+                    outbox.put(_DONE)
+
+        threads.append(threading.Thread(target=feed, name="pipeline-feed", daemon=True))
+        for position, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                threads.append(threading.Thread(target=work, args=(position,),
+                                                name=f"pipeline-{stage.name}-{n}", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            yield item
+        for thread in threads:
+            thread.join()
+
+    def _put(self, target, item, stage_name):
+        target.put(item)
+        if stage_name is not None:
+            depth = target.qsize()
+            with self._lock:
+                stats = self.stats[stage_name]
+                stats.max_queue_depth = max(stats.max_queue_depth, depth)
+
+    def start(self, keyed_items):
+        """Run in the background and return {key: Future} resolving to each item's data.
+
+        ``keyed_items`` is a list of (key, data) pairs; a failed item's future
+        raises the stage's exception. Repeated keys are run once.
+        """
+        unique = {}
+        for key, data in keyed_items:
+            unique.setdefault(key, data)
+        keyed_items = list(unique.items())
+        keys = [key for key, _ in keyed_items]
+        futures = {key: Future() for key in keys}
+
+        def drain():
+            try:
+                for item in self.run(data for _, data in keyed_items):
+                    future = futures[keys[item.index]]
+                    if item.error is not None:
+                        future.set_exception(item.error)
+                    else:
+                        future.set_result(item.data)
+                # Stopped before these were fed in
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(CancelledError())
+            except BaseException as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+
+        self._drain = threading.Thread(target=drain, name="pipeline-drain", daemon=True)
+        self._drain.start()
+        return futures
+
+    def stop(self):
+        """Cancel work that hasn't started and wait for the running stage calls to finish"""
+        self._stop.set()
+        if self._drain is not None:
+            self._drain.join()
+
+    def summary_lines(self):
+        return [
+            f"{name}: {stats.processed} items, busy {stats.busy:.1f}s, max queue depth {stats.max_queue_depth}"
+            for name, stats in self.stats.items()
+        ]
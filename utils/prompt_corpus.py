@@ -0,0 +1,211 @@
+# utils/prompt_corpus.py
+import csv
+import hashlib
+import os
+import random
+import re
+import unicodedata
+from dataclasses import dataclass
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_prompts")
+
+# Default category of the rows of each built-in file (a "category" column wins)
+CATEGORY_FILES = {
+    "tutor": "stock_tutor_prompts.csv",
+    "live": "live_data_prompts.csv",
+    "basic": "basic_conversation_prompts.csv",
+    "comparison": "comparison_prompts.csv",
+}
+
+TAG_SEPARATORS = re.compile(r"[;|,]")
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?]+$")
+
+
+@dataclass(frozen=True)
+class PromptRecord:
+    """One corpus row; ``min_score`` is None when the row sets no threshold of its own"""
+    prompt: str
+    category: str
+    min_score: int = None
+    tags: tuple = ()
+    source: str = None
+    line: int = None
+
+
+@dataclass
+class DedupeStats:
+    rows: int = 0
+    exact: int = 0
+    normalised: int = 0
+
+    @property
+    def kept(self):
+        return self.rows - self.exact - self.normalised
+
+
+def normalise(prompt):
+    """Key for near-duplicate detection: NFKC, case-folded, whitespace collapsed, end punctuation dropped"""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def _digest(text):
+    # 16-byte digests keep the seen-sets small for very large corpora
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def default_category(path):
+    name = os.path.basename(path)
+    for category, filename in CATEGORY_FILES.items():
+        if filename == name:
+            return category
+    return os.path.splitext(name)[0].removesuffix("_prompts")
+
+
+def iter_csv(path, category=None):
+    """Stream PromptRecords from one CSV with a ``prompt`` column and optional
+    ``category``, ``min_score`` and ``tags`` (separated by ; | or ,) columns"""
+    category = category or default_category(path)
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        reader = csv.DictReader(file)
+        if not reader.fieldnames or "prompt" not in reader.fieldnames:
+            raise ValueError(f"{path} has no 'prompt' column")
+        for row in reader:
+            prompt = (row.get("prompt") or "").strip()
+            if not prompt:
+                continue
+            min_score = (row.get("min_score") or "").strip()
+            tags = (row.get("tags") or "").strip()
+            yield PromptRecord(
+                prompt=prompt,
+                category=(row.get("category") or "").strip() or category,
+                min_score=int(min_score) if min_score else None,
+                tags=tuple(t.strip() for t in TAG_SEPARATORS.split(tags) if t.strip()) if tags else (),
+                source=os.path.basename(path),
+                line=reader.line_num,
+            )
+
+
+def dedupe(records, normalised=True, stats=None):
+    """Drop repeated prompts from a record stream, keeping the first occurrence"""
+    stats = stats if stats is not None else DedupeStats()
+    exact_seen = set()
+    normalised_seen = set()
+    for record in records:
+        stats.rows += 1
+        exact_key = _digest(record.prompt)
+        if exact_key in exact_seen:
+            stats.exact += 1
+            continue
+        exact_seen.add(exact_key)
+        if normalised:
+            key = _digest(normalise(record.prompt))
+            if key in normalised_seen:
+                stats.normalised += 1
+                continue
+            normalised_seen.add(key)
+        yield record
+
+
+class PromptCorpus:
+    """All prompt CSVs under ``directory``, read lazily and de-duplicated on the fly.
+
+    Nothing is held in memory between iterations, so the corpus can be far
+    larger than the handful of prompts a run actually uses; ``sample`` keeps
+    only the reservoirs it needs.
+    """
+
+    def __init__(self, directory=DATA_DIR, files=None, normalised_dedupe=True):
+        self.directory = directory
+        self.files = files
+        self.normalised_dedupe = normalised_dedupe
+        self.stats = DedupeStats()
+
+    def paths(self):
+        if self.files is not None:
+            names = self.files
+        else:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(".csv"))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def __iter__(self):
+        self.stats = DedupeStats()
+
+        def rows():
+            for path in self.paths():
+                yield from iter_csv(path)
+
+        return dedupe(rows(), normalised=self.normalised_dedupe, stats=self.stats)
+
+    def records(self, categories=None, tags=None):
+        """Stream records, optionally only those in ``categories`` or carrying any of ``tags``"""
+        for record in self:
+            if categories is not None and record.category not in categories:
+                continue
+            if tags is not None and not set(tags) & set(record.tags):
+                continue
+            yield record
+
+    def by_category(self):
+        corpus = {}
+        for record in self:
+            corpus.setdefault(record.category, []).append(record.prompt)
+        return corpus
+
+    def sample(self, n, seed=0, balanced=True, categories=None, tags=None):
+        """Stratified random sample of ``n`` records in one pass.
+
+        Every category keeps a reservoir of up to ``n`` records (Algorithm R),
+        so memory is bounded by ``n`` per category whatever the corpus size.
+        ``balanced`` splits ``n`` evenly across categories, handing the share
+        of small categories on to bigger ones; otherwise each category gets
+        its proportional share. Records come back in corpus order.
+        """
+        rng = random.Random(seed)
+        reservoirs = {}
+        seen = {}
+        for position, record in enumerate(self.records(categories, tags)):
+            reservoir = reservoirs.setdefault(record.category, [])
+            count = seen.get(record.category, 0) + 1
+            seen[record.category] = count
+            if len(reservoir) < n:
+                reservoir.append((position, record))
+            else:
+                slot = rng.randrange(count)
+                if slot < n:
+                    reservoir[slot] = (position, record)
+
+        quotas = allocate(seen, n, balanced)
+        chosen = []
+        for category, reservoir in reservoirs.items():
+            # The reservoir is a uniform sample, so any subset of it is too
+            chosen.extend(rng.sample(reservoir, quotas[category]))
+        return [record for _, record in sorted(chosen, key=lambda item: item[0])]
+
+
+def allocate(counts, n, balanced=True):
+    """Split ``n`` draws across categories with ``counts`` available items each"""
+    quotas = {category: 0 for category in counts}
+    remaining = min(n, sum(counts.values()))
+    if not balanced:
+        total = sum(counts.values())
+        for category, count in counts.items():
+            quotas[category] = min(count, n * count // total) if total else 0
+        remaining -= sum(quotas.values())
+
+    # Hand out what is left one at a time to the categories with the fewest
+    # draws that still have items, so small categories cap out and the rest
+    # is spread over the bigger ones
+    while remaining > 0:
+        open_categories = [c for c in counts if quotas[c] < counts[c]]
+        category = min(open_categories, key=lambda c: (quotas[c], c) if balanced else (quotas[c] / counts[c], c))
+        quotas[category] += 1
+        remaining -= 1
+    return quotas
+
+
+def load_prompts(path):
+    """Prompt strings of one CSV, duplicates removed"""
+    return [record.prompt for record in dedupe(iter_csv(path))]
@@ -0,0 +1,271 @@
+# utils/regression_baseline.py
+"""Per-prompt latency and score history, and regression checks against it.
+
+Every run's live prompt results (TTFT, total time, score) go into a
+SQLite store; cassette replays and mock-bot runs are left out. The last
+``runs`` runs before the current one form a rolling baseline:
+
+* per prompt, a reply slower than the baseline p95 by more than
+  ``latency_limit``, or scoring more than ``score_limit`` below the
+  baseline mean, is flagged while the test runs;
+* per category, the run's p95 latency and mean score are compared with
+  the baseline, and a change past the limits only counts as a regression
+  when a one-sided Mann-Whitney U test agrees at ``alpha``.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from utils.results_sink import load_results
+from utils.stream_metrics import percentile
+
+DEFAULT_HISTORY_PATH = os.path.join(".stocksense_cache", "prompt_history.sqlite3")
+
+# Stream timings from the results records, under the names used here
+LATENCY_METRICS = {"ttft": "ttfc", "total": "total"}
+
+
+class HistoryStore:
+    """Prompt samples of past runs, one row per prompt per run"""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " run_id TEXT NOT NULL,"
+            " recorded REAL NOT NULL,"
+            " prompt TEXT NOT NULL,"
+            " category TEXT NOT NULL,"
+            " ttft REAL,"
+            " total REAL,"
+            " score REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS samples_run ON samples (run_id)")
+
+    def add_run(self, run_id, samples):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO samples (run_id, recorded, prompt, category, ttft, total, score)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, now, s["prompt"], s["category"], s.get("ttft"), s.get("total"), s.get("score"))
+                 for s in samples]
+            )
+            self.conn.commit()
+
+    def recent_runs(self, limit, exclude=None):
+        """Ids of the last ``limit`` runs, newest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT run_id FROM samples WHERE run_id != ? GROUP BY run_id"
+                " ORDER BY MAX(recorded) DESC, MAX(rowid) DESC LIMIT ?", (exclude or "", limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def samples(self, run_ids):
+        if not run_ids:
+            return []
+        marks = ",".join("?" * len(run_ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT prompt, category, ttft, total, score FROM samples WHERE run_id IN ({marks})", run_ids
+            ).fetchall()
+        return [dict(zip(("prompt", "category", "ttft", "total", "score"), row)) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def samples_from_results(records):
+    """History samples from results-sink records: judged live prompts without a cold start"""
+    samples = []
+    for record in records:
+        if record.get("outcome") not in ("passed", "failed") or record.get("cold_start"):
+            continue
+        # Replayed cassettes and the mock bot answer in next to no time
+        if record.get("source", "live") != "live":
+            continue
+        sample = {"prompt": record["prompt"], "category": record["category"], "score": record.get("score")}
+        for name, key in LATENCY_METRICS.items():
+            sample[name] = record.get(key)
+        samples.append(sample)
+    return samples
+
+
+def mann_whitney_greater(xs, ys):
+    """One-sided p-value that ``xs`` tend to be larger than ``ys`` (normal approximation, tie-corrected)"""
+    n1, n2 = len(xs), len(ys)
+    if not n1 or not n2:
+        return 1.0
+    pooled = sorted([(v, 0) for v in xs] + [(v, 1) for v in ys])
+    ranks = [0.0] * len(pooled)
+    tie_term = 0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tied = j - i + 1
+        tie_term += tied ** 3 - tied
+        i = j + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, pooled) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0
+    if variance <= 0:
+        return 1.0
+    # Continuity correction towards the null
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@dataclass
+class Regression:
+    scope: str
+    name: str
+    metric: str
+    baseline: float
+    current: float
+    p_value: float = None
+
+    def describe(self):
+        if self.metric == "score":
+            change = f"mean score {self.baseline:.2f} -> {self.current:.2f}"
+        else:
+            change = f"{self.metric} {self.baseline:.2f}s -> {self.current:.2f}s ({self.current / self.baseline - 1:+.0%})"
+        p_value = f", p={self.p_value:.3g}" if self.p_value is not None else ""
+        return f"{self.scope} {self.name!r}: {change}{p_value}"
+
+
+def _values(samples, metric):
+    return [s[metric] for s in samples if s.get(metric) is not None]
+
+
+def check_prompt(sample, history, latency_limit=0.4, score_limit=1.5, min_samples=3):
+    """Regressions of one prompt's sample against that prompt's baseline samples"""
+    regressions = []
+    for metric in LATENCY_METRICS:
+        past = _values(history, metric)
+        current = sample.get(metric)
+        if current is None or len(past) < min_samples:
+            continue
+        p95 = percentile(past, 95)
+        if p95 and current > p95 * (1 + latency_limit):
+            regressions.append(Regression("prompt", sample["prompt"], metric, p95, current))
+
+    past = _values(history, "score")
+    current = sample.get("score")
+    if current is not None and len(past) >= min_samples:
+        mean = sum(past) / len(past)
+        if current < mean - score_limit:
+            regressions.append(Regression("prompt", sample["prompt"], "score", mean, current))
+    return regressions
+
+
+def compare_categories(current, baseline, latency_limit=0.4, score_limit=1.0, alpha=0.05, min_samples=5):
+    """Categories whose p95 latency or mean score moved past the limits, confirmed by a Mann-Whitney U test"""
+    regressions = []
+    for category in sorted({s["category"] for s in current}):
+        now = [s for s in current if s["category"] == category]
+        past = [s for s in baseline if s["category"] == category]
+
+        for metric in LATENCY_METRICS:
+            xs, ys = _values(now, metric), _values(past, metric)
+            if len(xs) < min_samples or len(ys) < min_samples:
+                continue
+            current_p95, baseline_p95 = percentile(xs, 95), percentile(ys, 95)
+            if baseline_p95 and current_p95 > baseline_p95 * (1 + latency_limit):
+                p_value = mann_whitney_greater(xs, ys)
+                if p_value < alpha:
+                    regressions.append(Regression("category", category, metric, baseline_p95, current_p95, p_value))
+
+        xs, ys = _values(now, "score"), _values(past, "score")
+        if len(xs) >= min_samples and len(ys) >= min_samples:
+            current_mean, baseline_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+            if current_mean < baseline_mean - score_limit:
+                p_value = mann_whitney_greater(ys, xs)
+                if p_value < alpha:
+                    regressions.append(Regression("category", category, "score", baseline_mean, current_mean, p_value))
+    return regressions
+
+
+class PromptBaseline:
+    """Read-only rolling baseline per prompt, for flagging regressions while tests run"""
+
+    def __init__(self, store, run_id=None, runs=10, latency_limit=0.4, score_limit=1.5, min_samples=3):
+        self.latency_limit = latency_limit
+        self.score_limit = score_limit
+        self.min_samples = min_samples
+        self.history = {}
+        for sample in store.samples(store.recent_runs(runs, exclude=run_id)):
+            self.history.setdefault(sample["prompt"], []).append(sample)
+
+    def check(self, result):
+        """Regressions of one results-sink record (empty for cold starts and unjudged prompts)"""
+        samples = samples_from_results([{"outcome": "passed", **result}])
+        if not samples:
+            return []
+        return check_prompt(samples[0], self.history.get(result["prompt"], []), self.latency_limit,
+                            self.score_limit, self.min_samples)
+
+
+class BaselinePlugin:
+    """Compares the finished run with the rolling baseline, then adds it to the history.
+
+    Registered on the controller only; the run's records come from the
+    results sink files, so xdist workers need no extra plumbing.
+    """
+
+    def __init__(self, store, results_path, run_id, runs=10, latency_limit=0.4, score_limit=1.0, alpha=0.05,
+                 action="mark"):
+        self.store = store
+        self.results_path = results_path
+        self.run_id = run_id
+        self.runs = runs
+        self.latency_limit = latency_limit
+        self.score_limit = score_limit
+        self.alpha = alpha
+        self.action = action
+        self.baseline_runs = 0
+        self.recorded = 0
+        self.regressions = []
+
+    def evaluate(self):
+        current = samples_from_results(load_results(self.results_path, self.run_id))
+        run_ids = self.store.recent_runs(self.runs, exclude=self.run_id)
+        self.baseline_runs = len(run_ids)
+        self.regressions = compare_categories(current, self.store.samples(run_ids), self.latency_limit,
+                                              self.score_limit, self.alpha)
+        if current:
+            self.store.add_run(self.run_id, current)
+            self.recorded = len(current)
+        return self.regressions
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        self.evaluate()
+        if self.regressions and self.action == "fail" and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def summary_lines(self):
+        if not self.recorded and not self.regressions:
+            return []
+        lines = [f"{self.recorded} prompt samples recorded; baseline of {self.baseline_runs} previous runs "
+                 f"(limits: latency +{self.latency_limit:.0%}, score -{self.score_limit:g}, alpha {self.alpha:g})"]
+        if not self.regressions:
+            lines.append("no category regressions")
+        lines.extend(f"REGRESSION {r.describe()}" for r in self.regressions)
+        return lines
@@ -0,0 +1,136 @@
+# utils/results_sink.py
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+
+
+def new_run_id():
+    return time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def worker_path(path, worker=None):
+    """Per-xdist-worker file name, so workers never interleave writes in one file"""
+    worker = worker or os.environ.get("PYTEST_XDIST_WORKER")
+    if not worker:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{worker}{ext}"
+
+
+class ResultsSink:
+    """Append-only JSONL of per-prompt results, written in batches.
+
+    Records are buffered and written with one ``write`` call once
+    ``batch_size`` of them are waiting or ``flush_interval`` seconds have
+    passed since the last flush, instead of one small file per value.
+    """
+
+    def __init__(self, path, run_id=None, batch_size=50, flush_interval=10.0, clock=time.monotonic):
+        self.path = path
+        self.run_id = run_id or new_run_id()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.buffer = []
+        self.written = 0
+        self.flushes = 0
+        self.last_flush = clock()
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            self.buffer.append({"run_id": self.run_id, "timestamp": time.time(), **record})
+            due = len(self.buffer) >= self.batch_size or self.clock() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            records, self.buffer = self.buffer, []
+            self.last_flush = self.clock()
+            if not records:
+                return
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            self.written += len(records)
+            self.flushes += 1
+
+    def close(self):
+        self.flush()
+
+    def summary_lines(self):
+        if not self.written:
+            return []
+        return [f"{self.written} prompt results in {self.flushes} writes -> {self.path} (run {self.run_id})"]
+
+
+def load_results(path, run_id=None):
+    """Records of ``path`` and its per-worker siblings, optionally of one run only ("latest" for the newest)"""
+    root, ext = os.path.splitext(path)
+    records = []
+    for name in sorted(set(glob.glob(path) + glob.glob(f"{glob.escape(root)}.*{ext}"))):
+        with open(name, "r", encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    if run_id == "latest" and records:
+        run_id = max(records, key=lambda r: r["timestamp"])["run_id"]
+    if run_id is not None:
+        records = [r for r in records if r["run_id"] == run_id]
+    return records
+
+
+CAPTURE_POLICIES = ("failure", "sample", "always", "never")
+
+
+def should_capture(policy, failed, key, sample_rate=0.0):
+    """Whether to keep the attachments (screenshot, DOM snapshot, bot reply) of a finished test.
+
+    ``failure`` captures failed tests only; ``sample`` also keeps a stable
+    ``sample_rate`` share of passing ones, chosen by hashing ``key`` so the
+    same tests are sampled on every run.
+    """
+    if policy == "never":
+        return False
+    if failed or policy == "always":
+        return True
+    if policy == "sample":
+        return zlib.crc32(key.encode("utf-8")) % 10000 < sample_rate * 10000
+    return False
+
+
+class AttachmentBuffer:
+    """Allure attachments of one test, kept or dropped by a capture policy.
+
+    ``always`` attaches straight away, ``never`` drops everything; with
+    ``failure`` or ``sample`` the attachments wait until ``finish`` knows
+    whether the test failed (see should_capture).
+    """
+
+    def __init__(self, policy="always", key="", sample_rate=0.0):
+        self.policy = policy
+        self.key = key
+        self.sample_rate = sample_rate
+        self.pending = []
+
+    def attach(self, body, name, attachment_type):
+        if self.policy == "always":
+            self._attach(body, name, attachment_type)
+        elif self.policy != "never":
+            self.pending.append((body, name, attachment_type))
+
+    def finish(self, failed):
+        pending, self.pending = self.pending, []
+        if should_capture(self.policy, failed, self.key, self.sample_rate):
+            for body, name, attachment_type in pending:
+                self._attach(body, name, attachment_type)
+
+    @staticmethod
+    def _attach(body, name, attachment_type):
+        import allure
+
+        allure.attach(body, name=name, attachment_type=attachment_type)
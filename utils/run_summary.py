@@ -0,0 +1,19 @@
+# utils/run_summary.py
+import pytest
+
+summary_sections_key = pytest.StashKey()
+
+
+def add_summary_section(config, title, source):
+    """Print ``source.summary_lines()`` under ``title`` in the terminal summary"""
+    config.stash.setdefault(summary_sections_key, []).append((title, source))
+
+
+def write_summary_sections(terminalreporter, config):
+    for title, source in config.stash.get(summary_sections_key, []):
+        lines = source.summary_lines()
+        if not lines:
+            continue
+        terminalreporter.section(title)
+        for line in lines:
+            terminalreporter.write_line(line)
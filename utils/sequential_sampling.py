@@ -0,0 +1,180 @@
+# utils/sequential_sampling.py
+"""Repeat a prompt only until its judge score is settled against the threshold.
+
+A SequentialTest takes one score per sample (a fresh bot reply, judged
+without the verdict cache after the first) and keeps a Student-t
+confidence interval around the mean. It stops as soon as the interval
+clears ``threshold`` (pass) or falls below it (fail),
+or when no remaining samples could change the fixed-N verdict; at
+``max_samples`` it decides by the mean and marks the verdict as
+inconclusive. SamplingStats counts the bot and judge calls this took
+against running every prompt ``max_samples`` times.
+
+Judge scores are whole numbers, so two identical scores say little about
+the noise: the spread used for the interval never drops below
+``min_spread``. The interval is re-checked after every sample, which
+makes the real error rate somewhat higher than ``1 - confidence``.
+"""
+import functools
+import math
+import statistics
+from dataclasses import dataclass
+
+SCORE_RANGE = (0, 10)
+
+
+def t_coverage(t, df):
+    """P(|T| < t) for Student's t with ``df`` degrees of freedom (closed form for integer df)"""
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    total = term = 1.0
+    if df % 2:
+        if df == 1:
+            return 2 * theta / math.pi
+        for k in range(1, (df - 1) // 2):
+            term *= cos2 * (2 * k) / (2 * k + 1)
+            total += term
+        return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    for k in range(1, df // 2):
+        term *= cos2 * (2 * k - 1) / (2 * k)
+        total += term
+    return math.sin(theta) * total
+
+
+@functools.lru_cache(maxsize=None)
+def t_quantile(confidence, df):
+    """Half-width multiplier of a two-sided ``confidence`` interval with ``df`` degrees of freedom"""
+    low, high = 0.0, 1.0
+    while t_coverage(high, df) < confidence:
+        high *= 2
+    for _ in range(60):
+        middle = (low + high) / 2
+        if t_coverage(middle, df) < confidence:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+@dataclass
+class Decision:
+    verdict: str = None     # "pass", "fail", or None while still sampling
+    samples: int = 0
+    mean: float = None
+    low: float = None
+    high: float = None
+    settled: bool = False   # stopped by the interval or curtailment, not by running out of samples
+
+    def describe(self):
+        interval = f" [{self.low:.2f}, {self.high:.2f}]" if self.low is not None else ""
+        how = "settled" if self.settled else "inconclusive"
+        return f"{self.verdict} after {self.samples} samples, mean {self.mean:.2f}{interval} ({how})"
+
+
+class SequentialTest:
+    """Scores of one prompt, sampled until the verdict against ``threshold`` is settled"""
+
+    def __init__(self, threshold, max_samples=5, min_samples=2, confidence=0.95, min_spread=0.5,
+                 score_range=SCORE_RANGE):
+        if max_samples < 1:
+            raise ValueError("max_samples must be at least 1")
+        self.threshold = threshold
+        self.max_samples = max_samples
+        # An interval needs two scores
+        self.min_samples = max(2, min_samples)
+        self.confidence = confidence
+        self.min_spread = min_spread
+        self.score_range = score_range
+        self.scores = []
+        self.decision = Decision()
+
+    @property
+    def done(self):
+        return self.decision.verdict is not None
+
+    def add(self, score):
+        """Record one sample's score and return the decision so far"""
+        if self.done:
+            raise RuntimeError("verdict already settled")
+        self.scores.append(score)
+        n = len(self.scores)
+        mean = sum(self.scores) / n
+        decision = Decision(samples=n, mean=mean)
+
+        if n >= self.min_samples:
+            spread = max(statistics.stdev(self.scores), self.min_spread)
+            half = t_quantile(self.confidence, n - 1) * spread / math.sqrt(n)
+            decision.low, decision.high = mean - half, mean + half
+            if decision.low >= self.threshold:
+                decision.verdict, decision.settled = "pass", True
+            elif decision.high < self.threshold:
+                decision.verdict, decision.settled = "fail", True
+
+        # Curtailment: the rest of the samples could not move the fixed-N mean across the threshold
+        remaining = self.max_samples - n
+        if decision.verdict is None and remaining:
+            lowest, highest = self.score_range
+            if (sum(self.scores) + remaining * lowest) / self.max_samples >= self.threshold:
+                decision.verdict, decision.settled = "pass", True
+            elif (sum(self.scores) + remaining * highest) / self.max_samples < self.threshold:
+                decision.verdict, decision.settled = "fail", True
+
+        if decision.verdict is None and not remaining:
+            decision.verdict = "pass" if mean >= self.threshold else "fail"
+        self.decision = decision
+        return decision
+
+
+class SamplingStats:
+    """Bot and judge calls of sequential sampling against fixed-N repetition, per category"""
+
+    def __init__(self, max_samples=5, min_samples=2, confidence=0.95, min_spread=0.5):
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.confidence = confidence
+        self.min_spread = min_spread
+        self.categories = {}
+
+    def start(self, threshold):
+        return SequentialTest(threshold, self.max_samples, self.min_samples, self.confidence, self.min_spread)
+
+    def record(self, category, test, bot_calls, judge_calls):
+        """Count one finished prompt; fixed-N judge calls are estimated from its calls per sample"""
+        stats = self.categories.setdefault(category, {
+            "prompts": 0, "samples": 0, "settled": 0, "bot_calls": 0, "judge_calls": 0,
+            "fixed_bot_calls": 0, "fixed_judge_calls": 0.0,
+        })
+        samples = test.decision.samples
+        stats["prompts"] += 1
+        stats["samples"] += samples
+        stats["settled"] += test.decision.settled
+        stats["bot_calls"] += bot_calls
+        stats["judge_calls"] += judge_calls
+        stats["fixed_bot_calls"] += self.max_samples
+        stats["fixed_judge_calls"] += judge_calls / samples * self.max_samples if samples else 0
+
+    def totals(self):
+        totals = {}
+        for stats in self.categories.values():
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def summary_lines(self):
+        if not self.categories:
+            return []
+
+        def saved(actual, fixed):
+            fixed = round(fixed)
+            share = f" ({(fixed - actual) / fixed:.0%})" if fixed else ""
+            return f"{actual} vs {fixed} fixed-N, saved {fixed - actual}{share}"
+
+        lines = [f"up to {self.max_samples} samples per prompt, {self.confidence:.0%} interval, "
+                 f"min spread {self.min_spread:g}"]
+        for category, stats in sorted(self.categories.items()):
+            lines.append(f"{category}: {stats['prompts']} prompts, {stats['samples'] / stats['prompts']:.1f} samples "
+                         f"each, {stats['prompts'] - stats['settled']} inconclusive")
+        totals = self.totals()
+        lines.append("bot calls: " + saved(totals["bot_calls"], totals["fixed_bot_calls"]))
+        lines.append("judge calls: " + saved(totals["judge_calls"], totals["fixed_judge_calls"]))
+        return lines
@@ -0,0 +1,30 @@
+# utils/sharding.py
+import hashlib
+
+
+def shard_key(item):
+    """What decides an item's shard: the prompt for prompt tests, the node id otherwise.
+
+    Keying prompt tests on the prompt text keeps a prompt on the same node
+    when tests are renamed or the corpus is re-sampled.
+    """
+    callspec = getattr(item, "callspec", None)
+    if callspec is not None and "prompt" in callspec.params:
+        return f"prompt:{callspec.params['prompt']}"
+    return item.nodeid
+
+
+def shard_of(key, count):
+    """Stable shard number in [0, count) for ``key``; unlike hash() it does not change between runs"""
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def split_items(items, index, count):
+    """(selected, deselected) test items for shard ``index`` of ``count``"""
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index {index} is not in 0..{count - 1}")
+    selected, deselected = [], []
+    for item in items:
+        (selected if shard_of(shard_key(item), count) == index else deselected).append(item)
+    return selected, deselected
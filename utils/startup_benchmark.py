@@ -0,0 +1,106 @@
+# utils/startup_benchmark.py
+"""Measure how long pytest takes to start up and collect the suite.
+
+Usage::
+
+    python -m utils.startup_benchmark
+    python -m utils.startup_benchmark --runs 10 --budget 2.5 --output results/startup.json
+    python -m utils.startup_benchmark tests/test_login.py
+
+Every run is a fresh ``pytest --collect-only`` subprocess with ``-X
+importtime``, so the numbers include interpreter start, plugin loading,
+conftest and test-module imports. The slowest imports of the last run are
+listed to show what to make lazy next. Exits non-zero when the median run
+is over ``--budget``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that must not load just because the test modules were imported
+HEAVY_MODULES = ("langchain_core", "langchain_groq", "httpx", "requests", "webdriver_manager", "ollama")
+
+TEST_MODULES = ("conftest", "tests.test_stocksense_bot", "tests.test_login")
+
+
+def parse_importtime(stderr):
+    """{module: cumulative microseconds} for top-level imports in ``-X importtime`` output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        # Nested imports are indented under the module that pulled them in
+        if name.startswith(" ") and not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def time_collection(pytest_args=(), runs=5):
+    """Wall time of each ``pytest --collect-only`` run, plus the top-level imports of the last one"""
+    command = [sys.executable, "-X", "importtime", "-m", "pytest", "--collect-only", "-q",
+               "-p", "no:cacheprovider", *pytest_args]
+    timings = []
+    stderr = ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        if result.returncode not in (0, 5):  # 5: no tests collected
+            raise RuntimeError(f"pytest collection failed:\n{result.stdout}\n{result.stderr}")
+        stderr = result.stderr
+    return timings, parse_importtime(stderr)
+
+
+def loaded_modules(modules=TEST_MODULES, watch=HEAVY_MODULES):
+    """Which of ``watch`` end up in sys.modules after importing ``modules`` in a fresh interpreter"""
+    script = (
+        "import importlib, json, sys\n"
+        f"for name in {list(modules)!r}:\n"
+        "    importlib.import_module(name)\n"
+        f"print(json.dumps([m for m in {list(watch)!r} if m in sys.modules]))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(result.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pytest startup and collection time")
+    parser.add_argument("pytest_args", nargs="*", help="Extra arguments for pytest, e.g. a test path")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if the median run takes longer (seconds)")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    args = parser.parse_args(argv)
+
+    timings, imports = time_collection(args.pytest_args, runs=args.runs)
+    heavy = loaded_modules()
+    median = statistics.median(timings)
+
+    print(f"collection: median {median:.2f}s, min {min(timings):.2f}s, max {max(timings):.2f}s over {len(timings)} runs")
+    print("slowest imports:")
+    for name, micros in sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+    print(f"heavy modules loaded by importing the tests: {', '.join(heavy) or 'none'}")
+
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timings": timings, "median": median, "imports": imports, "heavy_modules": heavy}, f, indent=2)
+
+    if args.budget is not None and median > args.budget:
+        print(f"median {median:.2f}s is over the {args.budget:.2f}s budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
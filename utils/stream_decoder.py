@@ -0,0 +1,199 @@
+# utils/stream_decoder.py
+import json
+
+# Events after which the server sends nothing useful
+TERMINAL_EVENTS = ("chat_end", "chat_complete", "chat_completed", "done")
+
+
+class StreamDecoder:
+    """Incremental decoder for the bot's chat event stream.
+
+    Bytes go in as they arrive from the network, in reads of any size; text
+    chunks come out as soon as their event is complete. Both NDJSON
+    (``{"event": ..., "data": {...}}`` per line) and SSE (``event:``/``data:``
+    fields, blank-line separated) framing are understood, picked from the
+    first non-empty line when ``framing="auto"``.
+
+    The reply is kept as a list of chunks and joined once, and the read buffer
+    is compacted once per ``feed`` call, so long replies cost linear time.
+    Undecodable events are counted in ``malformed`` instead of raising.
+    """
+
+    def __init__(self, framing="auto", event_name="chat_streaming", terminal_events=TERMINAL_EVENTS):
+        if framing not in ("auto", "ndjson", "sse"):
+            raise ValueError(f"Unknown framing: {framing}")
+        self.framing = framing
+        self.event_name = event_name
+        self.terminal_events = set(terminal_events)
+        self.parts = []
+        self.events = 0
+        self.malformed = 0
+        self.done = False
+        self._buffer = bytearray()
+        self._sse_event = None
+        self._sse_data = []
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def feed(self, data):
+        """Consume a block of bytes and return the text chunks it completed"""
+        if self.done:
+            return []
+        self._buffer += data
+        chunks = []
+        start = 0
+        while not self.done:
+            end = self._buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line = self._buffer[start:end]
+            start = end + 1
+            chunk = self._handle_line(line)
+            if chunk:
+                chunks.append(chunk)
+        del self._buffer[:start]
+        return chunks
+
+    def flush(self):
+        """Handle whatever is left once the stream has ended"""
+        chunks = []
+        if self._buffer and not self.done:
+            chunk = self._handle_line(bytes(self._buffer))
+            if chunk:
+                chunks.append(chunk)
+        self._buffer.clear()
+        if self.framing == "sse" and not self.done:
+            chunk = self._dispatch_sse()
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def _handle_line(self, line):
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if self.framing == "auto":
+            if not line.strip():
+                return None
+            self.framing = "sse" if line.startswith((b"data:", b"event:", b":", b"id:", b"retry:")) else "ndjson"
+        if self.framing == "sse":
+            return self._handle_sse_line(line)
+        if not line.strip():
+            return None
+        return self._handle_envelope(line)
+
+    def _handle_envelope(self, raw, event_name=None):
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            self.malformed += 1
+            return None
+
+        self.events += 1
+        if event_name is None:
+            if not isinstance(payload, dict):
+                self.malformed += 1
+                return None
+            event_name = payload.get("event")
+            payload = payload.get("data")
+
+        if event_name in self.terminal_events:
+            self.done = True
+            return None
+        if event_name != self.event_name:
+            return None
+        if not isinstance(payload, dict):
+            self.malformed += 1
+            return None
+
+        chunk = payload.get("chunk", "")
+        if not isinstance(chunk, str):
+            self.malformed += 1
+            return None
+        if chunk:
+            self.parts.append(chunk)
+        return chunk
+
+    def _handle_sse_line(self, line):
+        if not line:
+            return self._dispatch_sse()
+        if line.startswith(b":"):
+            return None
+        name, _, value = bytes(line).partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+        if name == b"event":
+            self._sse_event = value.decode("utf-8", "replace")
+        elif name == b"data":
+            self._sse_data.append(value)
+        return None
+
+    def _dispatch_sse(self):
+        event_name, data = self._sse_event, self._sse_data
+        self._sse_event, self._sse_data = None, []
+        if not data:
+            return None
+        raw = b"\n".join(data)
+        if raw.strip() == b"[DONE]":
+            self.done = True
+            return None
+        # A named SSE event carries the bare payload, an unnamed one the full envelope
+        return self._handle_envelope(raw, event_name)
+
+    def iter_chunks(self, blocks, timer=None):
+        """Yield text chunks from an iterable of byte blocks, stopping at a terminal event"""
+        for block in blocks:
+            if timer is not None:
+                timer.on_bytes(len(block))
+            for chunk in self.feed(block):
+                if timer is not None:
+                    timer.on_chunk()
+                yield chunk
+            if self.done:
+                # Let the source finish up now (release the connection, save a cassette)
+                close = getattr(blocks, "close", None)
+                if close is not None:
+                    close()
+                return
+        for chunk in self.flush():
+            if timer is not None:
+                timer.on_chunk()
+            yield chunk
+
+    async def aiter_chunks(self, blocks, timer=None):
+        """Async counterpart of iter_chunks for an async iterable of byte blocks"""
+        async for block in blocks:
+            if timer is not None:
+                timer.on_bytes(len(block))
+            for chunk in self.feed(block):
+                if timer is not None:
+                    timer.on_chunk()
+                yield chunk
+            if self.done:
+                aclose = getattr(blocks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                return
+        for chunk in self.flush():
+            if timer is not None:
+                timer.on_chunk()
+            yield chunk
+
+
+def read_reply(blocks, timer=None, decoder=None, normaliser=None):
+    """Decode a whole stream of byte blocks into the reply text.
+
+    A MarkdownNormaliser passed as ``normaliser`` is fed every chunk as it
+    arrives, so the cleaned text is ready as soon as the stream ends.
+    """
+    decoder = decoder or StreamDecoder()
+    for chunk in decoder.iter_chunks(blocks, timer):
+        if normaliser is not None:
+            normaliser.feed(chunk)
+    if normaliser is not None:
+        normaliser.flush()
+    if timer is not None:
+        timer.metrics.malformed_events = decoder.malformed
+        timer.finish()
+    return decoder.text.strip()
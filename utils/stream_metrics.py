@@ -0,0 +1,191 @@
+# utils/stream_metrics.py
+import glob
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of ``values`` for ``q`` in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class StreamMetrics:
+    """Timings for one streamed reply, all in seconds"""
+    ttfb: float = None
+    ttfc: float = None
+    total: float = None
+    chunk_count: int = 0
+    bytes: int = 0
+    gaps: list = field(default_factory=list)
+    malformed_events: int = 0
+    cold_start: bool = False
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.total if self.total else 0.0
+
+    @property
+    def chunks_per_second(self):
+        return self.chunk_count / self.total if self.total else 0.0
+
+    def as_dict(self):
+        data = asdict(self)
+        gaps = data.pop("gaps")
+        data.update({
+            "bytes_per_second": self.bytes_per_second,
+            "chunks_per_second": self.chunks_per_second,
+            "gap_p50": percentile(gaps, 50),
+            "gap_p95": percentile(gaps, 95),
+            "gap_p99": percentile(gaps, 99),
+            "gap_max": max(gaps) if gaps else None,
+        })
+        return data
+
+
+class StreamTimer:
+    """Collects StreamMetrics while a reply streams in.
+
+    Call ``mark_headers`` when the response headers arrive, ``on_bytes`` for
+    every read, ``on_chunk`` for every ``chat_streaming`` chunk and ``finish``
+    once the stream ends.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.metrics = StreamMetrics()
+        self.started = clock()
+        self.last_chunk = None
+
+    def mark_headers(self):
+        if self.metrics.ttfb is None:
+            self.metrics.ttfb = self.clock() - self.started
+
+    def on_bytes(self, count):
+        if self.metrics.ttfb is None:
+            self.mark_headers()
+        self.metrics.bytes += count
+
+    def on_chunk(self):
+        now = self.clock()
+        if self.last_chunk is None:
+            self.metrics.ttfc = now - self.started
+        else:
+            self.metrics.gaps.append(now - self.last_chunk)
+        self.last_chunk = now
+        self.metrics.chunk_count += 1
+
+    def finish(self):
+        self.metrics.total = self.clock() - self.started
+        return self.metrics
+
+
+SUMMARY_FIELDS = ("ttfb", "ttfc", "total", "chunks_per_second", "bytes_per_second")
+
+
+class MetricsRecorder:
+    """Per-prompt stream metrics for a run, written as JSONL plus category summaries"""
+
+    def __init__(self, records=None):
+        self.records = records if records is not None else []
+
+    @classmethod
+    def load(cls, path):
+        """Recorder holding the records of a JSONL file written by ``write``"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    @classmethod
+    def collect_workers(cls, path):
+        """Recorder holding the records of the xdist worker files next to ``path``, which are removed"""
+        root, ext = os.path.splitext(path)
+        records = []
+        for name in sorted(glob.glob(f"{glob.escape(root)}.gw*{ext}")):
+            records.extend(cls.load(name).records)
+            os.remove(name)
+        return cls(records)
+
+    def add(self, category, prompt, metrics, source="live"):
+        """Record one reply's timings; ``source`` is live, replay (cassettes) or mock (mock bot server)"""
+        self.records.append({"category": category, "prompt": prompt, "source": source, **metrics.as_dict()})
+
+    def set_score(self, prompt, score):
+        """Attach the judge's score to the latest record of ``prompt``"""
+        for record in reversed(self.records):
+            if record["prompt"] == prompt:
+                record["score"] = score
+                return
+
+    def summary_by_category(self):
+        """p50/p95/p99 of each SUMMARY_FIELDS value per category, cold starts excluded, plus judge scores.
+
+        Replayed and mock-server timings say nothing about the live bot, so
+        they are summarised apart, as "<category> (replay)" or "<category> (mock)".
+        """
+        by_category = {}
+        for record in self.records:
+            source = record.get("source", "live")
+            key = record["category"] if source == "live" else f"{record['category']} ({source})"
+            by_category.setdefault(key, []).append(record)
+
+        summary = {}
+        for category, all_records in sorted(by_category.items()):
+            records = [r for r in all_records if not r["cold_start"]]
+            summary[category] = {"count": len(records)}
+            for name in SUMMARY_FIELDS:
+                values = [r[name] for r in records if r[name] is not None]
+                summary[category][name] = {
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "p99": percentile(values, 99),
+                }
+            # A cold start slows the stream down, not the answer, so scores keep them
+            scores = [r["score"] for r in all_records if r.get("score") is not None]
+            if scores:
+                summary[category]["score"] = {
+                    "count": len(scores),
+                    "mean": sum(scores) / len(scores),
+                    "min": min(scores),
+                    "p50": percentile(scores, 50),
+                }
+        return summary
+
+    def write(self, path, summary=True):
+        """Write the records as JSONL, plus the category summary next to them unless ``summary`` is false"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+        if not summary:
+            return None
+        summary_path = os.path.splitext(path)[0] + "_summary.json"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary_by_category(), f, indent=2)
+        return summary_path
+
+    def summary_lines(self):
+        lines = []
+        for category, stats in self.summary_by_category().items():
+            parts = []
+            for name in ("ttfb", "ttfc", "total"):
+                p = stats[name]
+                if p["p50"] is not None:
+                    parts.append(f"{name} p50/p95/p99 {p['p50']:.2f}/{p['p95']:.2f}/{p['p99']:.2f}s")
+            if "score" in stats:
+                parts.append(f"score mean {stats['score']['mean']:.1f} (min {stats['score']['min']})")
+            lines.append(f"{category} ({stats['count']}): " + ", ".join(parts))
+        malformed = sum(r["malformed_events"] for r in self.records)
+        if malformed:
+            lines.append(f"malformed stream events: {malformed}")
+        return lines
@@ -0,0 +1,225 @@
+# utils/test_ordering.py
+"""Per-test duration and outcome history, and test ordering from it.
+
+Test durations and outcomes go into a SQLite store. Durations are of the
+call phase only: session fixtures (bot prefetch, pipeline, browser pool)
+are set up by whichever test happens to run first, and would skew its
+history. From the last ``runs`` runs:
+
+* ``longest-first`` sorts the collection by median duration, slowest
+  first. Under xdist, LongestFirstScheduling deals the first tests out
+  one per worker in turn and then hands out one test at a time, so each
+  worker that frees up takes the longest test left
+  (longest-processing-time-first) and workers finish at about the same
+  time instead of one ending on a slow prompt picked up last;
+* ``flaky-first`` puts tests that failed last time, then tests that failed
+  or flipped between pass and fail, ahead of the rest (which stay
+  longest-first), so ``-x``/``--maxfail`` stops a doomed run early.
+
+Tests without history get the median of the known durations.
+"""
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+
+from xdist.scheduler import LoadScheduling
+
+DEFAULT_HISTORY_PATH = os.path.join(".stocksense_cache", "test_history.sqlite3")
+
+
+class RunHistory:
+    """Duration and outcome of every test of past runs, one row per test per run"""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            " run_id TEXT NOT NULL,"
+            " recorded REAL NOT NULL,"
+            " nodeid TEXT NOT NULL,"
+            " duration REAL NOT NULL,"
+            " outcome TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outcomes_run ON outcomes (run_id)")
+
+    def add_run(self, run_id, rows):
+        """Store ``(nodeid, duration, outcome)`` rows of one run"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO outcomes (run_id, recorded, nodeid, duration, outcome) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, now, nodeid, duration, outcome) for nodeid, duration, outcome in rows]
+            )
+            self.conn.commit()
+
+    def recent(self, runs=10):
+        """{nodeid: NodeHistory} over the last ``runs`` runs"""
+        with self.lock:
+            run_ids = [row[0] for row in self.conn.execute(
+                "SELECT run_id FROM outcomes GROUP BY run_id ORDER BY MAX(recorded) DESC, MAX(rowid) DESC LIMIT ?",
+                (runs,)
+            )]
+            if not run_ids:
+                return {}
+            marks = ",".join("?" * len(run_ids))
+            rows = self.conn.execute(
+                f"SELECT nodeid, duration, outcome FROM outcomes WHERE run_id IN ({marks})"
+                " ORDER BY recorded DESC, rowid DESC", run_ids
+            ).fetchall()
+        stats = {}
+        for nodeid, duration, outcome in rows:
+            entry = stats.setdefault(nodeid, NodeHistory())
+            entry.durations.append(duration)
+            entry.outcomes.append(outcome)
+        return stats
+
+    def close(self):
+        self.conn.close()
+
+
+@dataclass
+class NodeHistory:
+    """One test's recent history, newest first"""
+
+    durations: list = field(default_factory=list)
+    outcomes: list = field(default_factory=list)
+
+    @property
+    def duration(self):
+        return statistics.median(self.durations)
+
+    @property
+    def last_failed(self):
+        return self.outcomes[0] == "failed"
+
+    @property
+    def failure_rate(self):
+        return self.outcomes.count("failed") / len(self.outcomes)
+
+    @property
+    def flips(self):
+        """Changes between passed and failed from one run to the next"""
+        return sum(a != b for a, b in zip(self.outcomes, self.outcomes[1:]))
+
+    @property
+    def risk(self):
+        """Sort key for flaky-first, highest first; (False, 0.0) for a test that always passed"""
+        return self.last_failed, self.failure_rate + self.flips / len(self.outcomes)
+
+
+def expected_durations(nodeids, stats):
+    """{nodeid: median duration}, with the median of the known ones for tests without history"""
+    known = [stats[nodeid].duration for nodeid in nodeids if nodeid in stats]
+    default = statistics.median(known) if known else 0.0
+    return {nodeid: stats[nodeid].duration if nodeid in stats else default for nodeid in nodeids}
+
+
+def order_items(items, stats, order="longest-first"):
+    """``items`` in ``order``; ties keep collection order, so every xdist worker collects the same list"""
+    if order == "file" or not stats:
+        return list(items)
+    durations = expected_durations([item.nodeid for item in items], stats)
+    no_risk = (False, 0.0)
+
+    def key(indexed):
+        index, item = indexed
+        risk = stats[item.nodeid].risk if order == "flaky-first" and item.nodeid in stats else no_risk
+        return tuple(-x for x in risk) + (-durations[item.nodeid], index)
+
+    return [item for _, item in sorted(enumerate(items), key=key)]
+
+
+class LongestFirstScheduling(LoadScheduling):
+    """xdist load scheduling for an ordered collection: no worker starts with two of the longest tests.
+
+    Plain load scheduling sends each worker a block of consecutive tests to
+    begin with, so the two longest would run back to back on the first
+    worker. Here the first two rounds are dealt one test per worker, then
+    each worker is topped up one test at a time as it finishes.
+    """
+
+    def __init__(self, config, log=None):
+        super().__init__(config, log)
+        if self.maxschedchunk is None:
+            self.maxschedchunk = 1
+
+    def schedule(self):
+        # Mirrors LoadScheduling.schedule and uses its internals (collection, pending,
+        # _check_nodes_have_same_collection, _send_tests) as of pytest-xdist 3.6;
+        # recheck against it when upgrading xdist
+        assert self.collection_is_completed
+        if self.collection is not None:
+            super().schedule()
+            return
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+
+        self.collection = next(iter(self.node2collection.values()))
+        self.pending[:] = range(len(self.collection))
+        # Two rounds, as load scheduling keeps two tests queued per worker
+        for _ in range(2):
+            for node in self.nodes:
+                if not self.pending:
+                    break
+                self._send_tests(node, 1)
+        if not self.pending:
+            for node in self.nodes:
+                node.shutdown()
+
+
+class OrderingPlugin:
+    """Records each test's duration and outcome for the next run's ordering, and per-worker busy time.
+
+    Registered on the controller only; under xdist the workers' reports
+    reach it through ``pytest_runtest_logreport``.
+    """
+
+    def __init__(self, store, run_id, order="file"):
+        self.store = store
+        self.run_id = run_id
+        self.order = order
+        self.tests = {}
+        self.worker_busy = {}
+        self.recorded = 0
+
+    def pytest_runtest_logreport(self, report):
+        duration, outcome = self.tests.get(report.nodeid, (0.0, "passed"))
+        if report.when == "call":
+            duration += report.duration
+        if report.failed:
+            outcome = "failed"
+        elif report.skipped and outcome != "failed":
+            outcome = "skipped"
+        self.tests[report.nodeid] = (duration, outcome)
+        node = getattr(report, "node", None)
+        worker = node.gateway.id if node is not None else "main"
+        self.worker_busy[worker] = self.worker_busy.get(worker, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        # Skipped tests say nothing about how long a test takes or whether it passes
+        rows = [(nodeid, duration, outcome) for nodeid, (duration, outcome) in self.tests.items()
+                if outcome != "skipped"]
+        if rows:
+            self.store.add_run(self.run_id, rows)
+            self.recorded = len(rows)
+        self.store.close()
+
+    def summary_lines(self):
+        if not self.recorded:
+            return []
+        lines = [f"order: {self.order}; {self.recorded} test durations recorded in {self.store.path}"]
+        if len(self.worker_busy) > 1:
+            busy = sorted(self.worker_busy.items())
+            spread = max(self.worker_busy.values()) - min(self.worker_busy.values())
+            lines.append("worker busy time: " + ", ".join(f"{worker} {seconds:.1f}s" for worker, seconds in busy)
+                         + f" (spread {spread:.1f}s)")
+        return lines
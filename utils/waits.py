@@ -0,0 +1,276 @@
+# utils/waits.py
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from utils.browser_pool import LOGIN_API_URL
+
+
+class WaitTimeout(TimeoutError):
+    """A condition did not hold before its timeout"""
+
+
+@dataclass
+class WaitRecord:
+    description: str
+    elapsed: float
+    satisfied: bool
+    polls: int
+
+
+class WaitRecorder:
+    """How long every wait in a run actually took"""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+
+    @property
+    def total(self):
+        return sum(r.elapsed for r in self.records)
+
+    def report(self, records=None):
+        records = self.records if records is None else records
+        return "\n".join(
+            f"{r.elapsed:6.2f}s  {'ok     ' if r.satisfied else 'timeout'}  {r.polls:3d} polls  {r.description}"
+            for r in records
+        )
+
+    def summary_lines(self):
+        if not self.records:
+            return []
+        timeouts = sum(1 for r in self.records if not r.satisfied)
+        return [f"{len(self.records)} waits, {self.total:.1f}s total, "
+                f"{self.total / len(self.records):.2f}s mean, {timeouts} timed out"]
+
+
+class Waiter:
+    """Polls browser conditions with a growing interval instead of sleeping a fixed time.
+
+    Polling starts at ``initial_interval`` and backs off by ``backoff`` up to
+    ``max_interval``, so fast pages are seen within tens of milliseconds while
+    slow ones are not hammered. Exceptions raised by a condition (element not
+    there yet, stale element) count as "not yet".
+    """
+
+    def __init__(self, driver, recorder=None, timeout=10.0, initial_interval=0.05,
+                 max_interval=0.5, backoff=1.5, clock=time.monotonic, sleep=time.sleep):
+        self.driver = driver
+        self.recorder = recorder or WaitRecorder()
+        self.timeout = timeout
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.first_record = len(self.recorder.records)
+
+    @property
+    def records(self):
+        """Waits made through this waiter"""
+        return self.recorder.records[self.first_record:]
+
+    def until(self, condition, timeout=None, description="condition", raise_on_timeout=True):
+        """Return the first truthy value of ``condition(driver)``"""
+        timeout = self.timeout if timeout is None else timeout
+        started = self.clock()
+        deadline = started + timeout
+        interval = self.initial_interval
+        polls = 0
+        last_error = None
+
+        while True:
+            polls += 1
+            try:
+                value = condition(self.driver)
+            except Exception as e:
+                value, last_error = None, e
+            if value:
+                self.recorder.add(WaitRecord(description, self.clock() - started, True, polls))
+                return value
+
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            self.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+        self.recorder.add(WaitRecord(description, self.clock() - started, False, polls))
+        if raise_on_timeout:
+            detail = f" (last error: {last_error})" if last_error else ""
+            raise WaitTimeout(f"Timed out after {timeout:.1f}s waiting for {description}{detail}")
+        return None
+
+    def until_any(self, conditions, **kwargs):
+        """Wait for whichever of ``conditions`` holds first"""
+        def any_condition(driver):
+            for condition in conditions:
+                try:
+                    value = condition(driver)
+                except Exception:
+                    continue
+                if value:
+                    return value
+            return None
+        return self.until(any_condition, **kwargs)
+
+    # Conditions
+
+    @staticmethod
+    def url_contains_condition(text):
+        return lambda driver: text in driver.current_url
+
+    @staticmethod
+    def element_condition(by, value):
+        return lambda driver: driver.find_element(by, value)
+
+    @staticmethod
+    def request_finished_condition(url_part, since):
+        """A request whose URL contains ``url_part`` completed after page time ``since`` (ms).
+
+        If no request since then went to ``url_part`` (a wrong or changed API
+        path), any fetch or XHR request that completed counts instead.
+        """
+        script = (
+            "const entries = performance.getEntriesByType('resource').filter("
+            "e => e.startTime >= arguments[1] && e.responseEnd > 0);"
+            "const matching = entries.filter(e => e.name.includes(arguments[0]));"
+            "const requests = entries.filter(e => ['fetch', 'xmlhttprequest'].includes(e.initiatorType));"
+            "return (matching.length ? matching : requests).length > 0;"
+        )
+        return lambda driver: driver.execute_script(script, url_part, since)
+
+    # Shortcuts
+
+    def url_contains(self, text, **kwargs):
+        kwargs.setdefault("description", f"URL to contain {text!r}")
+        return self.until(self.url_contains_condition(text), **kwargs)
+
+    def element(self, by, value, **kwargs):
+        kwargs.setdefault("description", f"element {value!r}")
+        return self.until(self.element_condition(by, value), **kwargs)
+
+    def clickable(self, by, value, **kwargs):
+        def condition(driver):
+            element = driver.find_element(by, value)
+            return element if element.is_displayed() and element.is_enabled() else None
+        kwargs.setdefault("description", f"clickable element {value!r}")
+        return self.until(condition, **kwargs)
+
+    def property_set(self, element, name, **kwargs):
+        kwargs.setdefault("description", f"element property {name!r}")
+        return self.until(lambda driver: element.get_property(name), **kwargs)
+
+    def page_ready(self, by=None, value=None, **kwargs):
+        """Document finished loading and, if given, the element (by, value) is present"""
+        def condition(driver):
+            if driver.execute_script("return document.readyState") != "complete":
+                return None
+            return driver.find_element(by, value) if by is not None else True
+        kwargs.setdefault("description", "page ready" + (f" with {value!r}" if value else ""))
+        return self.until(condition, **kwargs)
+
+    def page_time(self):
+        """The page's performance.now(), to pass as ``since`` to request conditions"""
+        return self.driver.execute_script("return performance.now();")
+
+    def login_settled(self, since, timeout=10.0, settle=1.0, success_marker="chat",
+                      login_path=urlsplit(LOGIN_API_URL).path):
+        """Wait until a login attempt has an outcome and return whether it logged in.
+
+        Returns as soon as the URL shows ``success_marker`` or the login
+        request made after ``since`` has completed; in the second case it
+        allows ``settle`` more seconds for the redirect to land.
+        """
+        self.until_any(
+            [self.url_contains_condition(success_marker), self.request_finished_condition(login_path, since)],
+            timeout=timeout, description="login request to finish", raise_on_timeout=False
+        )
+        if success_marker in self.driver.current_url:
+            return True
+        return bool(self.url_contains(success_marker, timeout=settle, raise_on_timeout=False))
+
+
+VIRTUAL_CLOCK_JS = r"""
+(() => {
+  if (window.__virtualClock) return;
+  const RealDate = Date;
+  const realSetTimeout = window.setTimeout.bind(window);
+  const realClearTimeout = window.clearTimeout.bind(window);
+  const realPerformanceNow = performance.now.bind(performance);
+  let offset = Number(window.sessionStorage.getItem('__virtualClockOffset') || 0);
+  const timers = new Map();
+  let nextId = 1;
+  const now = () => RealDate.now() + offset;
+
+  class VirtualDate extends RealDate {
+    constructor(...args) { if (args.length === 0) { super(now()); } else { super(...args); } }
+    static now() { return now(); }
+  }
+  window.Date = VirtualDate;
+  performance.now = () => realPerformanceNow() + offset;
+
+  const schedule = (fn, delay, args, repeat) => {
+    const id = nextId++;
+    const run = () => {
+      const timer = timers.get(id);
+      if (!timer) return;
+      if (repeat) { timer.due = now() + delay; timer.handle = realSetTimeout(run, delay); } else { timers.delete(id); }
+      typeof fn === 'function' ? fn(...args) : (0, eval)(fn);
+    };
+    timers.set(id, { run, due: now() + delay, handle: realSetTimeout(run, delay) });
+    return id;
+  };
+  const clear = (id) => { const t = timers.get(id); if (t) { realClearTimeout(t.handle); timers.delete(id); } };
+  window.setTimeout = (fn, delay = 0, ...args) => schedule(fn, Number(delay) || 0, args, false);
+  window.setInterval = (fn, delay = 0, ...args) => schedule(fn, Math.max(Number(delay) || 0, 1), args, true);
+  window.clearTimeout = clear;
+  window.clearInterval = clear;
+
+  window.__virtualClock = {
+    advance(ms) {
+      offset += ms;
+      window.sessionStorage.setItem('__virtualClockOffset', String(offset));
+      for (const [id, timer] of [...timers]) {
+        if (timer.due <= now()) { realClearTimeout(timer.handle); try { timer.run(); } catch (e) { console.error(e); } }
+      }
+      return offset;
+    },
+    offset: () => offset,
+  };
+})();
+"""
+
+
+class VirtualClock:
+    """Shifts the page's Date, performance.now and timers forward without waiting.
+
+    The shim is installed for every new document in the browser session, so
+    it covers the next page load; the offset survives reloads in
+    sessionStorage. Call ``uninstall`` before handing the browser to another
+    test.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.script_id = None
+        self.advanced = 0.0
+
+    def install(self):
+        result = self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": VIRTUAL_CLOCK_JS})
+        self.script_id = result.get("identifier")
+        # Cover the page that is already open as well
+        self.driver.execute_script(VIRTUAL_CLOCK_JS)
+        return self
+
+    def advance(self, seconds):
+        """Move page time forward by ``seconds`` and fire any timers that fell due"""
+        self.driver.execute_script("return window.__virtualClock.advance(arguments[0]);", seconds * 1000)
+        self.advanced += seconds
+
+    def uninstall(self):
+        if self.script_id is not None:
+            self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": self.script_id})
+            self.script_id = None